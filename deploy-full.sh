@@ -106,6 +106,10 @@ docker run -d --name pt-management \
   -e DB_NAME="$DB_NAME" \
   -e PROJECT_ROOT=/project \
   -e SHARED_HOST_PATH="$ROOT_DIR/shared" \
+  -e WARM_POOL_SIZE="${WARM_POOL_SIZE:-0}" \
+  -e HIBERNATE_IDLE_MINUTES="${HIBERNATE_IDLE_MINUTES:-0}" \
+  -e HIBERNATE_MODE="${HIBERNATE_MODE:-stop}" \
+  -e AUTOSCALE_ENABLED="${AUTOSCALE_ENABLED:-false}" \
   pt-management:latest
 
 # 4) Wait for pt-management health endpoint
@@ -11,8 +11,9 @@ from werkzeug.middleware.proxy_fix import ProxyFix
 from dotenv import load_dotenv
 from datetime import timedelta
 
-from ptmanagement.db.connection import get_db_connection
+from ptmanagement.db.connection import PoolExhaustedError, get_db_connection, get_pool_stats
 from ptmanagement.api.auth import verify_ptadmin_credentials
+from ptmanagement.metrics import instrument_app, render_metrics
 
 # Load environment variables
 load_dotenv()
@@ -39,6 +40,9 @@ def create_app():
     app.config['SESSION_COOKIE_SAMESITE'] = 'Lax'
     app.config['PERMANENT_SESSION_LIFETIME'] = timedelta(hours=8)
     
+    # Request latency histograms for /metrics
+    instrument_app(app)
+    
     # Test database connection on startup
     logger.info("Testing database connection...")
     try:
@@ -203,10 +207,23 @@ def create_app():
         logger.error(f"✗ Internal server error: {error}")
         return render_template('error.html', code=500, message='Internal server error'), 500
     
+    @app.errorhandler(PoolExhaustedError)
+    def database_busy(error):
+        """503 when every pooled database connection stays in use"""
+        logger.warning(f"⚠ {error}")
+        if request.path.startswith('/api/'):
+            response = jsonify({'error': str(error)})
+        else:
+            response = render_template('error.html', code=503, message='Database busy, try again shortly')
+        return response, 503, {'Retry-After': '5'}
+    
     # ========================================================================
     # Health Check
     # ========================================================================
     
+    # The API's Docker manager: shares the socket pool, events watcher and state cache
+    from ptmanagement.api.routes import docker_mgr, require_auth_or_internal
+    
     @app.route('/health')
     def health():
         """Health check (no auth required)"""
@@ -219,24 +236,40 @@ def create_app():
             
             # Test Docker socket API
             try:
-                from ptmanagement.docker_mgmt.container import DockerManager
-                docker_mgr = DockerManager()
-                containers = docker_mgr.list_containers()
-                docker_ok = isinstance(containers, list)
+                docker_ok = docker_mgr.health_check()
+                docker_events = docker_mgr.event_status()
+                from ptmanagement.api.warm_pool import get_warm_pool
+                warm_pool = get_warm_pool(docker_mgr).status()
             except Exception as e:
                 logger.warning(f"⚠ Docker check failed: {e}")
                 docker_ok = False
+                docker_events = None
+                warm_pool = None
             
             status = 200 if (db_ok and docker_ok) else 503
             return jsonify({
                 'status': 'healthy' if status == 200 else 'degraded',
                 'database': 'ok' if db_ok else 'error',
-                'docker': 'ok' if docker_ok else 'error'
+                'docker': 'ok' if docker_ok else 'error',
+                'docker_events': docker_events,
+                'warm_pool': warm_pool,
+                'db_pool': get_pool_stats()
             }), status
         except Exception as e:
             logger.error(f"✗ Health check error: {e}")
             return jsonify({'status': 'unhealthy', 'error': str(e)}), 503
     
+    # ========================================================================
+    # Prometheus Metrics
+    # ========================================================================
+    
+    @app.route('/metrics')
+    @require_auth_or_internal
+    def metrics():
+        """Prometheus scrape endpoint (internal network or logged-in session)"""
+        body, content_type = render_metrics(docker_mgr)
+        return body, 200, {'Content-Type': content_type}
+    
     return app
 
 
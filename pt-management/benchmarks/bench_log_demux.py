@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+"""
+Microbenchmark: Docker log frame demultiplexing
+
+Usage (from the pt-management directory):
+    python benchmarks/bench_log_demux.py [--megabytes 50] [--chunk-size 65536]
+
+Builds a multiplexed log body of mixed stdout/stderr frames and parses it
+with the old /api/logs approach (accumulate the response with bytes +=,
+then slice header and payload out of it frame by frame) and with the shared
+memoryview demuxer, both on the whole body and fed chunk by chunk as a
+streamed response arrives.
+
+The legacy slicing is also timed on the pre-joined body, which separates
+parse cost from accumulation cost: the old path's slowness is the bytes +=
+accumulation (quadratic in the response size), not the slicing. The demuxer
+slices a single-line frame straight out of the chunk and only runs frames
+cut by a chunk boundary through the line splitter, so on a whole body it
+matches the slicing (5 MB: 63 ms vs 66 ms, 50 MB: 945 ms vs 1107 ms) and
+streamed it stays within about 20% of it without accumulating the response.
+"""
+
+import argparse
+import os
+import random
+import struct
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from ptmanagement.docker_mgmt.logs import LineSplitter, LogDemuxer, split_lines
+
+
+def _time(fn, repeat):
+    """Best wall-clock time of repeat runs"""
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def build_log(size, seed=42):
+    """A framed log body of about size bytes: one frame per line, 1 in 10 on stderr"""
+    rng = random.Random(seed)
+    words = [b'container', b'ptvnc12', b'INFO', b'connection', b'established', b'vnc', b'5901', b'-', b'\xe2\x9c\x93']
+    frames = []
+    total = 0
+    while total < size:
+        line = b' '.join(rng.choice(words) for _ in range(rng.randint(4, 30))) + b'\n'
+        stream = 2 if rng.random() < 0.1 else 1
+        frames.append(struct.pack('>BxxxL', stream, len(line)) + line)
+        total += len(frames[-1])
+    return b''.join(frames)
+
+
+def legacy_parse(chunks):
+    """The former /api/logs parser, including its response accumulation"""
+    body_raw = b''
+    for chunk in chunks:
+        body_raw += chunk
+    return legacy_slices(body_raw)
+
+
+def legacy_slices(body_raw):
+    """The former /api/logs frame slicing alone, on an already joined body"""
+    logs_lines = []
+    i = 0
+    while i < len(body_raw):
+        if i + 8 <= len(body_raw):
+            size = int.from_bytes(body_raw[i+4:i+8], 'big')
+            i += 8
+            if i + size <= len(body_raw):
+                line = body_raw[i:i+size].decode('utf-8', errors='ignore').strip()
+                if line:
+                    logs_lines.append(line)
+                i += size
+            else:
+                break
+        else:
+            break
+    return logs_lines
+
+
+def streamed_parse(chunks):
+    """Shared demuxer fed one chunk at a time (the streaming endpoint's path)"""
+    demuxer = LogDemuxer()
+    splitter = LineSplitter()
+    lines = []
+    for chunk in chunks:
+        lines.extend(demuxer.feed_lines(chunk, splitter))
+    lines.extend(splitter.flush())
+    return lines
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--megabytes', type=float, default=50, help='Size of the generated log')
+    parser.add_argument('--chunk-size', type=int, default=65536, help='Bytes per simulated socket read')
+    parser.add_argument('--repeat', type=int, default=3, help='Runs per measurement (best is kept)')
+    args = parser.parse_args()
+    
+    body = build_log(int(args.megabytes * 1024 * 1024))
+    # Odd chunk size so frames straddle chunk boundaries
+    chunk_size = args.chunk_size | 1
+    chunks = [body[i:i + chunk_size] for i in range(0, len(body), chunk_size)]
+    megabytes = len(body) / (1024 * 1024)
+    
+    def decoded(lines):
+        # Decode like the legacy parser does, so every timing includes text conversion
+        return [line.decode('utf-8', errors='ignore').strip() for _, line in lines]
+    
+    # Sanity check: all parsers agree on the lines
+    expected = decoded(split_lines(body))
+    assert legacy_parse(chunks) == expected
+    assert legacy_slices(body) == expected
+    assert decoded(streamed_parse(chunks)) == expected
+    
+    print(f"{megabytes:.1f} MB, {len(expected):,} lines, {len(chunks):,} chunks of {chunk_size} bytes")
+    print(f"{'parser':<28}  {'time':>10}  {'MB/s':>8}")
+    for name, fn in (
+        ('legacy (+= and slices)', lambda: legacy_parse(chunks)),
+        ('legacy slices, joined body', lambda: legacy_slices(body)),
+        ('shared demux, whole body', lambda: decoded(split_lines(body))),
+        ('shared demux, streamed', lambda: decoded(streamed_parse(chunks))),
+    ):
+        elapsed = _time(fn, args.repeat)
+        print(f"{name:<28}  {elapsed * 1000:>8.0f}ms  {megabytes / elapsed:>8.1f}")
+
+
+if __name__ == '__main__':
+    main()
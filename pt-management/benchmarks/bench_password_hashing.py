@@ -0,0 +1,55 @@
+#!/usr/bin/env python3
+"""
+Microbenchmark: serial vs. batched Guacamole password hashing
+
+Usage (from the pt-management directory):
+    python benchmarks/bench_password_hashing.py [--sizes 1000,10000]
+
+Compares hashing each password with its own os.urandom() salt on the
+request thread (the old per-user path) against hash_passwords().
+"""
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from ptmanagement.db.password_hash import hash_password, hash_passwords
+
+
+def _time(fn, repeat):
+    """Best wall-clock time of repeat runs"""
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--sizes', default='1000,10000', help='Comma-separated batch sizes')
+    parser.add_argument('--repeat', type=int, default=5, help='Runs per measurement (best is kept)')
+    args = parser.parse_args()
+    
+    print(f"{'users':>8}  {'serial':>10}  {'batched':>10}  {'serial/s':>12}  {'batched/s':>12}")
+    for size in (int(s) for s in args.sizes.split(',')):
+        passwords = [f"Student{i:05d}!" for i in range(size)]
+        
+        serial = _time(lambda: [hash_password(p) for p in passwords], args.repeat)
+        batched = _time(lambda: hash_passwords(passwords), args.repeat)
+        
+        print(f"{size:>8}  {serial * 1000:>8.1f}ms  {batched * 1000:>8.1f}ms  "
+              f"{size / serial:>12,.0f}  {size / batched:>12,.0f}")
+    
+    # Sanity check: batched output verifies with the single-password algorithm
+    for digest, salt in hash_passwords(['IlovePT', 'Cisco123']):
+        assert digest in (hash_password('IlovePT', salt)[0], hash_password('Cisco123', salt)[0])
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,26 @@
+"""gunicorn hooks, loaded automatically from the working directory
+
+The worker count and class stay on the command line in the Dockerfile. The
+thread count comes from GUNICORN_THREADS, which the database pool also reads
+to give every request thread a connection (see ptmanagement.db.connection).
+"""
+
+import os
+import shutil
+
+threads = int(os.environ.get('GUNICORN_THREADS', '16'))
+
+
+def on_starting(server):
+    """Start with an empty Prometheus multiprocess directory (no stale worker files)"""
+    path = os.environ.get('PROMETHEUS_MULTIPROC_DIR')
+    if path:
+        shutil.rmtree(path, ignore_errors=True)
+        os.makedirs(path, exist_ok=True)
+
+
+def child_exit(server, worker):
+    """Drop the live gauges (job queue depth) of a worker that exited"""
+    if os.environ.get('PROMETHEUS_MULTIPROC_DIR'):
+        from prometheus_client import multiprocess
+        multiprocess.mark_process_dead(worker.pid)
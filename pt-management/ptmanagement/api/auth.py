@@ -4,6 +4,7 @@ import os
 import hashlib
 import logging
 from ptmanagement.db.connection import get_db_connection
+from ptmanagement.db.password_hash import hash_password
 
 logger = logging.getLogger(__name__)
 
@@ -32,12 +33,8 @@ def verify_password_hash(password, stored_hash_bytes, stored_salt_bytes):
             logger.warning("No salt found for password verification")
             return False
         
-        # Convert salt bytes to uppercase HEX string (this is what Guacamole does)
-        salt_hex = stored_salt_bytes.hex().upper()
-        
-        # Combine password + salt_hex and hash with SHA256
-        combined = password + salt_hex
-        computed_hash = hashlib.sha256(combined.encode('utf-8')).digest()
+        # SHA256(password + uppercase hex salt), exactly as Guacamole does
+        computed_hash, _ = hash_password(password, stored_salt_bytes)
         
         # Compare the computed hash with the stored hash
         return computed_hash == stored_hash_bytes
@@ -56,12 +53,12 @@ def is_user_admin(username):
     Returns:
         True if user is an admin, False otherwise
     """
+    db = get_db_connection()
+    if not db:
+        logger.error("Failed to connect to database")
+        return False
+    
     try:
-        db = get_db_connection()
-        if not db:
-            logger.error("Failed to connect to database")
-            return False
-        
         cursor = db.cursor()
         
         # Get user entity_id
@@ -73,7 +70,6 @@ def is_user_admin(username):
         
         if not result:
             cursor.close()
-            db.close()
             return False
         
         entity_id = result[0]
@@ -86,11 +82,13 @@ def is_user_admin(username):
         has_admin = cursor.fetchone() is not None
         
         cursor.close()
-        db.close()
         return has_admin
     except Exception as e:
         logger.error(f"Error checking admin status for {username}: {e}")
         return False
+    finally:
+        # Hand the connection back to the pool
+        db.close()
 
 
 def verify_user_credentials(username, password):
@@ -104,12 +102,12 @@ def verify_user_credentials(username, password):
     Returns:
         Tuple (success: bool, is_admin: bool)
     """
+    db = get_db_connection()
+    if not db:
+        logger.error("Failed to connect to database")
+        return False, False
+    
     try:
-        db = get_db_connection()
-        if not db:
-            logger.error("Failed to connect to database")
-            return False, False
-        
         cursor = db.cursor()
         
         # Get the entity_id for this username
@@ -122,7 +120,6 @@ def verify_user_credentials(username, password):
         if not entity_result:
             logger.warning(f"User {username} not found in entity table")
             cursor.close()
-            db.close()
             return False, False
         
         entity_id = entity_result[0]
@@ -137,7 +134,6 @@ def verify_user_credentials(username, password):
         if not user_result:
             logger.warning(f"User {username} not found in user table")
             cursor.close()
-            db.close()
             return False, False
         
         stored_hash, stored_salt = user_result
@@ -146,7 +142,6 @@ def verify_user_credentials(username, password):
         if not verify_password_hash(password, stored_hash, stored_salt):
             logger.warning(f"Invalid password for user {username}")
             cursor.close()
-            db.close()
             return False, False
         
         # Get user's admin status
@@ -157,13 +152,15 @@ def verify_user_credentials(username, password):
         is_admin = cursor.fetchone() is not None
         
         cursor.close()
-        db.close()
         logger.info(f"✓ User {username} authenticated successfully (admin: {is_admin})")
         return True, is_admin
     
     except Exception as e:
         logger.error(f"Error during authentication: {e}")
         return False, False
+    finally:
+        # Hand the connection back to the pool
+        db.close()
 
 
 def verify_ptadmin_credentials(username, password):
@@ -0,0 +1,255 @@
+"""Usage-driven CPU/memory rebalancing for ptvnc containers
+
+Static limits (update_container_resources, the bulk update endpoint,
+tune_ptvnc.sh) give every desktop the same share whether it is idle or
+running a heavy simulation. With AUTOSCALE_ENABLED the autoscaler samples
+/containers/{id}/stats for every running ptvnc container each
+AUTOSCALE_INTERVAL seconds and moves limits towards actual demand:
+
+    cpus    smoothed CPU use x CPU_HEADROOM, within [MIN_CPUS, MAX_CPUS]
+    memory  memory use x MEMORY_HEADROOM, within [MIN_MEMORY, MAX_MEMORY]
+            and never below what the container already uses
+
+When the targets add up to more than the host budget, everything above the
+per-container minimum is scaled down proportionally, so busy desktops get
+more than idle ones but nobody is squeezed below the minimum. Limits are
+only rewritten when they move by more than MIN_CHANGE, to avoid churning
+`docker update` calls. One gunicorn worker at a time (elected with a file
+lock) runs the autoscaler.
+
+Settings (environment variables):
+    AUTOSCALE_ENABLED         Turn the autoscaler on (default false)
+    AUTOSCALE_INTERVAL        Seconds between rebalancing rounds (default 30)
+    AUTOSCALE_CPU_BUDGET      Cores shared by all ptvnc containers (default: host CPUs)
+    AUTOSCALE_MEMORY_BUDGET   Memory shared by all ptvnc containers, e.g. 48G (default: 80% of host RAM)
+    AUTOSCALE_MIN_CPUS / AUTOSCALE_MAX_CPUS       Per-container CPU range (default 0.1 / 2)
+    AUTOSCALE_MIN_MEMORY / AUTOSCALE_MAX_MEMORY   Per-container memory range (default 512M / 2G)
+    AUTOSCALE_LOCK_FILE       Lock file electing the autoscaling worker
+"""
+
+import os
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from ptmanagement.api.leader import LeaderLock
+from ptmanagement.docker_mgmt.stats import cpu_cores, memory_usage
+
+logger = logging.getLogger(__name__)
+
+ENABLED = os.environ.get('AUTOSCALE_ENABLED', 'false').lower() in ('true', '1', 'yes', 'on')
+INTERVAL = float(os.environ.get('AUTOSCALE_INTERVAL', '30'))
+LOCK_FILE = os.environ.get('AUTOSCALE_LOCK_FILE', '/tmp/ptweb-autoscale.lock')
+
+# Limits follow demand with this much room to grow before the next round
+CPU_HEADROOM = 1.5
+MEMORY_HEADROOM = 1.3
+# Memory is never set closer than this to current use (lower limits trigger reclaim/OOM)
+MEMORY_FLOOR_FACTOR = 1.15
+# Weight of the newest CPU reading in the moving average
+SMOOTHING = 0.5
+# Relative change below which limits are left alone
+MIN_CHANGE = 0.1
+# Granularity of applied limits
+CPU_STEP = 0.05
+MEMORY_STEP = 64 * 1024 * 1024
+# Concurrent stats requests per round
+SAMPLE_WORKERS = 16
+
+
+def fit_to_budget(targets, floors, budget):
+    """
+    Scale targets down towards their floors until they fit the budget.
+    
+    Every container keeps its floor; only the part above it is shared out,
+    proportionally to how much each one asked for.
+    
+    Args:
+        targets: Dict of container -> wanted amount
+        floors: Dict of container -> minimum amount
+        budget: Total available
+    
+    Returns:
+        Dict of container -> granted amount
+    """
+    total = sum(targets.values())
+    if total <= budget:
+        return dict(targets)
+    floor_total = sum(floors.values())
+    if floor_total >= budget:
+        # Over-committed even at the minimums - that is the best we can do
+        return dict(floors)
+    scale = (budget - floor_total) / (total - floor_total)
+    return {name: floors[name] + (targets[name] - floors[name]) * scale for name in targets}
+
+
+def _round_to(value, step):
+    return max(step, round(value / step) * step)
+
+
+class Autoscaler:
+    """Periodically rebalances ptvnc CPU/memory limits towards measured usage"""
+    
+    def __init__(self, docker_mgr, enabled=ENABLED, interval=INTERVAL):
+        self.docker_mgr = docker_mgr
+        self._enabled = enabled
+        self.interval = interval
+        self.min_cpus = float(os.environ.get('AUTOSCALE_MIN_CPUS', '0.1'))
+        self.max_cpus = float(os.environ.get('AUTOSCALE_MAX_CPUS', '2'))
+        self.min_memory = docker_mgr._parse_memory_to_bytes(os.environ.get('AUTOSCALE_MIN_MEMORY', '512M'))
+        self.max_memory = docker_mgr._parse_memory_to_bytes(os.environ.get('AUTOSCALE_MAX_MEMORY', '2G'))
+        self.cpu_budget = None
+        self.memory_budget = None
+        self.rounds = 0
+        self.adjustments = 0
+        self.last_run_at = None
+        self.last_plan = {}  # container -> usage and limits from the latest round
+        self._samples = {}  # container -> previous raw stats sample
+        self._cpu_average = {}  # container -> smoothed CPU cores
+        self._thread = None
+        self._leader = LeaderLock(LOCK_FILE, 'resource autoscaling')
+        self._executor = ThreadPoolExecutor(max_workers=SAMPLE_WORKERS, thread_name_prefix='autoscale')
+    
+    @property
+    def enabled(self):
+        return self._enabled and self.docker_mgr.client is not None
+    
+    def start(self):
+        """Start the autoscaler thread (no-op if disabled or already running)"""
+        if not self.enabled or (self._thread and self._thread.is_alive()):
+            return
+        self._thread = threading.Thread(target=self._run, name='autoscaler', daemon=True)
+        self._thread.start()
+    
+    def _run(self):
+        while True:
+            try:
+                if self._leader.acquire():
+                    self.rebalance()
+            except Exception as e:
+                logger.error(f"✗ Autoscaler round failed: {e}")
+            time.sleep(self.interval)
+    
+    def _load_budgets(self):
+        """Host budgets from the environment, else from the Docker host's size"""
+        if self.cpu_budget is not None:
+            return
+        cpu_budget = os.environ.get('AUTOSCALE_CPU_BUDGET')
+        memory_budget = os.environ.get('AUTOSCALE_MEMORY_BUDGET')
+        info = {} if cpu_budget and memory_budget else (self.docker_mgr.client.info() or {})
+        self.cpu_budget = float(cpu_budget) if cpu_budget else float(info.get('NCPU') or 1)
+        self.memory_budget = (
+            self.docker_mgr._parse_memory_to_bytes(memory_budget) if memory_budget
+            else int((info.get('MemTotal') or 0) * 0.8)
+        )
+        logger.info(f"ℹ Autoscaler budget: {self.cpu_budget} CPUs, "
+                    f"{self.docker_mgr._format_bytes_to_memory(self.memory_budget)} memory")
+    
+    def _sample(self, containers):
+        """Take one stats sample of every container concurrently"""
+        names = [c['name'] for c in containers]
+        samples = self._executor.map(lambda c: self.docker_mgr.client.container_stats(c['id']), containers)
+        return dict(zip(names, samples))
+    
+    def rebalance(self):
+        """Sample usage, plan new limits within the budget and apply the ones that moved"""
+        self._load_budgets()
+        containers = [
+            c for c in self.docker_mgr.list_containers(all=False)
+            if c.get('status') == 'running' and c.get('nano_cpus') is not None
+        ]
+        samples = self._sample(containers)
+        
+        cpu_targets, cpu_floors, memory_targets, memory_floors, usage = {}, {}, {}, {}, {}
+        for container in containers:
+            name = container['name']
+            sample = samples.get(name)
+            if not sample:
+                continue
+            cores = cpu_cores(self._samples.get(name), sample)
+            self._samples[name] = sample
+            if cores is None:
+                # First sighting - need a second sample for a rate
+                continue
+            average = self._cpu_average.get(name, cores)
+            average = SMOOTHING * cores + (1 - SMOOTHING) * average
+            self._cpu_average[name] = average
+            memory = memory_usage(sample)
+            usage[name] = {'cpu_cores': round(cores, 3), 'memory_bytes': memory}
+            
+            cpu_floors[name] = self.min_cpus
+            cpu_targets[name] = min(max(average * CPU_HEADROOM, self.min_cpus), self.max_cpus)
+            memory_floors[name] = min(max(self.min_memory, memory * MEMORY_FLOOR_FACTOR), self.max_memory)
+            memory_targets[name] = min(max(memory * MEMORY_HEADROOM, memory_floors[name]), self.max_memory)
+        
+        # Forget containers that went away
+        live = {c['name'] for c in containers}
+        for cache in (self._samples, self._cpu_average):
+            for name in [n for n in cache if n not in live]:
+                del cache[name]
+        
+        cpus = fit_to_budget(cpu_targets, cpu_floors, self.cpu_budget)
+        memory = fit_to_budget(memory_targets, memory_floors, self.memory_budget) if self.memory_budget else memory_targets
+        
+        plan = {}
+        for container in containers:
+            name = container['name']
+            if name not in usage:
+                continue
+            new_cpus = _round_to(cpus[name], CPU_STEP)
+            new_memory = int(_round_to(memory[name], MEMORY_STEP))
+            current_cpus = (container.get('nano_cpus') or 0) / 1e9
+            current_memory = container.get('memory_bytes') or 0
+            plan[name] = dict(usage[name], cpus=new_cpus, memory_bytes_limit=new_memory)
+            
+            if self._moved(current_cpus, new_cpus) or self._moved(current_memory, new_memory):
+                memory_mb = f'{new_memory // (1024 * 1024)}M'
+                if self.docker_mgr.update_container_resources(name, memory_mb, new_cpus):
+                    self.adjustments += 1
+                    plan[name]['adjusted'] = True
+            else:
+                plan[name]['cpus'], plan[name]['memory_bytes_limit'] = current_cpus, current_memory
+        
+        self.last_plan = plan
+        self.rounds += 1
+        self.last_run_at = time.time()
+    
+    @staticmethod
+    def _moved(current, new):
+        """True if a limit changed by more than MIN_CHANGE (or was unlimited)"""
+        if not current:
+            return True
+        return abs(new - current) / current > MIN_CHANGE
+    
+    def status(self):
+        """Settings, budgets, counters and the latest per-container plan"""
+        return {
+            'enabled': self.enabled,
+            'interval': self.interval,
+            'autoscaler': self._leader.held,
+            'cpu_budget': self.cpu_budget,
+            'memory_budget': self.memory_budget,
+            'cpus_range': [self.min_cpus, self.max_cpus],
+            'memory_range': [self.min_memory, self.max_memory],
+            'rounds': self.rounds,
+            'adjustments': self.adjustments,
+            'last_run_at': self.last_run_at,
+            'containers': self.last_plan
+        }
+
+
+_autoscaler = None
+_autoscaler_pid = None
+_autoscaler_lock = threading.Lock()
+
+
+def get_autoscaler(docker_mgr):
+    """Get the autoscaler for the current worker process, creating it on first use"""
+    global _autoscaler, _autoscaler_pid
+    pid = os.getpid()
+    with _autoscaler_lock:
+        if _autoscaler is None or _autoscaler_pid != pid:
+            _autoscaler = Autoscaler(docker_mgr)
+            _autoscaler_pid = pid
+        return _autoscaler
@@ -0,0 +1,167 @@
+"""Concurrent bulk operations on Packet Tracer containers
+
+Bulk endpoints select their containers once, up front: one Docker listing
+(no per-container inspect) plus one mapping query when filtering by user.
+The per-container operation then runs on a bounded thread pool, and every
+container is a job item carrying its own outcome and timing.
+
+Filters (request body "filters" object, all optional, combined with AND):
+    name    glob pattern on the container name, e.g. "ptvnc1*"
+    user    only containers assigned to this username
+    state   Docker state or list of states, e.g. "running" or ["exited", "created"]
+    names   explicit list of container names
+
+Settings (environment variables):
+    BULK_WORKERS   Containers worked on in parallel per bulk job (default 16)
+"""
+
+import os
+import fnmatch
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from ptmanagement.db.guacamole import get_container_user_map
+
+logger = logging.getLogger(__name__)
+
+BULK_WORKERS = int(os.environ.get('BULK_WORKERS', '16'))
+
+FILTER_KEYS = ('name', 'user', 'state', 'names')
+CONTAINER_STATES = ('created', 'running', 'paused', 'restarting', 'removing', 'exited', 'dead')
+
+
+def parse_filters(data):
+    """
+    Validate the "filters" object of a bulk request body.
+    
+    Returns:
+        (filters, error) - filters is a dict with only the given keys
+        (state and names normalized to lists), error a message or None
+    """
+    filters = (data or {}).get('filters') or {}
+    if not isinstance(filters, dict):
+        return None, 'filters must be an object'
+    
+    unknown = set(filters) - set(FILTER_KEYS)
+    if unknown:
+        return None, f"Unknown filter(s): {', '.join(sorted(unknown))}. Use {', '.join(FILTER_KEYS)}"
+    
+    parsed = {}
+    for key in ('name', 'user'):
+        value = filters.get(key)
+        if value in (None, ''):
+            continue
+        if not isinstance(value, str):
+            return None, f'Filter {key} must be a string'
+        parsed[key] = value.strip()
+    
+    for key in ('state', 'names'):
+        value = filters.get(key)
+        if value in (None, '', []):
+            continue
+        values = [value] if isinstance(value, str) else value
+        if not isinstance(values, list) or not all(isinstance(v, str) for v in values):
+            return None, f'Filter {key} must be a string or a list of strings'
+        parsed[key] = values
+    
+    bad_states = set(parsed.get('state', ())) - set(CONTAINER_STATES)
+    if bad_states:
+        return None, f"Unknown state(s): {', '.join(sorted(bad_states))}. Use {', '.join(CONTAINER_STATES)}"
+    return parsed, None
+
+
+def select_containers(docker_mgr, filters):
+    """
+    Packet Tracer containers matching filters, from a single listing.
+    
+    Returns:
+        List of container dicts (list_containers shape, resources not loaded)
+    """
+    containers = docker_mgr.list_containers(all=True, with_resources=False)
+    
+    if 'name' in filters:
+        containers = [c for c in containers if fnmatch.fnmatchcase(c['name'], filters['name'])]
+    if 'names' in filters:
+        wanted = set(filters['names'])
+        containers = [c for c in containers if c['name'] in wanted]
+    if 'state' in filters:
+        states = set(filters['state'])
+        containers = [c for c in containers if c.get('status') in states]
+    if 'user' in filters:
+        user_map = get_container_user_map()
+        containers = [c for c in containers if filters['user'] in user_map.get(c['name'], ())]
+    return containers
+
+
+def run_concurrently(items, operation, label, workers=BULK_WORKERS, on_start=None, on_done=None):
+    """
+    Run operation(item) for every item with bounded parallelism.
+    
+    Args:
+        items: Work items (e.g. container dicts or names)
+        operation: Callable returning a truthy value on success; a falsy
+            return or an exception fails the item
+        label: What the operation does, for errors and thread names (e.g. 'update')
+        workers: Maximum items worked on at once
+        on_start: Optional callback(item) before the operation
+        on_done: Optional callback(item, error, seconds) after it (error None on success)
+    
+    Returns:
+        Dict of index in items -> error message, for the items that failed
+    """
+    failed = {}
+    
+    def run_one(index, item):
+        if on_start:
+            on_start(item)
+        started = time.perf_counter()
+        try:
+            error = None if operation(item) else f'{label.capitalize()} failed'
+        except Exception as e:
+            logger.error(f"✗ {label.capitalize()} of {item} failed: {e}")
+            error = str(e)
+        if error:
+            failed[index] = error
+        if on_done:
+            on_done(item, error, round(time.perf_counter() - started, 3))
+    
+    if items:
+        with ThreadPoolExecutor(max_workers=max(1, min(workers, len(items))),
+                                thread_name_prefix=f'bulk-{label}') as pool:
+            list(pool.map(run_one, range(len(items)), items))
+    return failed
+
+
+def run_bulk(job, containers, operation, stage, done_stage, workers=BULK_WORKERS):
+    """
+    Run operation(container) for every container, reporting each as a job item.
+    
+    Items are in stage while running, then done_stage (with the seconds
+    taken) or failed with the error.
+    
+    Args:
+        job: Job with one item per container name
+        containers: Container dicts from select_containers()
+        operation: Callable returning a truthy value on success; a falsy
+            return or an exception fails the container
+        stage: Item stage while the operation runs (e.g. 'update')
+        done_stage: Item stage once it succeeded (e.g. 'updated')
+        workers: Maximum containers worked on at once
+    
+    Returns:
+        (succeeded, failed) - names in listing order, dict of name -> error
+    """
+    def started(container):
+        job.update(container['name'], status='running', stage=stage)
+    
+    def finished(container, error, seconds):
+        if error:
+            job.update(container['name'], status='failed', error=error, seconds=seconds)
+        else:
+            job.update(container['name'], status='done', stage=done_stage, seconds=seconds)
+    
+    errors = run_concurrently(containers, operation, stage, workers, started, finished)
+    failed = {containers[i]['name']: error for i, error in sorted(errors.items())}
+    succeeded = [c['name'] for c in containers if c['name'] not in failed]
+    return succeeded, failed
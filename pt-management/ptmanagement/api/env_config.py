@@ -48,6 +48,15 @@ class EnvConfigManager:
         
         self.backup_dir = os.path.join(os.path.dirname(self.env_path), '.env_backups')
         os.makedirs(self.backup_dir, exist_ok=True)
+        self._docker_mgr = None
+    
+    @property
+    def docker_mgr(self):
+        """DockerManager for the nginx container, created on first use"""
+        if self._docker_mgr is None:
+            from ptmanagement.docker_mgmt.container import DockerManager
+            self._docker_mgr = DockerManager()
+        return self._docker_mgr
     
     # ========================================================================
     # READ CONFIGURATION
@@ -299,15 +308,14 @@ class EnvConfigManager:
         try:
             nginx_container = os.environ.get('NGINX_CONTAINER', 'pt-nginx1')
             
-            cmd = ['docker', 'exec', nginx_container, 'nginx', '-s', 'reload']
-            result = subprocess.run(cmd, capture_output=True, text=True, timeout=10)
+            exit_code, stdout, stderr = self.docker_mgr.exec_run(nginx_container, ['nginx', '-s', 'reload'])
             
-            if result.returncode == 0:
+            if exit_code == 0:
                 logger.info(f"✓ Nginx reloaded successfully in {nginx_container}")
                 return True, "Nginx reloaded successfully"
             else:
-                logger.error(f"✗ Error reloading nginx: {result.stderr}")
-                return False, result.stderr or "Unknown error"
+                logger.error(f"✗ Error reloading nginx: {stderr}")
+                return False, stderr or "Unknown error"
         
         except Exception as e:
             logger.error(f"✗ Exception reloading nginx: {e}")
@@ -325,20 +333,29 @@ class EnvConfigManager:
             nginx_container = os.environ.get('NGINX_CONTAINER', 'pt-nginx1')
             
             logger.info(f"⏹ Stopping nginx container {nginx_container}...")
-            stop_cmd = ['docker', 'restart', nginx_container]
-            result = subprocess.run(stop_cmd, capture_output=True, text=True, timeout=30)
-            
-            if result.returncode == 0:
+            if self.docker_mgr.restart_container(nginx_container):
                 logger.info(f"✓ Nginx container restarted successfully in {nginx_container}")
                 return True, "Nginx container restarted successfully"
             else:
-                logger.error(f"✗ Error restarting nginx container: {result.stderr}")
-                return False, result.stderr or "Unknown error"
+                logger.error(f"✗ Error restarting nginx container {nginx_container}")
+                return False, f"Failed to restart {nginx_container}"
         
         except Exception as e:
             logger.error(f"✗ Exception restarting nginx container: {e}")
             return False, str(e)
     
+    def read_nginx_config(self, container: str = 'pt-nginx1', path: str = '/etc/nginx/nginx.conf') -> Tuple[bool, str]:
+        """
+        Read the running nginx configuration from the nginx container
+        
+        Returns:
+            tuple: (success, config content or error message)
+        """
+        exit_code, stdout, stderr = self.docker_mgr.exec_run(container, ['cat', path])
+        if exit_code == 0:
+            return True, stdout
+        return False, stderr or "Unknown error"
+    
     def apply_config_changes(self, updates: Dict[str, Any]) -> Tuple[bool, str]:
         """
         Apply configuration changes: update .env, regenerate nginx config, and restart nginx
@@ -571,17 +588,11 @@ class EnvConfigManager:
     # ========================================================================
     
     def get_db_connection(self):
-        """Get a connection to the Guacamole database"""
+        """Get a pooled connection to the Guacamole database (close() returns it to the pool)"""
         try:
-            import mysql.connector
-            
-            connection = mysql.connector.connect(
-                host=os.environ.get('GUAC_DB_HOST', 'guacamole-mariadb'),
-                user=os.environ.get('GUAC_DB_USER', 'ptdbuser'),
-                password=os.environ.get('GUAC_DB_PASSWORD', 'ptdbpass'),
-                database=os.environ.get('GUAC_DB_NAME', 'guacamole_db')
-            )
-            return connection
+            from ptmanagement.db.connection import get_db_connection
+            
+            return get_db_connection()
         except Exception as e:
             logger.error(f"✗ Failed to connect to Guacamole database: {e}")
             return None
@@ -370,25 +370,16 @@ def create_env_config_blueprint():
             JSON with nginx configuration file content
         """
         try:
-            import subprocess
+            # Read the main nginx.conf from the pt-nginx1 container
+            success, config_content = env_manager.read_nginx_config('pt-nginx1', '/etc/nginx/nginx.conf')
             
-            # Execute cat command in the pt-nginx1 container to get the main nginx.conf
-            result = subprocess.run(
-                ['docker', 'exec', 'pt-nginx1', 'cat', '/etc/nginx/nginx.conf'],
-                capture_output=True,
-                text=True,
-                timeout=5
-            )
-            
-            if result.returncode != 0:
-                logger.warning(f"⚠ Failed to retrieve nginx config: {result.stderr}")
+            if not success:
+                logger.warning(f"⚠ Failed to retrieve nginx config: {config_content}")
                 return jsonify({
                     'success': False,
                     'message': 'Failed to retrieve nginx configuration from container'
                 }), 500
             
-            config_content = result.stdout
-            
             return jsonify({
                 'success': True,
                 'config': config_content,
@@ -396,9 +387,6 @@ def create_env_config_blueprint():
                 'container': 'pt-nginx1'
             }), 200
         
-        except subprocess.TimeoutExpired:
-            logger.error("✗ Timeout retrieving nginx config")
-            return jsonify({'success': False, 'message': 'Timeout retrieving configuration'}), 500
         except Exception as e:
             logger.error(f"✗ Error retrieving nginx config: {e}")
             return jsonify({'success': False, 'message': str(e)}), 500
@@ -0,0 +1,226 @@
+"""Idle-session hibernation for ptvnc containers
+
+Every ptvnc container holds 512 MB - 1 GB of RAM whether or not anyone is
+connected. The idle reaper hibernates containers nobody has used through
+Guacamole for HIBERNATE_IDLE_MINUTES and wakes them again when someone
+connects, so a host can carry more student desktops than fit in RAM at once.
+
+Activity comes from Guacamole's own connection history (matched to
+containers through the connection's hostname parameter): open history rows
+are active sessions, and the newest start/end date is the last activity.
+
+Hibernating either stops the container (frees its memory - the default) or
+pauses it (keeps memory, frees CPU, resumes instantly). Hibernated containers
+are recorded in pt_container_hibernation. Guacamole writes a history row
+for every connection attempt, even when the container is down, so a row
+newer than the record means someone is trying to connect; the reaper then
+starts/unpauses the container within HIBERNATE_RESUME_POLL seconds and the
+Guacamole client's automatic reconnect lands on the woken desktop.
+
+One gunicorn worker at a time (elected with a file lock) runs the reaper.
+
+Settings (environment variables):
+    HIBERNATE_IDLE_MINUTES      Idle time before hibernating (default 0 - disabled)
+    HIBERNATE_MODE              'stop' or 'pause' (default stop)
+    HIBERNATE_CHECK_INTERVAL    Seconds between idle checks (default 60)
+    HIBERNATE_RESUME_POLL       Seconds between wake-up checks (default 3)
+    HIBERNATE_LOCK_FILE         Lock file electing the reaper worker
+"""
+
+import os
+import logging
+import threading
+import time
+from datetime import datetime, timezone
+
+from ptmanagement.api.leader import LeaderLock
+from ptmanagement.db.guacamole import (
+    clear_container_hibernated, get_container_activity, get_hibernated_containers,
+    mark_container_hibernated
+)
+
+logger = logging.getLogger(__name__)
+
+IDLE_MINUTES = float(os.environ.get('HIBERNATE_IDLE_MINUTES', '0'))
+MODE = os.environ.get('HIBERNATE_MODE', 'stop').lower()
+CHECK_INTERVAL = float(os.environ.get('HIBERNATE_CHECK_INTERVAL', '60'))
+RESUME_POLL = float(os.environ.get('HIBERNATE_RESUME_POLL', '3'))
+LOCK_FILE = os.environ.get('HIBERNATE_LOCK_FILE', '/tmp/ptweb-hibernation.lock')
+
+
+def _seconds_since(docker_timestamp):
+    """Seconds since a Docker RFC 3339 timestamp (nanosecond precision), None if unparseable"""
+    if not docker_timestamp or docker_timestamp.startswith('0001-'):
+        return None
+    try:
+        # Trim to microseconds for fromisoformat: 2024-01-01T12:00:00.123456789Z
+        stamp, _, fraction = docker_timestamp.rstrip('Z').partition('.')
+        parsed = datetime.fromisoformat(stamp + (f'.{fraction[:6]}' if fraction else ''))
+        return time.time() - parsed.replace(tzinfo=timezone.utc).timestamp()
+    except ValueError:
+        return None
+
+
+class IdleReaper:
+    """Hibernates idle ptvnc containers and wakes them on the next connection attempt"""
+    
+    def __init__(self, docker_mgr, idle_minutes=IDLE_MINUTES, mode=MODE,
+                 check_interval=CHECK_INTERVAL, resume_poll=RESUME_POLL):
+        self.docker_mgr = docker_mgr
+        self.idle_seconds = idle_minutes * 60
+        self.mode = mode if mode in ('stop', 'pause') else 'stop'
+        self.check_interval = check_interval
+        self.resume_poll = resume_poll
+        self.hibernations = 0
+        self.wakes = 0
+        self.last_check_at = None
+        self._counter_lock = threading.Lock()
+        self._first_seen = {}  # container -> time this reaper first saw it running or woke it
+        self._thread = None
+        self._leader = LeaderLock(LOCK_FILE, 'idle hibernation')
+    
+    @property
+    def enabled(self):
+        return self.idle_seconds > 0 and self.docker_mgr.client is not None
+    
+    def start(self):
+        """Start the reaper thread (no-op if disabled or already running)"""
+        if not self.enabled or (self._thread and self._thread.is_alive()):
+            return
+        self._thread = threading.Thread(target=self._run, name='idle-reaper', daemon=True)
+        self._thread.start()
+    
+    def _count(self, counter):
+        with self._counter_lock:
+            setattr(self, counter, getattr(self, counter) + 1)
+    
+    def _run(self):
+        """Poll for wake-ups every resume_poll seconds and reap every check_interval"""
+        next_check = 0
+        while True:
+            try:
+                if self._leader.acquire():
+                    self.wake_requested()
+                    if time.monotonic() >= next_check:
+                        next_check = time.monotonic() + self.check_interval
+                        self.reap()
+            except Exception as e:
+                logger.error(f"✗ Idle reaper failed: {e}")
+            time.sleep(self.resume_poll)
+    
+    def wake_requested(self):
+        """Wake every hibernated container someone tried to connect to"""
+        for container_name, record in list(get_hibernated_containers().items()):
+            if record['wake_requested']:
+                logger.info(f"ℹ Connection attempt to hibernated {container_name} - waking it")
+                self.wake(container_name)
+    
+    def reap(self):
+        """Hibernate running containers idle for longer than the threshold"""
+        containers = self.docker_mgr.list_containers(all=True, with_resources=False)
+        activity = get_container_activity()
+        hibernated = get_hibernated_containers()
+        now = time.time()
+        
+        running = set()
+        for container in containers:
+            name = container['name']
+            if container.get('status') != 'running':
+                continue
+            running.add(name)
+            if name in hibernated:
+                # Started by hand (or by a wake that lost its record) - no longer hibernated
+                clear_container_hibernated(name)
+            
+            usage = activity.get(name) or {}
+            if usage.get('active_sessions'):
+                continue
+            
+            # Idle since the last session ended, but never longer than the container has been up
+            candidates = [now - self._first_seen.setdefault(name, now)]
+            if usage.get('idle_seconds') is not None:
+                candidates.append(usage['idle_seconds'])
+            since_start = _seconds_since(container.get('started_at'))
+            if since_start is not None:
+                candidates.append(since_start)
+            if min(candidates) >= self.idle_seconds:
+                self.hibernate(name)
+        
+        # Forget containers that stopped running (they get a fresh grace period when back)
+        for name in list(self._first_seen):
+            if name not in running:
+                del self._first_seen[name]
+        self.last_check_at = now
+    
+    def hibernate(self, container_name):
+        """Stop or pause one container and record it as hibernated"""
+        if self.mode == 'pause':
+            success = self.docker_mgr.pause_container(container_name)
+        else:
+            success = self.docker_mgr.stop_container(container_name)
+        if not success:
+            logger.warning(f"⚠ Failed to hibernate {container_name}")
+            return False
+        
+        mark_container_hibernated(container_name, self.mode)
+        self._first_seen.pop(container_name, None)
+        self._count('hibernations')
+        logger.info(f"✓ Hibernated idle container {container_name} ({self.mode})")
+        return True
+    
+    def wake(self, container_name):
+        """Start or unpause a hibernated container and clear its record"""
+        info = self.docker_mgr.get_container_info(container_name)
+        if not info:
+            # Deleted while hibernated
+            clear_container_hibernated(container_name)
+            return False
+        
+        status = info.get('status')
+        if status == 'paused':
+            success = self.docker_mgr.unpause_container(container_name)
+        elif status == 'running':
+            success = True
+        else:
+            success = self.docker_mgr.start_container(container_name)
+        if not success:
+            logger.warning(f"⚠ Failed to wake {container_name}")
+            return False
+        
+        clear_container_hibernated(container_name)
+        # A grace period, so it is not hibernated again before the user connects
+        self._first_seen[container_name] = time.time()
+        self._count('wakes')
+        logger.info(f"✓ Woke hibernated container {container_name}")
+        return True
+    
+    def status(self):
+        """Settings, hibernated containers and counters (counters are per worker process)"""
+        hibernated = get_hibernated_containers() if self.enabled else {}
+        return {
+            'enabled': self.enabled,
+            'mode': self.mode,
+            'idle_minutes': self.idle_seconds / 60,
+            'reaper': self._leader.held,
+            'hibernated': sorted(hibernated),
+            'hibernated_count': len(hibernated),
+            'hibernations': self.hibernations,
+            'wakes': self.wakes,
+            'last_check_at': self.last_check_at
+        }
+
+
+_reaper = None
+_reaper_pid = None
+_reaper_lock = threading.Lock()
+
+
+def get_idle_reaper(docker_mgr):
+    """Get the idle reaper for the current worker process, creating it on first use"""
+    global _reaper, _reaper_pid
+    pid = os.getpid()
+    with _reaper_lock:
+        if _reaper is None or _reaper_pid != pid:
+            _reaper = IdleReaper(docker_mgr)
+            _reaper_pid = pid
+        return _reaper
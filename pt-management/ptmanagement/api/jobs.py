@@ -0,0 +1,408 @@
+"""Background jobs for long-running management operations
+
+Bulk operations and the health check run on a local worker pool instead of
+inside the gunicorn request. The endpoint returns a job ID straight away and
+clients poll GET /api/jobs/<id> for progress and the final result.
+
+A job optionally tracks per-item progress (e.g. one item per user): each
+item moves through named stages and ends as 'done' or 'failed'. The job is
+finished once its function has returned and every item has ended.
+
+Job state is persisted to the pt_management_job table in MariaDB, so any
+gunicorn worker can answer a poll and finished results outlive a restart.
+The worker running a job keeps it in memory and writes it back at most
+every JOB_FLUSH_INTERVAL seconds (and immediately when it finishes).
+Unfinished jobs whose owner stopped writing for JOB_STALE_SECONDS are
+reported as 'interrupted'.
+
+Settings (environment variables):
+    JOB_WORKERS            Jobs run concurrently per worker process (default 4)
+    JOB_FLUSH_INTERVAL     Seconds between progress writes (default 1)
+    JOB_STALE_SECONDS      Silence after which a running job is interrupted (default 120)
+    JOB_RETENTION_SECONDS  How long finished jobs are kept in the table (default 604800)
+"""
+
+import os
+import json
+import logging
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+from ptmanagement.db.connection import execute_query
+from ptmanagement.metrics import JOB_QUEUE_DEPTH, JOBS_RUNNING, JOBS_TOTAL
+
+logger = logging.getLogger(__name__)
+
+JOB_WORKERS = int(os.environ.get('JOB_WORKERS', '4'))
+FLUSH_INTERVAL = float(os.environ.get('JOB_FLUSH_INTERVAL', '1'))
+STALE_SECONDS = float(os.environ.get('JOB_STALE_SECONDS', '120'))
+RETENTION_SECONDS = float(os.environ.get('JOB_RETENTION_SECONDS', '604800'))
+
+# Unfinished jobs are re-written at least this often, as a liveness heartbeat
+HEARTBEAT_SECONDS = 30
+# Finished jobs stay in memory this long (afterwards they are read from the table)
+MEMORY_RETENTION_SECONDS = 600
+
+TERMINAL_STATUSES = ('done', 'failed')
+
+JOB_TABLE_DDL = """
+CREATE TABLE IF NOT EXISTS pt_management_job (
+    job_id CHAR(32) NOT NULL,
+    kind VARCHAR(64) NOT NULL,
+    status VARCHAR(20) NOT NULL,
+    total INT NOT NULL DEFAULT 0,
+    done INT NOT NULL DEFAULT 0,
+    failed INT NOT NULL DEFAULT 0,
+    meta MEDIUMTEXT,
+    items MEDIUMTEXT,
+    result MEDIUMTEXT,
+    error TEXT,
+    created_at DOUBLE NOT NULL,
+    updated_at DOUBLE NOT NULL,
+    finished_at DOUBLE NULL,
+    PRIMARY KEY (job_id),
+    KEY idx_created_at (created_at)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8
+"""
+
+
+class Job:
+    """A background operation with optional per-item status"""
+    
+    def __init__(self, kind, names=(), meta=None):
+        """
+        Args:
+            kind: Operation type, e.g. 'provision', 'bulk_delete'
+            names: Item keys (e.g. usernames), in display order
+            meta: Optional dict of request details returned with the job
+        """
+        self.id = uuid.uuid4().hex
+        self.kind = kind
+        self.meta = meta or {}
+        self.created_at = time.time()
+        self.updated_at = self.created_at
+        self.finished_at = None
+        self.result = None
+        self.error = None
+        self._started = False
+        self._completed = False
+        self._lock = threading.Lock()
+        self._items = OrderedDict(
+            (name, {'name': name, 'status': 'pending', 'stage': 'queued', 'error': None})
+            for name in names
+        )
+    
+    def _check_finished(self):
+        """Set finished_at once the function returned and all items ended (call with _lock held)"""
+        if self.finished_at is None and self._completed and \
+                all(i['status'] in TERMINAL_STATUSES for i in self._items.values()):
+            self.finished_at = time.time()
+    
+    def update(self, name, **fields):
+        """Merge fields into an item (status, stage, error, or operation-specific keys)"""
+        with self._lock:
+            self._items[name].update(fields)
+            self._started = True
+            self.updated_at = time.time()
+            self._check_finished()
+        _job_changed(self)
+    
+    def fail(self, name, error, stage=None):
+        """Mark an item failed"""
+        fields = {'status': 'failed', 'error': str(error)}
+        if stage:
+            fields['stage'] = stage
+        self.update(name, **fields)
+    
+    def start(self):
+        """Mark the job as running"""
+        with self._lock:
+            self._started = True
+            self.updated_at = time.time()
+        _job_changed(self)
+    
+    def complete(self, result=None, error=None):
+        """Record that the job's function returned (items may still be in progress)"""
+        with self._lock:
+            self.result = result
+            self.error = error
+            self._completed = True
+            if error:
+                # A failed job is over even if some items never ran
+                self.finished_at = time.time()
+            self.updated_at = time.time()
+            self._check_finished()
+        _job_changed(self)
+    
+    @property
+    def finished(self):
+        return self.finished_at is not None
+    
+    @property
+    def status(self):
+        if self.error:
+            return 'failed'
+        if self.finished:
+            return 'finished'
+        return 'running' if self._started else 'queued'
+    
+    def to_dict(self, include_items=True):
+        """JSON-serialisable snapshot of the job"""
+        with self._lock:
+            items = [dict(item) for item in self._items.values()]
+            data = {
+                'id': self.id,
+                'kind': self.kind,
+                'status': self.status,
+                'total': len(items),
+                'done': sum(1 for i in items if i['status'] == 'done'),
+                'failed': sum(1 for i in items if i['status'] == 'failed'),
+                'created_at': self.created_at,
+                'updated_at': self.updated_at,
+                'finished_at': self.finished_at,
+                'meta': self.meta,
+                'result': self.result,
+                'error': self.error
+            }
+        data['pending'] = data['total'] - data['done'] - data['failed']
+        if include_items:
+            data['items'] = items
+        return data
+
+
+def _row_to_dict(row, include_items=True):
+    """Convert a pt_management_job row into the Job.to_dict() shape"""
+    status = row['status']
+    if status in ('queued', 'running') and time.time() - row['updated_at'] > STALE_SECONDS:
+        # The worker process that owned it stopped (restart, crash, OOM)
+        status = 'interrupted'
+    data = {
+        'id': row['job_id'],
+        'kind': row['kind'],
+        'status': status,
+        'total': row['total'],
+        'done': row['done'],
+        'failed': row['failed'],
+        'pending': row['total'] - row['done'] - row['failed'],
+        'created_at': row['created_at'],
+        'updated_at': row['updated_at'],
+        'finished_at': row['finished_at'],
+        'meta': json.loads(row['meta']) if row.get('meta') else {},
+        'result': json.loads(row['result']) if row.get('result') else None,
+        'error': row.get('error')
+    }
+    if include_items:
+        data['items'] = json.loads(row['items']) if row.get('items') else []
+    return data
+
+
+class JobStore:
+    """In-memory jobs of this process, written through to pt_management_job"""
+    
+    def __init__(self):
+        self._jobs = OrderedDict()  # jobs owned by this process
+        self._dirty = set()
+        self._lock = threading.Lock()
+        self._write_lock = threading.Lock()
+        self._table_ready = False
+        self._last_cleanup = 0
+        self._flusher = threading.Thread(target=self._flush_loop, name='job-flusher', daemon=True)
+        self._flusher.start()
+    
+    def _ensure_table(self):
+        if not self._table_ready:
+            execute_query(JOB_TABLE_DDL)
+            self._table_ready = True
+    
+    def add(self, job):
+        with self._lock:
+            self._jobs[job.id] = job
+        self._write(job)
+    
+    def changed(self, job):
+        """Note a change; finished jobs are written immediately"""
+        if job.finished:
+            with self._lock:
+                self._dirty.discard(job.id)
+            self._write(job)
+        else:
+            with self._lock:
+                self._dirty.add(job.id)
+    
+    def _write(self, job):
+        """Upsert one job row"""
+        try:
+            with self._write_lock:
+                # Snapshot under the write lock so an older state never overwrites a newer one
+                data = job.to_dict()
+                self._ensure_table()
+                execute_query(
+                    """
+                    INSERT INTO pt_management_job
+                        (job_id, kind, status, total, done, failed, meta, items, result, error,
+                         created_at, updated_at, finished_at)
+                    VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+                    ON DUPLICATE KEY UPDATE
+                        status = VALUES(status), total = VALUES(total), done = VALUES(done),
+                        failed = VALUES(failed), items = VALUES(items), result = VALUES(result),
+                        error = VALUES(error), updated_at = VALUES(updated_at),
+                        finished_at = VALUES(finished_at)
+                    """,
+                    (
+                        data['id'], data['kind'], data['status'], data['total'], data['done'],
+                        data['failed'], json.dumps(data['meta'], default=str),
+                        json.dumps(data['items'], default=str),
+                        json.dumps(data['result'], default=str) if data['result'] is not None else None,
+                        data['error'], data['created_at'], time.time(), data['finished_at']
+                    )
+                )
+        except Exception as e:
+            logger.error(f"✗ Failed to persist job {job.id}: {e}")
+    
+    def _flush_loop(self):
+        """Write dirty jobs every FLUSH_INTERVAL and unfinished ones every HEARTBEAT_SECONDS"""
+        last_heartbeat = time.monotonic()
+        while True:
+            time.sleep(FLUSH_INTERVAL)
+            heartbeat = time.monotonic() - last_heartbeat >= HEARTBEAT_SECONDS
+            with self._lock:
+                ids = set(self._dirty)
+                self._dirty.clear()
+                if heartbeat:
+                    last_heartbeat = time.monotonic()
+                    ids.update(job_id for job_id, job in self._jobs.items() if not job.finished)
+                jobs = [self._jobs[job_id] for job_id in ids if job_id in self._jobs]
+                self._expire()
+            for job in jobs:
+                self._write(job)
+            if heartbeat:
+                self._cleanup()
+    
+    def _expire(self):
+        """Forget finished jobs from memory (call with _lock held)"""
+        cutoff = time.time() - MEMORY_RETENTION_SECONDS
+        for job_id in [j for j, job in self._jobs.items() if job.finished and job.finished_at < cutoff]:
+            del self._jobs[job_id]
+    
+    def _cleanup(self):
+        """Delete finished jobs past the retention period (at most hourly)"""
+        if time.time() - self._last_cleanup < 3600:
+            return
+        self._last_cleanup = time.time()
+        self._ensure_table()
+        execute_query(
+            "DELETE FROM pt_management_job WHERE finished_at IS NOT NULL AND finished_at < %s",
+            (time.time() - RETENTION_SECONDS,)
+        )
+    
+    def get(self, job_id, include_items=True):
+        """Job dict by ID - this process's live copy if it owns the job, else the stored row"""
+        with self._lock:
+            job = self._jobs.get(job_id)
+        if job:
+            return job.to_dict(include_items)
+        
+        self._ensure_table()
+        row = execute_query("SELECT * FROM pt_management_job WHERE job_id = %s", (job_id,), fetch_one=True)
+        return _row_to_dict(row, include_items) if row else None
+    
+    def list(self, limit=50):
+        """Most recent jobs (without items), newest first"""
+        self._ensure_table()
+        rows = execute_query(
+            """
+            SELECT job_id, kind, status, total, done, failed, meta, result, error,
+                   created_at, updated_at, finished_at
+            FROM pt_management_job
+            ORDER BY created_at DESC
+            LIMIT %s
+            """,
+            (limit,),
+            fetch_all=True
+        ) or []
+        jobs = OrderedDict((row['job_id'], _row_to_dict(row, include_items=False)) for row in rows)
+        
+        # Jobs owned by this process are fresher than their last write
+        with self._lock:
+            live = [job for job in self._jobs.values() if job.id in jobs]
+        for job in live:
+            jobs[job.id] = job.to_dict(include_items=False)
+        return list(jobs.values())
+
+
+_store = None
+_executor = None
+_store_pid = None
+_store_lock = threading.Lock()
+
+
+def _get_store():
+    """Job store and worker pool for the current process"""
+    global _store, _executor, _store_pid
+    pid = os.getpid()
+    with _store_lock:
+        if _store is None or _store_pid != pid:
+            _store = JobStore()
+            _executor = ThreadPoolExecutor(max_workers=JOB_WORKERS, thread_name_prefix='job')
+            _store_pid = pid
+        return _store, _executor
+
+
+def _job_changed(job):
+    _get_store()[0].changed(job)
+
+
+def create_job(kind, names=(), meta=None):
+    """
+    Register a job whose items are driven by the caller (e.g. a pipeline).
+    Call job.complete() once all work has been handed out.
+    """
+    job = Job(kind, names, meta)
+    _get_store()[0].add(job)
+    logger.info(f"✓ Created {kind} job {job.id} ({len(job._items)} items)")
+    return job
+
+
+def submit_job(kind, fn, names=(), meta=None):
+    """
+    Run fn(job) on the job worker pool.
+    
+    fn may report per-item progress through job.update()/job.fail(); its
+    return value becomes the job's result and an exception its error.
+    
+    Returns:
+        The new Job
+    """
+    job = create_job(kind, names, meta)
+    
+    def run():
+        JOB_QUEUE_DEPTH.dec()
+        JOBS_RUNNING.inc()
+        job.start()
+        try:
+            job.complete(result=fn(job))
+            JOBS_TOTAL.labels(kind, 'finished').inc()
+            logger.info(f"✓ Job {job.id} ({kind}) finished")
+        except Exception as e:
+            JOBS_TOTAL.labels(kind, 'failed').inc()
+            logger.error(f"✗ Job {job.id} ({kind}) failed: {e}")
+            job.complete(error=str(e))
+        finally:
+            JOBS_RUNNING.dec()
+    
+    JOB_QUEUE_DEPTH.inc()
+    _get_store()[1].submit(run)
+    return job
+
+
+def get_job(job_id, include_items=True):
+    """Return a job as a dict, or None if unknown"""
+    return _get_store()[0].get(job_id, include_items)
+
+
+def list_jobs(limit=50):
+    """Return the most recent jobs as dicts (without items), newest first"""
+    return _get_store()[0].list(limit)
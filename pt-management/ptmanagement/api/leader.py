@@ -0,0 +1,45 @@
+"""Single-worker election for background maintenance loops
+
+Some background work (warm pool replenishment, idle hibernation) must run in
+exactly one gunicorn worker. Each worker tries a non-blocking exclusive
+flock on a shared lock file; the holder does the work until it exits, at
+which point the kernel releases the lock and another worker takes over.
+"""
+
+import os
+import fcntl
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class LeaderLock:
+    """Non-blocking exclusive file lock identifying the worker that owns a task"""
+    
+    def __init__(self, path, task):
+        """
+        Args:
+            path: Lock file shared by all workers (e.g. under /tmp)
+            task: Task description for the log line
+        """
+        self.path = path
+        self.task = task
+        self._file = None
+    
+    @property
+    def held(self):
+        return self._file is not None
+    
+    def acquire(self):
+        """Return True if this worker holds (or just took) the lock"""
+        if self._file:
+            return True
+        lock_file = open(self.path, 'a')
+        try:
+            fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            lock_file.close()
+            return False
+        self._file = lock_file
+        logger.info(f"ℹ Worker {os.getpid()} now runs {self.task}")
+        return True
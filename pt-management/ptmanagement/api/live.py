@@ -0,0 +1,243 @@
+"""Live dashboard updates - server-sent events
+
+One DashboardHub per worker process recomputes the dashboard state
+(stats, users, containers) when something changes and fans the deltas out
+to every connected browser, instead of each open tab re-polling four
+endpoints every 10 seconds.
+
+The hub wakes up on:
+    - Docker container/network events (via the shared events watcher)
+    - successful mutating API requests handled by this worker (notify())
+    - LIVE_REFRESH_INTERVAL seconds passing, to pick up changes made
+      through other gunicorn workers or directly in the database
+
+Settings (environment variables):
+    LIVE_REFRESH_INTERVAL   Seconds between background refreshes (default 5)
+    LIVE_QUEUE_SIZE         Messages buffered per client before it is dropped (default 100)
+"""
+
+import os
+import json
+import logging
+import queue
+import threading
+import time
+
+from ptmanagement.db.guacamole import get_all_users, get_container_user_map
+from ptmanagement.docker_mgmt.events import get_event_watcher
+
+logger = logging.getLogger(__name__)
+
+REFRESH_INTERVAL = float(os.environ.get('LIVE_REFRESH_INTERVAL', '5'))
+QUEUE_SIZE = int(os.environ.get('LIVE_QUEUE_SIZE', '100'))
+
+# Coalesce bursts of changes (e.g. bulk creation) into one recompute
+DEBOUNCE_SECONDS = 0.25
+
+
+def format_sse(event, data):
+    """Encode one server-sent event"""
+    return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+
+
+def build_overview(docker_mgr):
+    """
+    Everything the dashboard shows, with one Docker read and three queries.
+    
+    Returns:
+        Dict with containers (each with its users), users, assignments
+        (username -> container names), stats and the container state version
+    """
+    version = docker_mgr.state_version()
+    containers = docker_mgr.list_containers(all=True)
+    user_map = get_container_user_map()
+    assignments = {}
+    for container in containers:
+        container['users'] = user_map.get(container['name'], [])
+        for username in container['users']:
+            assignments.setdefault(username, []).append(container['name'])
+    
+    users = get_all_users()
+    running = sum(1 for c in containers if c.get('status') == 'running')
+    stats = {
+        'users': {'total': len(users)},
+        'containers': {
+            'total': len(containers),
+            'running': running,
+            'stopped': len(containers) - running,
+            'pt_containers': len(containers)
+        }
+    }
+    return {
+        'containers': containers,
+        'users': users,
+        'assignments': assignments,
+        'stats': stats,
+        'version': version
+    }
+
+
+class DashboardHub:
+    """Computes dashboard state once per change and pushes deltas to subscribers"""
+    
+    def __init__(self, docker_mgr, interval=REFRESH_INTERVAL):
+        self.docker_mgr = docker_mgr
+        self.interval = interval
+        self._subscribers = set()
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._thread = None
+        self._state = None  # last published {'stats', 'users', 'containers', 'version'}
+        self.recomputes = 0
+        
+        if docker_mgr.client:
+            get_event_watcher(docker_mgr.client).add_listener(self.notify)
+    
+    def notify(self, *_):
+        """Ask the hub to recompute soon (safe to call from any thread)"""
+        self._wake.set()
+    
+    def subscribe(self):
+        """
+        Register a new client.
+        
+        Returns:
+            queue.Queue that receives encoded SSE messages, starting with a snapshot
+        """
+        subscriber = queue.Queue(maxsize=QUEUE_SIZE)
+        with self._lock:
+            has_state = self._state is not None
+            if has_state:
+                # Queued under the lock, so every delta published after it lands behind it
+                subscriber.put_nowait(format_sse('snapshot', self._snapshot_payload(self._state)))
+            self._subscribers.add(subscriber)
+            if not self._thread or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name='dashboard-hub', daemon=True)
+                self._thread.start()
+        
+        if not has_state:
+            self.notify()
+        return subscriber
+    
+    def unsubscribe(self, subscriber):
+        """Remove a client"""
+        with self._lock:
+            self._subscribers.discard(subscriber)
+    
+    def is_subscribed(self, subscriber):
+        """False once the client was dropped for falling behind"""
+        with self._lock:
+            return subscriber in self._subscribers
+    
+    def _publish(self, messages):
+        """Queue encoded messages for every client, dropping clients that fall behind (call with _lock held)"""
+        for subscriber in list(self._subscribers):
+            try:
+                for message in messages:
+                    subscriber.put_nowait(message)
+            except queue.Full:
+                # The browser reconnects and gets a fresh snapshot
+                self._subscribers.discard(subscriber)
+                logger.warning("⚠ Dropped a slow dashboard event subscriber")
+    
+    def _run(self):
+        """Recompute on change or interval while anyone is subscribed"""
+        while True:
+            self._wake.wait(self.interval)
+            with self._lock:
+                idle = not self._subscribers
+                if idle:
+                    # Nobody is listening - forget the state so the next client gets a fresh one
+                    self._state = None
+            if idle:
+                self._wake.clear()
+                continue
+            
+            time.sleep(DEBOUNCE_SECONDS)
+            self._wake.clear()
+            try:
+                self._refresh()
+            except Exception as e:
+                logger.error(f"✗ Dashboard refresh failed: {e}")
+    
+    def _compute(self):
+        """Build the full dashboard state (see build_overview)"""
+        overview = build_overview(self.docker_mgr)
+        self.recomputes += 1
+        return {
+            'stats': overview['stats'],
+            'users': {u['username']: u for u in overview['users']},
+            'containers': {c['name']: c for c in overview['containers']},
+            'version': overview['version']
+        }
+    
+    @staticmethod
+    def _snapshot_payload(state):
+        return {
+            'stats': state['stats'],
+            'users': list(state['users'].values()),
+            'containers': list(state['containers'].values()),
+            'version': state['version']
+        }
+    
+    @staticmethod
+    def _diff(old, new):
+        """Return (upserted values, removed keys) between two dicts"""
+        upserted = [value for key, value in new.items() if old.get(key) != value]
+        removed = [key for key in old if key not in new]
+        return upserted, removed
+    
+    def _changes(self, old, new):
+        """Encoded messages taking a client from state old to state new"""
+        if old is None:
+            return [format_sse('snapshot', self._snapshot_payload(new))]
+        
+        messages = []
+        upserted, removed = self._diff(old['users'], new['users'])
+        if upserted or removed:
+            messages.append(format_sse('users', {'upserted': upserted, 'removed': removed}))
+        
+        upserted, removed = self._diff(old['containers'], new['containers'])
+        if upserted or removed:
+            messages.append(format_sse('containers', {
+                'upserted': upserted,
+                'removed': removed,
+                'version': new['version']
+            }))
+        
+        if old['stats'] != new['stats']:
+            messages.append(format_sse('stats', new['stats']))
+        return messages
+    
+    def _refresh(self):
+        """Recompute and publish whatever changed"""
+        new = self._compute()
+        with self._lock:
+            # Swap and publish atomically: a client subscribing meanwhile gets
+            # either the old snapshot plus these deltas or the new snapshot
+            old = self._state
+            self._state = new
+            messages = self._changes(old, new)
+            if messages:
+                self._publish(messages)
+    
+    def status(self):
+        """Subscriber count and recompute counter"""
+        with self._lock:
+            return {'subscribers': len(self._subscribers), 'recomputes': self.recomputes}
+
+
+_hub = None
+_hub_pid = None
+_hub_lock = threading.Lock()
+
+
+def get_dashboard_hub(docker_mgr):
+    """Get the dashboard hub for the current worker process, creating it on first use"""
+    global _hub, _hub_pid
+    pid = os.getpid()
+    with _hub_lock:
+        if _hub is None or _hub_pid != pid:
+            _hub = DashboardHub(docker_mgr)
+            _hub_pid = pid
+        return _hub
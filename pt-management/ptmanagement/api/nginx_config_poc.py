@@ -6,7 +6,6 @@ This demonstrates how to implement runtime nginx configuration management
 
 import os
 import json
-import subprocess
 import logging
 import re
 from typing import Dict, Any, Tuple, Optional
@@ -25,6 +24,15 @@ class NginxConfigManager:
         self.env_path = os.environ.get('ENV_PATH', '/app/.env')
         self.backup_dir = '/tmp/nginx-backups'
         os.makedirs(self.backup_dir, exist_ok=True)
+        self._docker_mgr = None
+    
+    @property
+    def docker_mgr(self):
+        """DockerManager talking to the Docker socket, created on first use"""
+        if self._docker_mgr is None:
+            from ptmanagement.docker_mgmt.container import DockerManager
+            self._docker_mgr = DockerManager()
+        return self._docker_mgr
     
     # ========================================================================
     # READ CONFIGURATION
@@ -38,14 +46,13 @@ class NginxConfigManager:
             str: Current nginx config content, or None if failed
         """
         try:
-            cmd = ['docker', 'exec', self.nginx_container, 'cat', self.config_path]
-            result = subprocess.run(cmd, capture_output=True, text=True, timeout=5)
+            exit_code, stdout, stderr = self.docker_mgr.exec_run(self.nginx_container, ['cat', self.config_path])
             
-            if result.returncode == 0:
+            if exit_code == 0:
                 logger.info(f"✓ Read nginx config from {self.nginx_container}")
-                return result.stdout
+                return stdout
             else:
-                logger.error(f"✗ Failed to read config: {result.stderr}")
+                logger.error(f"✗ Failed to read config: {stderr}")
                 return None
         except Exception as e:
             logger.error(f"✗ Exception reading config: {e}")
@@ -226,23 +233,20 @@ server {
             tuple: (is_valid, message)
         """
         try:
-            # Write to temporary file
+            # Copy to a temporary file in the container and test
             temp_config = '/tmp/ptweb.conf.test'
-            with open(temp_config, 'w') as f:
-                f.write(config_text)
-            
-            # Copy to container and test
-            copy_cmd = ['docker', 'cp', temp_config, f'{self.nginx_container}:{temp_config}']
-            subprocess.run(copy_cmd, check=True, capture_output=True)
+            if not self.docker_mgr.copy_to_container(self.nginx_container, temp_config, config_text):
+                return False, f"Could not copy config into {self.nginx_container}"
             
-            test_cmd = ['docker', 'exec', self.nginx_container, 'nginx', '-t', '-c', temp_config]
-            result = subprocess.run(test_cmd, capture_output=True, text=True)
+            exit_code, stdout, stderr = self.docker_mgr.exec_run(
+                self.nginx_container, ['nginx', '-t', '-c', temp_config]
+            )
             
-            if result.returncode == 0:
+            if exit_code == 0:
                 logger.info("✓ Nginx config validation passed")
                 return True, "Configuration is valid"
             else:
-                error_msg = result.stderr or result.stdout
+                error_msg = stderr or stdout
                 logger.error(f"✗ Nginx config validation failed: {error_msg}")
                 return False, error_msg
         
@@ -304,27 +308,21 @@ server {
             if not is_valid:
                 return False, f"Config validation failed: {msg}"
             
-            # Write new config to temporary location
-            temp_config = '/tmp/ptweb.conf.new'
-            with open(temp_config, 'w') as f:
-                f.write(config_text)
-            
             # Copy to container
-            copy_cmd = ['docker', 'cp', temp_config, f'{self.nginx_container}:{self.config_path}']
-            subprocess.run(copy_cmd, check=True, capture_output=True)
+            if not self.docker_mgr.copy_to_container(self.nginx_container, self.config_path, config_text):
+                return False, f"Could not copy config into {self.nginx_container}"
             
             # Reload nginx
-            reload_cmd = ['docker', 'exec', self.nginx_container, 'nginx', '-s', 'reload']
-            result = subprocess.run(reload_cmd, capture_output=True, text=True, timeout=5)
+            exit_code, stdout, stderr = self.docker_mgr.exec_run(self.nginx_container, ['nginx', '-s', 'reload'])
             
-            if result.returncode == 0:
+            if exit_code == 0:
                 logger.info("✓ Nginx reloaded successfully")
                 return True, "Configuration applied successfully"
             else:
                 # Rollback on failure
-                logger.error(f"✗ Nginx reload failed: {result.stderr}")
+                logger.error(f"✗ Nginx reload failed: {stderr}")
                 self.rollback_config(backup_path)
-                return False, f"Nginx reload failed: {result.stderr}"
+                return False, f"Nginx reload failed: {stderr}"
         
         except Exception as e:
             logger.error(f"✗ Exception applying config: {e}")
@@ -488,10 +486,8 @@ def create_nginx_config_api(app):
     def nginx_status():
         """Check nginx container status"""
         try:
-            cmd = ['docker', 'ps', '--filter', f'name={manager.nginx_container}']
-            result = subprocess.run(cmd, capture_output=True, text=True)
-            
-            is_running = manager.nginx_container in result.stdout
+            info = manager.docker_mgr.client.inspect_container(manager.nginx_container)
+            is_running = bool(info) and info.get('State', {}).get('Running', False)
             
             return {
                 'success': True,
@@ -0,0 +1,376 @@
+"""Concurrent container provisioning for new users
+
+Provisioning one user's Packet Tracer desktop has four stages:
+
+    create    - claim a pre-booted container from the warm pool, or
+                create + start a ptvnc container via the Docker API
+                (joined to the instance network at creation)
+    setup     - Desktop symlink to /shared and /shared permissions
+                (skipped for warm containers, which had it done while booting)
+    boot      - wait until the desktop is ready: VNC answering and Packet
+                Tracer installed (skipped for warm containers, which are
+                only claimed once ready); see docker_mgmt.readiness
+    register  - user<->container mapping, Guacamole VNC connection and
+                permissions for the user (and the requesting admin)
+
+Each stage has its own bounded worker pool and hands finished users to the
+next one, so Docker work for some users overlaps Guacamole registration for
+others. A user whose desktop does not become ready in time fails at the
+boot stage and is never registered; the container is left for inspection.
+Container names are reserved up front for the whole batch, so
+parallel workers never race for the same ptvnc number; a name taken by
+someone else in the meantime is skipped on conflict. Progress is reported
+per user through a Job (see ptmanagement.api.jobs).
+
+A standalone container (POST /api/containers) goes through the same
+stages, as a one-item job keyed by the container name: it is created from
+any image, and register only adds its Guacamole VNC connection, once the
+desktop is ready.
+
+Settings (environment variables):
+    PROVISION_DOCKER_WORKERS   Parallel create/setup workers (default 8)
+    PROVISION_BOOT_WORKERS     Desktops waited for in parallel (default 32)
+    PROVISION_DB_WORKERS       Parallel registration workers (default 4)
+    PT_CONTAINER_NETWORK       Network new containers join (default ptnet)
+    PT_CONTAINER_CPUS          CPU limit for new containers (default 0.1)
+    PT_CONTAINER_MEMORY        Memory limit for new containers (default 1G)
+"""
+
+import os
+import logging
+import threading
+from functools import partial
+from concurrent.futures import ThreadPoolExecutor
+
+from ptmanagement.api.jobs import create_job
+from ptmanagement.docker_mgmt.readiness import get_readiness_tracker
+from ptmanagement.db.guacamole import (
+    assign_container_to_user, assign_connection_to_user, create_vnc_connection
+)
+
+logger = logging.getLogger(__name__)
+
+DOCKER_WORKERS = int(os.environ.get('PROVISION_DOCKER_WORKERS', '8'))
+DB_WORKERS = int(os.environ.get('PROVISION_DB_WORKERS', '4'))
+# Boot workers mostly sleep between readiness probes
+BOOT_WORKERS = int(os.environ.get('PROVISION_BOOT_WORKERS', '32'))
+
+# Attempts to find a free name when another process grabs ours first
+MAX_NAME_ATTEMPTS = 5
+
+# Desktop symlink to /shared and /shared permissions, run as one exec (DockerManager.exec_batch)
+DESKTOP_SETUP_STEPS = [
+    ['mkdir', '-p', '/home/ptuser/Desktop'],
+    ['ln', '-sf', '/shared', '/home/ptuser/Desktop/shared'],
+    ['chmod', '777', '/shared'],
+    ['chown', 'ptuser:ptuser', '/shared'],
+]
+
+
+def resolve_pt_deb():
+    """Host path of CiscoPacketTracer.deb (PT_DEB_FILE, else common locations)"""
+    pt_deb = os.getenv('PT_DEB_FILE')
+    if pt_deb:
+        return pt_deb
+    
+    project_root = os.getenv('PROJECT_ROOT', '/project')
+    possible_paths = [
+        os.path.join(project_root, 'CiscoPacketTracer.deb'),
+        '/run/media/kalpa/9530f1e7-4f57-4bf2-b7f2-b03a2b8d4111/PT DEv/PacketTracerWeb/CiscoPacketTracer.deb',
+        '/project/CiscoPacketTracer.deb',
+    ]
+    for path in possible_paths:
+        if os.path.exists(path):
+            return path
+    return os.path.join(project_root, 'CiscoPacketTracer.deb')
+
+
+def resolve_shared_path():
+    """Host path for /shared
+    
+    CRITICAL: Must use SHARED_HOST_PATH (host path), not PROJECT_ROOT (container path),
+    because the Docker daemon resolves bind sources on the host.
+    """
+    shared_path = os.getenv('SHARED_HOST_PATH')
+    return shared_path if shared_path else os.path.join(os.getenv('PROJECT_ROOT', '/project'), 'shared')
+
+
+def container_options():
+    """Network and resource limits for new ptvnc containers (PT_CONTAINER_* settings)"""
+    return {
+        'network': os.getenv('PT_CONTAINER_NETWORK', 'ptnet'),
+        'cpus': os.getenv('PT_CONTAINER_CPUS', '0.1'),
+        'memory': os.getenv('PT_CONTAINER_MEMORY', '1G')
+    }
+
+
+def connection_name_for(container_name):
+    """Guacamole connection name for a container (ptvnc3 -> pt03), None for reserved pt01/pt02"""
+    suffix = container_name.replace('ptvnc', '').lstrip('0') or '0'
+    number = int(suffix) if suffix.isdigit() else 0
+    # pt01 and pt02 are reserved for the hardcoded ptvnc1 and ptvnc2
+    if number < 3:
+        return None
+    return f"pt{number:02d}"
+
+
+class ProvisioningPipeline:
+    """Stage-per-pool pipeline that provisions containers for many users at once"""
+    
+    def __init__(self, docker_mgr, docker_workers=DOCKER_WORKERS, db_workers=DB_WORKERS, boot_workers=BOOT_WORKERS):
+        from ptmanagement.api.warm_pool import get_warm_pool
+        
+        self.docker_mgr = docker_mgr
+        self.warm_pool = get_warm_pool(docker_mgr)
+        self.readiness = get_readiness_tracker(docker_mgr)
+        self._create_pool = ThreadPoolExecutor(max_workers=docker_workers, thread_name_prefix='provision-create')
+        self._setup_pool = ThreadPoolExecutor(max_workers=docker_workers, thread_name_prefix='provision-setup')
+        self._boot_pool = ThreadPoolExecutor(max_workers=boot_workers, thread_name_prefix='provision-boot')
+        self._register_pool = ThreadPoolExecutor(max_workers=db_workers, thread_name_prefix='provision-register')
+        self._names_lock = threading.Lock()
+        self._reserved = set()  # ptvnc numbers handed out but maybe not created yet
+    
+    def _reserve_numbers(self, count):
+        """Reserve count unused ptvnc numbers (above every existing and in-flight one)"""
+        containers = self.docker_mgr.list_containers(all=True, with_resources=False)
+        numbers = set()
+        for container in containers:
+            suffix = container.get('name', '')[5:]
+            if container.get('name', '').startswith('ptvnc') and suffix.isdigit():
+                numbers.add(int(suffix))
+        
+        with self._names_lock:
+            next_number = max(numbers | self._reserved | {0}) + 1
+            reserved = list(range(next_number, next_number + count))
+            self._reserved.update(reserved)
+        return reserved
+    
+    def _release_number(self, number):
+        with self._names_lock:
+            self._reserved.discard(number)
+    
+    def submit(self, usernames, admin_user=None):
+        """
+        Start provisioning a container for each user.
+        
+        Args:
+            usernames: Users (already created in Guacamole) that need a container
+            admin_user: Admin who requested it; also gets each container and connection
+        
+        Returns:
+            Job tracking one item per username
+        """
+        usernames = list(usernames)
+        job = create_job('provision', usernames, meta={'requested_by': admin_user})
+        for username, number in zip(usernames, self._reserve_numbers(len(usernames))):
+            job.update(username, container=f'ptvnc{number}')
+            self._create_pool.submit(self._create, job, username, number, admin_user)
+        # All work is handed out; the job finishes as the last item ends
+        job.complete()
+        return job
+    
+    def submit_container(self, container_name=None, image='ptvnc', environment=None,
+                         vnc_port=5901, password='Cisco123', admin_user=None):
+        """
+        Start provisioning one container that is not assigned to a user.
+        
+        Args:
+            container_name: Name to create, or None for the next free ptvncN
+            image: Docker image (stock 'ptvnc' without environment can come from the warm pool)
+            environment: Dict of environment variables
+            vnc_port: Port of the Guacamole VNC connection
+            password: Password of the Guacamole VNC connection
+            admin_user: Admin who requested it
+        
+        Returns:
+            Job with one item, keyed by the container name
+        """
+        number = None
+        if not container_name:
+            number = self._reserve_numbers(1)[0]
+            container_name = f'ptvnc{number}'
+        job = create_job('create_container', [container_name], meta={'requested_by': admin_user, 'image': image})
+        register = partial(self._register_container, job, container_name, vnc_port, password)
+        self._create_pool.submit(self._create_container, job, container_name, image, environment or {}, number, register)
+        job.complete()
+        return job
+    
+    def _create(self, job, username, number, admin_user):
+        """Stage 1: create + start the container"""
+        job.update(username, status='running', stage='create')
+        try:
+            pt_deb = resolve_pt_deb()
+            shared_path = resolve_shared_path()
+            for attempt in range(MAX_NAME_ATTEMPTS):
+                container_name = f'ptvnc{number}'
+                # A pre-booted container from the warm pool, if one is ready
+                container_id, error = self.warm_pool.claim(container_name)
+                claimed = container_id is not None
+                if not claimed and error is None:
+                    container_id, error = self.docker_mgr.run_pt_container(
+                        container_name, pt_deb, shared_path, **container_options()
+                    )
+                if error != 'conflict':
+                    break
+                # Taken by another worker process - move past every known name
+                logger.warning(f"⚠ {container_name} already exists, picking another name for {username}")
+                self._release_number(number)
+                number = self._reserve_numbers(1)[0]
+                job.update(username, container=f'ptvnc{number}')
+            
+            if error:
+                job.fail(username, f'Container creation failed: {error}')
+                return
+        except Exception as e:
+            logger.error(f"✗ Error creating container for {username}: {e}")
+            job.fail(username, f'Container creation error: {e}')
+            return
+        finally:
+            self._release_number(number)
+        
+        if claimed:
+            # Warm containers were set up while booting and are claimed only when ready
+            logger.info(f"✓ Claimed warm container {container_name} for {username}")
+            job.update(username, stage='register', warm=True)
+            self._register_pool.submit(self._register, job, username, container_name, admin_user)
+            return
+        
+        logger.info(f"✓ Created container {container_name} for {username}")
+        job.update(username, stage='setup')
+        register = partial(self._register, job, username, container_name, admin_user)
+        self._setup_pool.submit(self._setup, job, username, container_name, register)
+    
+    def _create_container(self, job, container_name, image, environment, number, register):
+        """Stage 1 of submit_container: claim a warm container or create one from image"""
+        job.update(container_name, status='running', stage='create')
+        try:
+            claimed = False
+            if image == 'ptvnc' and not environment:
+                container_id, error = self.warm_pool.claim(container_name)
+                if error == 'conflict':
+                    job.fail(container_name, f'Container {container_name} already exists')
+                    return
+                claimed = container_id is not None
+            
+            # No ports are published: Guacamole reaches VNC over the Docker network
+            if not claimed and not self.docker_mgr.create_container(image, container_name, environment, {}):
+                job.fail(container_name, 'Container creation failed')
+                return
+            # pt-stack is the network Guacamole is on
+            self.docker_mgr.connect_network(container_name, 'pt-stack')
+        except Exception as e:
+            logger.error(f"✗ Error creating container {container_name}: {e}")
+            job.fail(container_name, f'Container creation error: {e}')
+            return
+        finally:
+            if number is not None:
+                self._release_number(number)
+        
+        if claimed:
+            logger.info(f"✓ Claimed warm container {container_name}")
+            job.update(container_name, stage='register', warm=True)
+            self._register_pool.submit(register)
+            return
+        
+        logger.info(f"✓ Created container {container_name}")
+        job.update(container_name, stage='setup')
+        self._setup_pool.submit(self._setup, job, container_name, container_name, register)
+    
+    def _setup(self, job, item, container_name, register):
+        """Stage 2: Desktop symlink and /shared permissions (failures are non-fatal)"""
+        try:
+            exit_code, stdout, stderr = self.docker_mgr.exec_batch(container_name, DESKTOP_SETUP_STEPS)
+            if exit_code == 0:
+                logger.info(f"✓ Created Desktop symlink and fixed /shared permissions in {container_name}")
+            else:
+                logger.warning(f"⚠ Failed to create Desktop symlink in {container_name}: {stderr.strip()}")
+        except Exception as e:
+            logger.warning(f"⚠ Error creating Desktop symlink: {e}")
+        
+        job.update(item, stage='boot')
+        self._boot_pool.submit(self._boot, job, item, container_name, register)
+    
+    def _boot(self, job, item, container_name, register):
+        """Stage 3: wait for the desktop to become ready, then hand it to register"""
+        try:
+            readiness = self.readiness.wait_ready(container_name)
+        except Exception as e:
+            logger.error(f"✗ Error waiting for {container_name}: {e}")
+            job.fail(item, f'Readiness check error: {e}')
+            return
+        
+        if not readiness['ready']:
+            job.fail(item, f"Desktop {container_name} not ready after {readiness['waited']}s ({readiness['status']})")
+            return
+        
+        logger.info(f"✓ Desktop {container_name} ready after {readiness['waited']}s")
+        job.update(item, stage='register', boot_seconds=readiness['waited'])
+        self._register_pool.submit(register)
+    
+    def _register(self, job, username, container_name, admin_user):
+        """Stage 4: container mapping and Guacamole VNC connection"""
+        try:
+            if not assign_container_to_user(username, container_name):
+                job.fail(username, f'Failed to assign container {container_name}')
+                return
+            logger.info(f"✓ Assigned container {container_name} to {username}")
+            
+            connection_name = connection_name_for(container_name)
+            connection_id = None
+            if connection_name is None:
+                logger.warning(f"⚠ Skipping VNC connection for {container_name} - reserved for hardcoded containers")
+            else:
+                connection_id = create_vnc_connection(connection_name, container_name, vnc_port=5901)
+                if not connection_id:
+                    logger.warning(f"⚠ Failed to create VNC connection {connection_name}")
+                elif assign_connection_to_user(username, connection_id):
+                    logger.info(f"✓ Created and assigned VNC connection {connection_name} to {username}")
+                else:
+                    logger.warning(f"⚠ Failed to assign connection {connection_name} to {username}")
+            
+            # The requesting admin gets the same container and connection
+            if admin_user:
+                assign_container_to_user(admin_user, container_name)
+                if connection_id:
+                    assign_connection_to_user(admin_user, connection_id)
+                logger.info(f"✓ Assigned container {container_name} to admin {admin_user}")
+            
+            job.update(username, status='done', stage='ready', connection=connection_name)
+        except Exception as e:
+            logger.error(f"✗ Error registering {container_name} for {username}: {e}")
+            job.fail(username, f'Registration error: {e}')
+    
+    def _register_container(self, job, container_name, vnc_port, password):
+        """Stage 4 of submit_container: Guacamole VNC connection only"""
+        # ptvnc5 -> pt05; a non-numeric suffix is kept (ptvnc-lab01 -> pt-lab01)
+        suffix = container_name.replace('ptvnc', '')
+        connection_name = f'pt{int(suffix):02d}' if suffix.isdigit() else f'pt{suffix}'
+        try:
+            connection_id = create_vnc_connection(connection_name, container_name, vnc_port, password)
+        except Exception as e:
+            logger.error(f"✗ Error registering {container_name}: {e}")
+            job.fail(container_name, f'Registration error: {e}')
+            return
+        
+        if not connection_id:
+            logger.warning(f"⚠ Container {container_name} is ready but its registration failed")
+            job.fail(container_name, f'Container {container_name} is ready but registration in Guacamole failed')
+            return
+        logger.info(f"✓ Container {container_name} registered as connection {connection_name}")
+        job.update(container_name, status='done', stage='ready', connection=connection_name, connection_id=connection_id)
+
+
+_pipeline = None
+_pipeline_pid = None
+_pipeline_lock = threading.Lock()
+
+
+def get_provisioning_pipeline(docker_mgr):
+    """Get the provisioning pipeline for the current worker process"""
+    global _pipeline, _pipeline_pid
+    pid = os.getpid()
+    with _pipeline_lock:
+        if _pipeline is None or _pipeline_pid != pid:
+            _pipeline = ProvisioningPipeline(docker_mgr)
+            _pipeline_pid = pid
+        return _pipeline
@@ -1,22 +1,42 @@
 """API routes for bulk user and container management"""
 
+import json
 import logging
 import os
+import queue
 import subprocess
+import time
 from functools import wraps
-from flask import Blueprint, request, jsonify, session
+from flask import Blueprint, Response, request, jsonify, session
 from ptmanagement.db.guacamole import (
-    get_all_users, create_user, delete_user, user_exists, get_user_connections,
-    assign_connection_to_user, assign_container_to_user, get_user_container, 
-    get_users_by_container, create_vnc_connection, reset_user_password, execute_query, get_user_entity_id,
-    delete_connection, grant_admin_permission, revoke_admin_permission
+    get_all_users, delete_user, user_exists, get_user_connections,
+    get_container_user_map, create_vnc_connection, reset_user_password, execute_query, get_user_entity_id,
+    delete_connection, grant_admin_permission, revoke_admin_permission,
+    bulk_create_users, get_existing_usernames, bulk_reset_passwords, count_users,
+    get_user_ids, get_containers_by_users, delete_users
 )
 from ptmanagement.docker_mgmt.container import DockerManager
+from ptmanagement.docker_mgmt.logs import CURSOR_PATTERN, timestamp_cursor
+from ptmanagement.docker_mgmt.readiness import get_readiness_tracker
+from ptmanagement.docker_mgmt.usage import get_usage_collector
+from ptmanagement.api.live import build_overview, format_sse, get_dashboard_hub
+from ptmanagement.api.jobs import get_job, list_jobs, submit_job
+from ptmanagement.api.bulk import parse_filters, run_bulk, run_concurrently, select_containers
+from ptmanagement.api.provisioning import get_provisioning_pipeline
+from ptmanagement.api.warm_pool import get_warm_pool
+from ptmanagement.api.hibernation import get_idle_reaper
+from ptmanagement.api.autoscaler import get_autoscaler
 
 logger = logging.getLogger(__name__)
 
 docker_mgr = DockerManager()
 
+# Longest readiness long-poll a request may ask for (seconds)
+READINESS_MAX_WAIT = 60
+
+# Characters of stdout/stderr kept per container by bulk exec jobs
+EXEC_OUTPUT_LIMIT = 4000
+
 
 def require_auth(f):
     """Decorator to require authentication for API endpoints"""
@@ -55,6 +75,20 @@ def create_api_blueprint():
     """Create and configure the API blueprint"""
     api = Blueprint('api', __name__)
     
+    # Keep booted spare containers ready to hand out (no-op unless WARM_POOL_SIZE is set)
+    get_warm_pool(docker_mgr).start()
+    # Hibernate idle containers (no-op unless HIBERNATE_IDLE_MINUTES is set)
+    get_idle_reaper(docker_mgr).start()
+    # Rebalance CPU/memory limits by usage (no-op unless AUTOSCALE_ENABLED is set)
+    get_autoscaler(docker_mgr).start()
+    
+    @api.after_request
+    def notify_dashboard(response):
+        """Push dashboard updates right after a successful change"""
+        if request.method != 'GET' and response.status_code < 400:
+            get_dashboard_hub(docker_mgr).notify()
+        return response
+    
     # ========================================================================
     # User Management Endpoints
     # ========================================================================
@@ -62,9 +96,14 @@ def create_api_blueprint():
     @api.route('/users', methods=['GET'])
     @require_auth
     def list_users():
-        """Get all Guacamole users"""
+        """Get all Guacamole users
+        
+        Query parameters:
+        - include_connections: 'true' or 'false' (default: 'true')
+        """
         try:
-            users = get_all_users()
+            include_connections = request.args.get('include_connections', 'true').lower() != 'false'
+            users = get_all_users(include_connections=include_connections)
             return jsonify({
                 'success': True,
                 'users': users,
@@ -103,13 +142,20 @@ def create_api_blueprint():
             "users": [
                 {"username": "user1", "password": "pass1", "create_container": true, "is_admin": true},
                 {"username": "user2", "password": "pass2", "container": "ptvnc1", "is_admin": false}
-            ]
+            ],
+            "all_or_nothing": false
         }
         
         Options:
         - is_admin (bool): Grant ADMINISTER permission to user (default: false)
         - create_container (bool): Create a new container for this user (default: false)
         - container (string): Assign existing container to user (default: none)
+        - all_or_nothing (bool): Reject the whole batch if any row is invalid or fails (default: false)
+        
+        All users are written in one transaction with multi-row INSERTs.
+        Containers for users with create_container are provisioned in the
+        background: the response is 202 with a job_id to poll at
+        /api/jobs/<job_id> (201 when no container was requested).
         """
         try:
             data = request.get_json()
@@ -117,221 +163,90 @@ def create_api_blueprint():
                 return jsonify({'error': 'Missing users data'}), 400
             
             users = data['users']
+            all_or_nothing = bool(data.get('all_or_nothing', False))
             created = []
             failed = []
             
+            # Users assigned to an existing container get its VNC connection,
+            # created if missing, in the same transaction as the user
+            existing_usernames = get_existing_usernames(
+                (u.get('username') or '').strip() for u in users
+            )
+            bulk_rows = []
+            options = {}
             for user_data in users:
-                username = user_data.get('username', '').strip()
-                password = user_data.get('password', '').strip()
-                create_container = user_data.get('create_container', False)
-                existing_container = user_data.get('container', '').strip()
-                is_admin = user_data.get('is_admin', False)
-                
-                logger.info(f"DEBUG: Processing user {username}, create_container={create_container}, is_admin={is_admin}")
-                
-                if not username or not password:
-                    failed.append({'username': username, 'error': 'Missing username or password'})
-                    continue
-                
-                if user_exists(username):
-                    failed.append({'username': username, 'error': 'User already exists'})
-                    continue
+                username = (user_data.get('username') or '').strip()
+                existing_container = (user_data.get('container') or '').strip()
+                row = {
+                    'username': username,
+                    'password': (user_data.get('password') or '').strip(),
+                    'is_admin': user_data.get('is_admin', False),
+                    'vnc_connections': {},
+                    'containers': []
+                }
+                options[username] = {
+                    'create_container': user_data.get('create_container', False),
+                    'existing_container': existing_container
+                }
                 
-                # Create user with plain-text password; create_user will hash it internally
-                user_id, success = create_user(username, password)
-                if success:
-                    container_assigned = None
-                    
-                    # Grant admin permission if requested
-                    if is_admin:
-                        if grant_admin_permission(username):
-                            logger.info(f"✓ Granted admin permission to {username}")
-                        else:
-                            logger.warning(f"⚠ Failed to grant admin permission to {username}")
+                if existing_container and not options[username]['create_container'] and username and username not in existing_usernames:
+                    row['containers'].append(existing_container)
                     
-                    if create_container:
-                        # Spin up a new container - auto-increment ptvnc naming
-                        try:
-                            # Get all existing ptvnc containers to find the next number
-                            from ptmanagement.docker_mgmt.container import DockerManager
-                            docker_mgr = DockerManager()
-                            existing_containers = docker_mgr.list_containers()
-                            
-                            # Extract numbers from container names like ptvnc1, ptvnc10, etc.
-                            next_number = 1
-                            numbers = []
-                            for container in existing_containers:
-                                name = container.get('name', '')
-                                if name.startswith('ptvnc') and len(name) > 5:
-                                    suffix = name[5:]  # Everything after 'ptvnc'
-                                    if suffix.isdigit():
-                                        numbers.append(int(suffix))
-                            
-                            if numbers:
-                                next_number = max(numbers) + 1
-                            
-                            container_name = f'ptvnc{next_number}'
-                            logger.info(f"Creating container {container_name} for user {username}...")
-                            
-                            # Get the actual host path for /shared (needed for docker daemon to understand)
-                            # CRITICAL: Must use SHARED_HOST_PATH from environment (host path), not PROJECT_ROOT (container path)
-                            shared_path_env = os.getenv('SHARED_HOST_PATH')
-                            shared_path = shared_path_env if shared_path_env else os.path.join(os.getenv('PROJECT_ROOT', '/project'), 'shared')
-                            logger.info(f"DEBUG: SHARED_HOST_PATH env = {shared_path_env}")
-                            logger.info(f"DEBUG: Using shared_path = {shared_path}")
-                            project_root = os.getenv('PROJECT_ROOT', '/project')
-                            
-                            # Find CiscoPacketTracer.deb - check common locations
-                            pt_deb = os.getenv('PT_DEB_FILE')
-                            if not pt_deb:
-                                # Try to find it in project root or parent directories
-                                possible_paths = [
-                                    os.path.join(project_root, 'CiscoPacketTracer.deb'),
-                                    '/run/media/kalpa/9530f1e7-4f57-4bf2-b7f2-b03a2b8d4111/PT DEv/PacketTracerWeb/CiscoPacketTracer.deb',
-                                    '/project/CiscoPacketTracer.deb',
-                                ]
-                                for path in possible_paths:
-                                    if os.path.exists(path):
-                                        pt_deb = path
-                                        break
-                            
-                            if not pt_deb:
-                                pt_deb = os.path.join(project_root, 'CiscoPacketTracer.deb')
-                            
-                            # Create the container using docker CLI with /shared mount - matching deploy.sh exactly
-                            cmd = [
-                                'docker', 'run', '-d',
-                                '--name', container_name,
-                                '--restart', 'unless-stopped',
-                                '--cpus', '0.1',
-                                '-m', '1G',
-                                '--ulimit', 'nproc=2048',
-                                '--ulimit', 'nofile=1024',
-                                '--network', 'ptnet',
-                                '--dns=127.0.0.1',
-                                '-v', f'{pt_deb}:/PacketTracer.deb:ro',
-                                '-v', 'pt_opt:/opt/pt',
-                                f'--mount=type=bind,source={shared_path},target=/shared,bind-propagation=rprivate',
-                                '-e', 'PT_DEB_PATH=/PacketTracer.deb',
-                                'ptvnc'
-                            ]
-                            logger.info(f"Docker command: {' '.join(cmd)}")
-                            result = subprocess.run(cmd, capture_output=True, text=True, timeout=30)
-                            
-                            if result.returncode == 0:
-                                logger.info(f"✓ Created container {container_name}")
-
-                                # Create Desktop symlink to /shared for easy file access
-                                # Also fix /shared permissions to be writable by ptuser
-                                try:
-                                    symlink_cmd = [
-                                        'docker', 'exec', container_name,
-                                        'bash', '-c',
-                                        'mkdir -p /home/ptuser/Desktop && ln -sf /shared /home/ptuser/Desktop/shared && chmod 777 /shared && chown ptuser:ptuser /shared'
-                                    ]
-                                    symlink_result = subprocess.run(symlink_cmd, capture_output=True, text=True, timeout=10)
-                                    if symlink_result.returncode == 0:
-                                        logger.info(f"✓ Created Desktop symlink and fixed /shared permissions in {container_name}")
-                                    else:
-                                        logger.warning(f"⚠ Failed to create Desktop symlink in {container_name}: {symlink_result.stderr}")
-                                except Exception as e:
-                                    logger.warning(f"⚠ Error creating Desktop symlink: {e}")
-                                
-                                # Assign container to user
-                                if assign_container_to_user(username, container_name):
-                                    logger.info(f"✓ Assigned container {container_name} to {username}")
-                                    container_assigned = container_name
-                                    
-                                    # Create VNC connection in Guacamole for this container
-                                    # Extract number from container name (ptvnc3 -> pt03)
-                                    container_num = container_name.replace('ptvnc', '').lstrip('0') or '0'
-                                    connection_num = int(container_num)
-                                    
-                                    # Prevent creating pt01 or pt02 (reserved for ptvnc1 and ptvnc2)
-                                    if connection_num < 3:
-                                        logger.warning(f"⚠ Skipping connection pt{connection_num:02d} - reserved for hardcoded containers")
-                                        continue
-                                    
-                                    connection_name = f"pt{connection_num:02d}"
-                                    try:
-                                        connection_id = create_vnc_connection(connection_name, container_name, vnc_port=5901)
-                                        if connection_id:
-                                            # Assign connection to user (use connection_id, not connection_name!)
-                                            if assign_connection_to_user(username, connection_id):
-                                                logger.info(f"✓ Created and assigned VNC connection {connection_name} to {username}")
-                                            else:
-                                                logger.warning(f"⚠ Failed to assign connection {connection_name} to {username}")
-                                        else:
-                                            logger.warning(f"⚠ Failed to create VNC connection {connection_name}")
-                                    except Exception as conn_err:
-                                        logger.warning(f"⚠ Error creating VNC connection: {conn_err}")
-                                    
-                                    # Get list of admin users and assign them the same container
-                                    # For now, we'll assign to the logged-in admin user
-                                    current_user = session.get('user')
-                                    if current_user:
-                                        assign_container_to_user(current_user, container_name)
-                                        logger.info(f"✓ Assigned container {container_name} to admin {current_user}")
-                                        # Also assign the connection to admin
-                                        try:
-                                            assign_connection_to_user(current_user, connection_id)
-                                            logger.info(f"✓ Assigned connection {connection_name} to admin {current_user}")
-                                        except Exception as conn_err:
-                                            logger.warning(f"⚠ Error assigning connection to admin: {conn_err}")
-                                else:
-                                    logger.warning(f"⚠ Failed to assign container {container_name} to {username}")
-                            else:
-                                logger.error(f"✗ Failed to create container {container_name}: {result.stderr}")
-                                failed.append({'username': username, 'error': f'Container creation failed: {result.stderr}'})
-                                continue
-                                
-                        except Exception as e:
-                            logger.error(f"✗ Error creating container: {e}")
-                            failed.append({'username': username, 'error': f'Container creation error: {str(e)}'})
-                            continue
-                    
-                    elif existing_container:
-                        # Assign existing container if provided
-                        if assign_container_to_user(username, existing_container):
-                            logger.info(f"✓ Assigned container {existing_container} to {username}")
-                            container_assigned = existing_container
-                            
-                            # Create or get VNC connection for this container
-                            # Extract number from container name (ptvnc3 -> pt03)
-                            container_num = existing_container.replace('ptvnc', '').lstrip('0') or '0'
-                            connection_num = int(container_num)
-                            
-                            # Prevent creating pt01 or pt02 (reserved for ptvnc1 and ptvnc2)
-                            if connection_num < 3:
-                                logger.warning(f"⚠ Skipping VNC connection for pt{connection_num:02d} - reserved for hardcoded containers")
-                            else:
-                                connection_name = f"pt{connection_num:02d}"
-                                try:
-                                    connection_id = create_vnc_connection(connection_name, existing_container, vnc_port=5901)
-                                    if connection_id:
-                                        # Assign connection to user
-                                        if assign_connection_to_user(username, connection_id):
-                                            logger.info(f"✓ Assigned VNC connection {connection_name} to {username}")
-                                        else:
-                                            logger.warning(f"⚠ Failed to assign connection {connection_name} to {username}")
-                                    else:
-                                        logger.warning(f"⚠ Failed to create VNC connection {connection_name}")
-                                except Exception as conn_err:
-                                    logger.warning(f"⚠ Error creating VNC connection: {conn_err}")
-                        else:
-                            logger.warning(f"⚠ Failed to assign container {existing_container} to {username}")
+                    # Extract number from container name (ptvnc3 -> pt03)
+                    container_num = existing_container.replace('ptvnc', '').lstrip('0') or '0'
+                    connection_num = int(container_num) if container_num.isdigit() else 0
                     
-                    created.append({'username': username, 'container': container_assigned or 'none'})
+                    # Prevent creating pt01 or pt02 (reserved for ptvnc1 and ptvnc2)
+                    if connection_num < 3:
+                        logger.warning(f"⚠ Skipping VNC connection for pt{connection_num:02d} - reserved for hardcoded containers")
+                    else:
+                        row['vnc_connections'][f"pt{connection_num:02d}"] = existing_container
+                
+                bulk_rows.append(row)
+            
+            # Entities, users, admin permissions and VNC connections in one transaction
+            result = bulk_create_users(bulk_rows, all_or_nothing=all_or_nothing)
+            failed.extend(result['failed'])
+            if result['aborted']:
+                return jsonify({
+                    'success': False,
+                    'created': [],
+                    'failed': failed,
+                    'count_created': 0,
+                    'count_failed': len(failed)
+                }), 400
+            
+            to_provision = []
+            for user_result in result['created']:
+                username = user_result['username']
+                if options[username]['create_container']:
+                    to_provision.append(username)
                 else:
-                    failed.append({'username': username, 'error': 'Database error'})
+                    created.append({'username': username, 'container': options[username]['existing_container'] or 'none'})
+            
+            if not to_provision:
+                return jsonify({
+                    'success': True,
+                    'created': created,
+                    'failed': failed,
+                    'count_created': len(created),
+                    'count_failed': len(failed)
+                }), 201
+            
+            # New containers are provisioned in the background; progress via /api/jobs/<job_id>
+            job = get_provisioning_pipeline(docker_mgr).submit(to_provision, admin_user=session.get('user'))
+            containers = {item['name']: item.get('container') for item in job.to_dict()['items']}
+            for username in to_provision:
+                created.append({'username': username, 'container': containers.get(username) or 'pending'})
             
             return jsonify({
                 'success': True,
                 'created': created,
                 'failed': failed,
                 'count_created': len(created),
-                'count_failed': len(failed)
-            }), 201
+                'count_failed': len(failed),
+                'job_id': job.id
+            }), 202
         except Exception as e:
             logger.error(f"✗ Failed to create users: {e}")
             return jsonify({'error': str(e)}), 500
@@ -383,6 +298,9 @@ def create_api_blueprint():
         """
         Delete multiple users with optional container deletion.
         
+        Runs as a background job; returns 202 with a job_id whose result
+        (GET /api/jobs/<job_id>) has the deleted/not_found/failed lists.
+        
         Expected JSON:
         {
             "users": [
@@ -397,60 +315,84 @@ def create_api_blueprint():
             if not data or 'users' not in data:
                 return jsonify({'error': 'Missing users data'}), 400
             
-            users = data['users']
+            usernames = [user_data.get('username', '').strip() for user_data in data['users']]
             delete_containers = data.get('delete_containers', False)
-            deleted = []
-            failed = []
-            not_found = []
-            containers_deleted = []
-            
-            from ptmanagement.db.guacamole import get_containers_by_user
-            
-            for user_data in users:
-                username = user_data.get('username', '').strip()
-                
-                if not username:
-                    failed.append({'username': username, 'error': 'Missing username'})
-                    continue
-                
-                if not user_exists(username):
-                    not_found.append(username)
-                    continue
-                
-                # Delete containers if requested
-                if delete_containers:
-                    try:
-                        user_containers = get_containers_by_user(username)
-                        for container_name in user_containers:
-                            try:
-                                docker_mgr.delete_container(container_name, force=True)
-                                containers_deleted.append(container_name)
-                                logger.info(f"✓ Deleted container {container_name} for user {username}")
-                            except Exception as e:
-                                logger.warning(f"⚠ Failed to delete container {container_name}: {e}")
-                    except Exception as e:
-                        logger.warning(f"⚠ Failed to get containers for user {username}: {e}")
-                
-                if delete_user(username):
-                    deleted.append(username)
-                else:
-                    failed.append({'username': username, 'error': 'Database error'})
             
-            return jsonify({
-                'success': True,
-                'deleted': deleted,
-                'not_found': not_found,
-                'failed': failed,
-                'containers_deleted': containers_deleted,
-                'count_deleted': len(deleted),
-                'count_not_found': len(not_found),
-                'count_failed': len(failed),
-                'count_containers_deleted': len(containers_deleted)
-            }), 200
+            job = submit_job(
+                'bulk_delete',
+                lambda job: _bulk_delete(job, usernames, delete_containers),
+                names=[u for u in dict.fromkeys(usernames) if u],
+                meta={'requested_by': session.get('user'), 'delete_containers': delete_containers}
+            )
+            return jsonify({'success': True, 'job_id': job.id, 'status': job.status}), 202
         except Exception as e:
             logger.error(f"✗ Failed to bulk delete users: {e}")
             return jsonify({'error': str(e)}), 500
     
+    def _bulk_delete(job, usernames, delete_containers):
+        """Job body for bulk_delete_users
+        
+        Users (and their containers) are looked up with one set-based query
+        each, the containers are force-removed concurrently and the users
+        deleted with set-based DELETEs in a single transaction.
+        """
+        failed = [{'username': username, 'error': 'Missing username'} for username in usernames if not username]
+        names = [u for u in dict.fromkeys(usernames) if u]
+        
+        users = get_user_ids(names)
+        not_found = [u for u in names if u not in users]
+        for username in not_found:
+            job.update(username, status='done', stage='not_found')
+        
+        containers_deleted = []
+        containers_failed = []
+        if delete_containers and users:
+            user_containers = get_containers_by_users(users)
+            # A container shared by several of the users is removed once
+            container_names = list(dict.fromkeys(c for u in users for c in user_containers.get(u, ())))
+            for username in users:
+                job.update(username, status='running', stage='delete_containers')
+            
+            errors = run_concurrently(
+                container_names,
+                lambda name: docker_mgr.delete_container(name, force=True, stop_first=False),
+                'delete'
+            )
+            for index, container_name in enumerate(container_names):
+                if index in errors:
+                    containers_failed.append({'container': container_name, 'error': errors[index]})
+                    logger.warning(f"⚠ Failed to delete container {container_name}: {errors[index]}")
+                else:
+                    containers_deleted.append(container_name)
+            logger.info(f"✓ Deleted {len(containers_deleted)} container(s) of {len(users)} user(s)")
+        
+        for username in users:
+            job.update(username, status='running', stage='delete')
+        try:
+            deleted = delete_users(users)
+        except Exception as e:
+            logger.error(f"✗ Bulk user delete rolled back: {e}")
+            deleted = []
+            for username in users:
+                failed.append({'username': username, 'error': 'Database error'})
+                job.fail(username, 'Database error')
+        for username in deleted:
+            job.update(username, status='done', stage='deleted')
+        
+        get_dashboard_hub(docker_mgr).notify()
+        return {
+            'success': True,
+            'deleted': deleted,
+            'not_found': not_found,
+            'failed': failed,
+            'containers_deleted': containers_deleted,
+            'containers_failed': containers_failed,
+            'count_deleted': len(deleted),
+            'count_not_found': len(not_found),
+            'count_failed': len(failed),
+            'count_containers_deleted': len(containers_deleted)
+        }
+    
     # ========================================================================
     # Container Management Endpoints
     # ========================================================================
@@ -460,153 +402,96 @@ def create_api_blueprint():
     def list_containers():
         """Get all Packet Tracer containers with user assignments"""
         try:
+            version = docker_mgr.state_version()
             containers = docker_mgr.list_containers(all=True)
             
-            # Add user assignment info to each container
+            # Add user assignment info to each container (one query for all of them)
+            user_map = get_container_user_map()
             for container in containers:
-                container['users'] = get_users_by_container(container['name'])
+                container['users'] = user_map.get(container['name'], [])
             
             return jsonify({
                 'success': True,
                 'containers': containers,
-                'count': len(containers)
+                'count': len(containers),
+                'version': version
             }), 200
         except Exception as e:
             logger.error(f"✗ Failed to list containers: {e}")
             return jsonify({'error': str(e)}), 500
     
+    @api.route('/containers/version', methods=['GET'])
+    @require_auth
+    def get_containers_version():
+        """Get the container state invalidation counter (null while Docker events are unavailable)"""
+        return jsonify({
+            'success': True,
+            'version': docker_mgr.state_version()
+        }), 200
+    
+    @api.route('/containers/pool', methods=['GET'])
+    @require_auth
+    def get_warm_pool_status():
+        """Get warm pool size (ready/booting vs target) and claim counters"""
+        try:
+            return jsonify({'success': True, 'pool': get_warm_pool(docker_mgr).status()}), 200
+        except Exception as e:
+            logger.error(f"✗ Failed to get warm pool status: {e}")
+            return jsonify({'error': str(e)}), 500
+    
     @api.route('/containers', methods=['POST'])
     @require_auth_or_internal
     def create_container_endpoint():
-        """Create a new Packet Tracer container and automatically register in Guacamole"""
+        """
+        Create a new Packet Tracer container and register it in Guacamole.
+        
+        The container is provisioned in the background (see
+        ptmanagement.api.provisioning): it is registered only once its
+        desktop is ready. The response is 202 with a job_id to poll at
+        /api/jobs/<job_id>; the job's item carries the connection name.
+        """
         try:
             data = request.get_json() or {}
             
-            # Get container name
+            # Empty name: the pipeline picks the next free ptvnc number
             container_name = data.get('name', '').strip()
             
-            # If empty, auto-generate the next number
-            if not container_name:
-                # Get all existing ptvnc containers to find the next number
-                containers = docker_mgr.list_containers()
-                
-                # Extract numbers from container names like ptvnc1, ptvnc10, etc.
-                existing_numbers = []
-                for container in containers:
-                    name = container.get('name', '')
-                    if name.startswith('ptvnc'):
-                        suffix = name[5:]  # Everything after 'ptvnc'
-                        if suffix.isdigit():
-                            existing_numbers.append(int(suffix))
-                
-                # Find the next available number
-                next_number = max(existing_numbers) + 1 if existing_numbers else 1
-                container_name = f'ptvnc{next_number}'
-                logger.info(f"Auto-generating container name: {container_name}")
-            
-            # Validate container naming: must start with 'ptvnc'
-            if not container_name.startswith('ptvnc'):
-                return jsonify({
-                    'error': 'Invalid container name. Container names must start with "ptvnc" (e.g., ptvnc1, ptvnc-lab01, ptvnc12345)'
-                }), 400
-            
-            # Validate container name format: only alphanumeric, hyphens, and underscores after 'ptvnc'
-            suffix = container_name[5:]  # Everything after 'ptvnc'
-            if suffix and not all(c.isalnum() or c in '-_' for c in suffix):
-                return jsonify({
-                    'error': 'Invalid container name suffix. Only alphanumeric characters, hyphens, and underscores are allowed'
-                }), 400
-            
-            # Check if container already exists
-            containers = docker_mgr.list_containers()
-            if any(c.get('name') == container_name for c in containers):
-                return jsonify({'error': f'Container {container_name} already exists'}), 400
-            
-            # Optional parameters
-            image = data.get('image', 'ptvnc')
-            environment = data.get('environment', {})
-            # NOTE: Do NOT expose VNC ports to host - Guacamole connects via Docker internal network
-            # This allows unlimited containers without port conflicts (multiple containers can use 5901 internally)
-            ports = {}  # Force empty ports - VNC is not exposed to host
-            
-            logger.info(f"Creating container {container_name}...")
-            
-            # Use docker_mgr to create the container
-            result = docker_mgr.create_container(image, container_name, environment, ports)
-            
-            if result:
-                logger.info(f"✓ Successfully created container {container_name}")
-                # Connect container to pt-stack network for Guacamole access
-                try:
-                    net_cmd = ['docker', 'network', 'connect', 'pt-stack', container_name]
-                    net_result = subprocess.run(net_cmd, capture_output=True, text=True, timeout=10)
-                    if net_result.returncode == 0:
-                        logger.info(f"✓ Connected {container_name} to pt-stack network")
-                    else:
-                        logger.warning(f"⚠ Failed to connect {container_name} to pt-stack: {net_result.stderr}")
-                except Exception as e:
-                    logger.warning(f"⚠ Error connecting to network: {e}")
-                
-                # Create symlink to /shared on Desktop for easy access
-                # Also fix /shared permissions to be writable by ptuser
-                try:
-                    docker_mgr.exec_in_container(container_name, ['mkdir', '-p', '/home/ptuser/Desktop'])
-                    docker_mgr.exec_in_container(container_name, ['ln', '-sf', '/shared', '/home/ptuser/Desktop/shared'])
-                    docker_mgr.exec_in_container(container_name, ['chmod', '777', '/shared'])
-                    docker_mgr.exec_in_container(container_name, ['chown', 'ptuser:ptuser', '/shared'])
-                    logger.info(f"✓ Created /shared symlink and fixed permissions on {container_name} Desktop")
-                except Exception as symlink_err:
-                    logger.warning(f"⚠ Failed to create /shared symlink or fix permissions: {symlink_err}")
+            if container_name:
+                # Validate container naming: must start with 'ptvnc'
+                if not container_name.startswith('ptvnc'):
+                    return jsonify({
+                        'error': 'Invalid container name. Container names must start with "ptvnc" (e.g., ptvnc1, ptvnc-lab01, ptvnc12345)'
+                    }), 400
                 
-                # Automatically register the container in Guacamole
-                try:
-                    # Generate connection name from container name
-                    # Try to extract numeric part for zero-padding (ptvnc5 -> pt05, ptvnc10 -> pt10)
-                    # If no numeric part, use the full suffix as connection name (ptvnc-test-vol -> pt-test-vol)
-                    suffix = container_name.replace('ptvnc', '')
-                    
-                    # Check if suffix is numeric
-                    if suffix.isdigit():
-                        connection_name = f'pt{int(suffix):02d}'
-                    else:
-                        # For non-numeric suffixes, just use pt prefix
-                        connection_name = f'pt{suffix}'
-                    
-                    vnc_port = data.get('vnc_port', 5901)
-                    password = data.get('password', 'Cisco123')
-                    
-                    logger.info(f"Auto-registering container {container_name} as {connection_name}...")
-                    connection_id = create_vnc_connection(connection_name, container_name, vnc_port, password)
-                    
-                    if connection_id:
-                        logger.info(f"✓ Container auto-registered as connection {connection_name}")
-                        return jsonify({
-                            'success': True,
-                            'message': f'Container {container_name} created and registered successfully',
-                            'container_name': result,
-                            'connection_name': connection_name,
-                            'connection_id': connection_id
-                        }), 201
-                    else:
-                        # Container created but registration failed - still return success but with warning
-                        logger.warning(f"⚠ Container {container_name} created but registration failed")
-                        return jsonify({
-                            'success': True,
-                            'message': f'Container {container_name} created but registration in Guacamole failed',
-                            'container_name': result,
-                            'warning': 'Container created but not registered in Guacamole'
-                        }), 201
-                except Exception as reg_err:
-                    logger.warning(f"⚠ Failed to auto-register container: {reg_err}")
+                # Validate container name format: only alphanumeric, hyphens, and underscores after 'ptvnc'
+                suffix = container_name[5:]  # Everything after 'ptvnc'
+                if suffix and not all(c.isalnum() or c in '-_' for c in suffix):
                     return jsonify({
-                        'success': True,
-                        'message': f'Container {container_name} created but registration failed',
-                        'container_name': result,
-                        'warning': str(reg_err)
-                    }), 201
-            else:
-                logger.error(f"✗ Failed to create container {container_name}")
-                return jsonify({'error': 'Failed to create container'}), 500
+                        'error': 'Invalid container name suffix. Only alphanumeric characters, hyphens, and underscores are allowed'
+                    }), 400
+                
+                # Check if container already exists
+                containers = docker_mgr.list_containers(with_resources=False)
+                if any(c.get('name') == container_name for c in containers):
+                    return jsonify({'error': f'Container {container_name} already exists'}), 400
+            
+            job = get_provisioning_pipeline(docker_mgr).submit_container(
+                container_name or None,
+                image=data.get('image', 'ptvnc'),
+                environment=data.get('environment', {}),
+                vnc_port=data.get('vnc_port', 5901),
+                password=data.get('password', 'Cisco123'),
+                admin_user=session.get('user')
+            )
+            container_name = job.to_dict()['items'][0]['name']
+            logger.info(f"Provisioning container {container_name} (job {job.id})")
+            return jsonify({
+                'success': True,
+                'message': f'Container {container_name} is being created; it is registered once its desktop is ready',
+                'container_name': container_name,
+                'job_id': job.id,
+                'status': job.status
+            }), 202
         except Exception as e:
             logger.error(f"✗ Error creating container: {e}")
             return jsonify({'error': str(e)}), 500
@@ -664,7 +549,28 @@ def create_api_blueprint():
         except Exception as e:
             logger.error(f"✗ Failed to get container {container_name}: {e}")
             return jsonify({'error': str(e)}), 500
-
+    
+    @api.route('/containers/<container_name>/readiness', methods=['GET'])
+    @require_auth_or_internal
+    def get_container_readiness(container_name):
+        """Whether a container's desktop is usable (VNC answering, Packet Tracer installed)
+        
+        Query parameters:
+        - wait: seconds to keep probing until ready (default: 0 - probe once, max: 60)
+        """
+        try:
+            wait = min(max(request.args.get('wait', 0, type=float), 0), READINESS_MAX_WAIT)
+            tracker = get_readiness_tracker(docker_mgr)
+            if wait:
+                readiness = tracker.wait_ready(container_name, timeout=wait)
+            else:
+                readiness = tracker.check(container_name)
+            if readiness['status'] == 'not_found':
+                return jsonify({'error': 'Container not found'}), 404
+            return jsonify({'success': True, 'container': container_name, 'readiness': readiness}), 200
+        except Exception as e:
+            logger.error(f"✗ Failed to check readiness of {container_name}: {e}")
+            return jsonify({'error': str(e)}), 500
     
     @api.route('/containers/<container_name>/logs', methods=['GET'])
     @require_auth
@@ -678,6 +584,168 @@ def create_api_blueprint():
             logger.error(f"✗ Failed to get logs for {container_name}: {e}")
             return jsonify({'error': str(e)}), 500
     
+    @api.route('/containers/<container_name>/logs/stream', methods=['GET'])
+    @require_auth
+    def stream_container_logs(container_name):
+        """Stream container logs incrementally
+        
+        Query parameters:
+        - follow: '1' to keep streaming new lines (default: '0')
+        - since: cursor of the last batch received; resumes after it
+          (EventSource reconnects send it as Last-Event-ID)
+        - tail: lines to start with (default: 100, or all lines after since)
+        - format: 'sse' (default) or 'ndjson'
+        
+        SSE sends a 'logs' event per batch ({lines, cursor}, with the cursor
+        as the event id), then 'end' when the stream finishes or 'failed' if
+        it broke. NDJSON sends one {stream, time, line, cursor} object per line.
+        """
+        follow = request.args.get('follow', '0').lower() in ('1', 'true', 'yes')
+        since = request.args.get('since') or request.headers.get('Last-Event-ID')
+        if since and not CURSOR_PATTERN.match(since):
+            return jsonify({'error': 'since must be a cursor (Unix seconds)'}), 400
+        tail = request.args.get('tail', 'all' if since else '100')
+        if tail != 'all' and not tail.isdigit():
+            return jsonify({'error': "tail must be a number or 'all'"}), 400
+        ndjson = request.args.get('format') == 'ndjson'
+        container = docker_mgr.client.inspect_container(container_name) if docker_mgr.client else None
+        if not container:
+            return jsonify({'error': 'Container not found'}), 404
+        
+        log_tail = docker_mgr.tail_container_logs(
+            container['Id'], follow=follow, since=since, tail=None if tail == 'all' else int(tail),
+            tty=bool((container.get('Config') or {}).get('Tty'))
+        )
+        
+        def sse():
+            cursor = since
+            try:
+                yield 'retry: 3000\n\n'
+                while True:
+                    try:
+                        batch = log_tail.get(timeout=15)
+                    except queue.Empty:
+                        yield ': keep-alive\n\n'
+                        continue
+                    if batch is None:
+                        break
+                    entries, cursor = batch
+                    yield f"id: {cursor}\n" + format_sse('logs', {'lines': entries, 'cursor': cursor})
+                yield format_sse('end', {'cursor': cursor})
+            except Exception as e:
+                # Not 'error' - EventSource uses that name for connection errors
+                yield format_sse('failed', {'error': str(e)})
+            finally:
+                log_tail.close()
+        
+        def lines():
+            try:
+                while True:
+                    try:
+                        batch = log_tail.get(timeout=15)
+                    except queue.Empty:
+                        yield '\n'
+                        continue
+                    if batch is None:
+                        break
+                    entries, cursor = batch
+                    for entry in entries:
+                        # Each line carries its own cursor, so a client can resume mid-batch
+                        line_cursor = timestamp_cursor(entry['time']) or cursor
+                        yield json.dumps(dict(entry, cursor=line_cursor)) + '\n'
+            except Exception as e:
+                yield json.dumps({'error': str(e)}) + '\n'
+            finally:
+                log_tail.close()
+        
+        if ndjson:
+            return Response(lines(), mimetype='application/x-ndjson', headers={'X-Accel-Buffering': 'no'})
+        return Response(sse(), mimetype='text/event-stream', headers={
+            'Cache-Control': 'no-cache',
+            'X-Accel-Buffering': 'no'
+        })
+    
+    @api.route('/containers/hibernation', methods=['GET'])
+    @require_auth
+    def get_hibernation_status():
+        """Get idle hibernation settings, hibernated containers and counters"""
+        try:
+            return jsonify({'success': True, 'hibernation': get_idle_reaper(docker_mgr).status()}), 200
+        except Exception as e:
+            logger.error(f"✗ Failed to get hibernation status: {e}")
+            return jsonify({'error': str(e)}), 500
+    
+    @api.route('/containers/autoscale', methods=['GET'])
+    @require_auth
+    def get_autoscale_status():
+        """Get autoscaler budgets, counters and the latest per-container usage and limits"""
+        try:
+            return jsonify({'success': True, 'autoscale': get_autoscaler(docker_mgr).status()}), 200
+        except Exception as e:
+            logger.error(f"✗ Failed to get autoscaler status: {e}")
+            return jsonify({'error': str(e)}), 500
+    
+    @api.route('/containers/metrics', methods=['GET'])
+    @require_auth
+    def get_containers_metrics():
+        """Latest usage of every running container, totals and CPU-bound ('hot') containers
+        
+        The first request in a worker starts collection, so it may return no
+        containers yet.
+        """
+        try:
+            collector = get_usage_collector(docker_mgr)
+            collector.touch()
+            return jsonify({'success': True, 'metrics': collector.summary()}), 200
+        except Exception as e:
+            logger.error(f"✗ Failed to get container metrics: {e}")
+            return jsonify({'error': str(e)}), 500
+    
+    @api.route('/containers/<container_name>/metrics', methods=['GET'])
+    @require_auth
+    def get_container_metrics(container_name):
+        """Recent usage history of one container (CPU, memory, pids, network)
+        
+        Query parameters:
+            points: Return only the newest N points
+        """
+        try:
+            collector = get_usage_collector(docker_mgr)
+            collector.touch()
+            points = request.args.get('points', type=int)
+            history = collector.history_for(container_name, points)
+            if history is None:
+                return jsonify({
+                    'success': True,
+                    'name': container_name,
+                    'latest': None,
+                    'history': [],
+                    'message': 'No samples yet (collection just started, or the container is not running)'
+                }), 200
+            return jsonify({
+                'success': True,
+                'name': container_name,
+                'latest': history[-1] if history else None,
+                'history': history,
+                'sample_seconds': collector.sample_seconds
+            }), 200
+        except Exception as e:
+            logger.error(f"✗ Failed to get metrics for {container_name}: {e}")
+            return jsonify({'error': str(e)}), 500
+    
+    @api.route('/containers/<container_name>/wake', methods=['POST'])
+    @require_auth_or_internal
+    def wake_container(container_name):
+        """Wake a hibernated (stopped or paused) container"""
+        try:
+            if get_idle_reaper(docker_mgr).wake(container_name):
+                return jsonify({'success': True, 'message': f'Container {container_name} woken'}), 200
+            else:
+                return jsonify({'error': 'Failed to wake container'}), 500
+        except Exception as e:
+            logger.error(f"✗ Failed to wake container {container_name}: {e}")
+            return jsonify({'error': str(e)}), 500
+    
     @api.route('/containers/<container_name>/start', methods=['POST'])
     @require_auth
     def start_container(container_name):
@@ -789,6 +857,38 @@ def create_api_blueprint():
             logger.error(f"✗ Failed to reset password for {username}: {e}")
             return jsonify({'error': str(e)}), 500
     
+    @api.route('/users/bulk/reset-password', methods=['POST'])
+    @require_auth
+    def bulk_reset_password_endpoint():
+        """
+        Reset passwords for multiple users in one batch.
+        
+        Expected JSON:
+        {
+            "users": [
+                {"username": "user1", "password": "newpass1"},
+                {"username": "user2", "password": "newpass2"}
+            ]
+        }
+        """
+        try:
+            data = request.get_json()
+            if not data or 'users' not in data:
+                return jsonify({'error': 'Missing users data'}), 400
+            
+            result = bulk_reset_passwords(data['users'])
+            
+            return jsonify({
+                'success': True,
+                'updated': result['updated'],
+                'failed': result['failed'],
+                'count_updated': len(result['updated']),
+                'count_failed': len(result['failed'])
+            }), 200
+        except Exception as e:
+            logger.error(f"✗ Failed to bulk reset passwords: {e}")
+            return jsonify({'error': str(e)}), 500
+    
     @api.route('/users/<username>/admin', methods=['POST'])
     @require_auth
     def set_admin_status(username):
@@ -916,22 +1016,16 @@ def create_api_blueprint():
     def get_container_resources(container_name):
         """Get current resource limits for a container"""
         try:
-            # Get container inspect data
-            containers = docker_mgr.list_containers(all=True)
-            container = next((c for c in containers if c['name'] == container_name), None)
+            resources = docker_mgr.get_container_resources(container_name)
             
-            if not container:
+            if not resources:
                 return jsonify({'error': f'Container {container_name} not found'}), 404
             
-            # Parse memory and CPU from inspect
-            memory_limit = container.get('memory_limit', 'unlimited')
-            cpu_limit = container.get('cpu_limit', 'unlimited')
-            
             return jsonify({
                 'success': True,
                 'container': container_name,
-                'memory': memory_limit,
-                'cpus': cpu_limit
+                'memory': resources['memory'],
+                'cpus': resources['cpus']
             }), 200
         except Exception as e:
             logger.error(f"✗ Failed to get container resources: {e}")
@@ -983,7 +1077,15 @@ def create_api_blueprint():
     @api.route('/containers/resources/bulk-update', methods=['PUT'])
     @require_auth
     def bulk_update_container_resources():
-        """Update memory and CPU limits for all Packet Tracer containers"""
+        """Update memory and CPU limits for many Packet Tracer containers at once
+        
+        Body: memory, cpus and optional filters (name pattern, user, state,
+        names - see ptmanagement.api.bulk); without filters every ptvnc
+        container is updated.
+        
+        Runs as a background job; returns 202 with a job_id whose result
+        (GET /api/jobs/<job_id>) lists the updated and failed containers.
+        """
         try:
             data = request.get_json()
             memory = data.get('memory', '').strip()
@@ -995,6 +1097,8 @@ def create_api_blueprint():
             # Validate memory format
             if not any(memory.upper().endswith(unit) for unit in ['M', 'G', 'K', 'B']):
                 return jsonify({'error': 'Invalid memory format. Use M, G, K, or B suffix (e.g., 512M, 1G)'}), 400
+            if docker_mgr._parse_memory_to_bytes(memory) is None:
+                return jsonify({'error': f'Invalid memory value: {memory}'}), 400
             
             # Validate CPU is numeric
             try:
@@ -1004,44 +1108,127 @@ def create_api_blueprint():
             except (ValueError, TypeError):
                 return jsonify({'error': 'CPU must be a positive number (e.g., 1, 2, 0.5)'}), 400
             
-            # Get all ptvnc containers
-            containers = docker_mgr.list_containers(all=True)
-            pt_containers = [c for c in containers if c['name'].startswith('ptvnc')]
+            filters, error = parse_filters(data)
+            if error:
+                return jsonify({'error': error}), 400
+            
+            # One listing up front; the job works from these IDs
+            pt_containers = select_containers(docker_mgr, filters)
             
             if not pt_containers:
                 return jsonify({'error': 'No Packet Tracer containers found'}), 404
             
-            # Update all containers
-            updated = []
-            failed = []
-            
-            for container in pt_containers:
-                try:
-                    success = docker_mgr.update_container_resources(container['name'], memory, cpus)
-                    if success:
-                        updated.append(container['name'])
-                        logger.info(f"✓ Updated {container['name']}: memory={memory}, cpus={cpus}")
-                    else:
-                        failed.append(container['name'])
-                        logger.error(f"✗ Failed to update {container['name']}")
-                except Exception as e:
-                    failed.append(container['name'])
-                    logger.error(f"✗ Error updating {container['name']}: {e}")
-            
-            return jsonify({
-                'success': True,
-                'message': f'Updated {len(updated)} container(s)',
-                'updated': updated,
-                'failed': failed if failed else None,
-                'memory': memory,
-                'cpus': cpus,
-                'total_containers': len(pt_containers),
-                'updated_count': len(updated)
-            }), 200
+            job = submit_job(
+                'bulk_resource_update',
+                lambda job: _bulk_update_resources(job, pt_containers, memory, cpus, filters),
+                names=[c['name'] for c in pt_containers],
+                meta={'requested_by': session.get('user'), 'memory': memory, 'cpus': cpus, 'filters': filters}
+            )
+            return jsonify({'success': True, 'job_id': job.id, 'status': job.status}), 202
         except Exception as e:
             logger.error(f"✗ Error in bulk update: {e}")
             return jsonify({'error': str(e)}), 500
     
+    def _bulk_update_resources(job, containers, memory, cpus, filters):
+        """Job body for bulk_update_container_resources"""
+        started = time.perf_counter()
+        updated, failed = run_bulk(
+            job, containers,
+            lambda c: docker_mgr.update_container_resources(c['name'], memory, cpus, container_id=c['id']),
+            stage='update', done_stage='updated'
+        )
+        elapsed = round(time.perf_counter() - started, 3)
+        logger.info(f"✓ Bulk resource update: {len(updated)} updated, {len(failed)} failed in {elapsed}s")
+        
+        return {
+            'success': True,
+            'message': f'Updated {len(updated)} container(s)',
+            'updated': updated,
+            'failed': list(failed) if failed else None,
+            'errors': failed if failed else None,
+            'memory': memory,
+            'cpus': cpus,
+            'filters': filters,
+            'total_containers': len(containers),
+            'updated_count': len(updated),
+            'elapsed_seconds': elapsed
+        }
+    
+    @api.route('/containers/exec', methods=['POST'])
+    @require_auth
+    def bulk_exec_containers():
+        """Run a command or script inside many Packet Tracer containers at once
+        
+        Body: either "cmd" (argument list) or "script" (bash script text), and
+        optional filters (name pattern, user, state, names - see
+        ptmanagement.api.bulk); without a state filter only running
+        containers are targeted.
+        
+        Runs as a background job; returns 202 with a job_id. Each container's
+        job item has its exit_code, stdout and stderr (last EXEC_OUTPUT_LIMIT
+        characters each).
+        """
+        try:
+            data = request.get_json() or {}
+            cmd = data.get('cmd')
+            script = data.get('script')
+            
+            if bool(cmd) == bool(script):
+                return jsonify({'error': 'Provide either cmd (list of arguments) or script (text)'}), 400
+            if cmd and (not isinstance(cmd, list) or not all(isinstance(arg, str) for arg in cmd)):
+                return jsonify({'error': 'cmd must be a list of strings'}), 400
+            if script and not isinstance(script, str):
+                return jsonify({'error': 'script must be a string'}), 400
+            
+            filters, error = parse_filters(data)
+            if error:
+                return jsonify({'error': error}), 400
+            # exec only works in running containers
+            filters.setdefault('state', ['running'])
+            
+            targets = select_containers(docker_mgr, filters)
+            if not targets:
+                return jsonify({'error': 'No matching Packet Tracer containers found'}), 404
+            
+            cmd_list = cmd if cmd else ['bash', '-c', script]
+            job = submit_job(
+                'bulk_exec',
+                lambda job: _bulk_exec(job, targets, cmd_list),
+                names=[c['name'] for c in targets],
+                meta={'requested_by': session.get('user'), 'cmd': cmd_list, 'filters': filters}
+            )
+            logger.info(f"ℹ {session.get('user')} started exec in {len(targets)} container(s): {cmd_list}")
+            return jsonify({'success': True, 'job_id': job.id, 'status': job.status}), 202
+        except Exception as e:
+            logger.error(f"✗ Error in bulk exec: {e}")
+            return jsonify({'error': str(e)}), 500
+    
+    def _bulk_exec(job, containers, cmd_list):
+        """Job body for bulk_exec_containers"""
+        def run(container):
+            exit_code, stdout, stderr = docker_mgr.exec_run(container['name'], cmd_list)
+            job.update(
+                container['name'],
+                exit_code=exit_code,
+                stdout=stdout[-EXEC_OUTPUT_LIMIT:],
+                stderr=stderr[-EXEC_OUTPUT_LIMIT:]
+            )
+            return exit_code == 0
+        
+        started = time.perf_counter()
+        succeeded, failed = run_bulk(job, containers, run, stage='exec', done_stage='executed')
+        elapsed = round(time.perf_counter() - started, 3)
+        logger.info(f"✓ Bulk exec: {len(succeeded)} succeeded, {len(failed)} failed in {elapsed}s")
+        
+        return {
+            'success': True,
+            'message': f'Command succeeded in {len(succeeded)} of {len(containers)} container(s)',
+            'succeeded': succeeded,
+            'failed': list(failed) if failed else None,
+            'total_containers': len(containers),
+            'elapsed_seconds': elapsed
+        }
+    
     # ========================================================================
     # Statistics Endpoint
     # ========================================================================
@@ -1049,15 +1236,14 @@ def create_api_blueprint():
     @api.route('/stats', methods=['GET'])
     @require_auth
     def get_stats():
-        """Get statistics about users and containers"""
+        """Get statistics about users and containers (container counts from the state cache)"""
         try:
-            users = get_all_users()
             docker_stats = docker_mgr.get_stats()
             
             return jsonify({
                 'success': True,
                 'users': {
-                    'total': len(users)
+                    'total': count_users()
                 },
                 'containers': docker_stats
             }), 200
@@ -1065,6 +1251,69 @@ def create_api_blueprint():
             logger.error(f"✗ Failed to get stats: {e}")
             return jsonify({'error': str(e)}), 500
 
+    @api.route('/overview', methods=['GET'])
+    @require_auth
+    def get_overview():
+        """Get containers, users, assignments and stats for the dashboard in one request"""
+        try:
+            return jsonify(dict(build_overview(docker_mgr), success=True)), 200
+        except Exception as e:
+            logger.error(f"✗ Failed to build overview: {e}")
+            return jsonify({'error': str(e)}), 500
+    
+    # ========================================================================
+    # Job Endpoints
+    # ========================================================================
+    
+    @api.route('/jobs', methods=['GET'])
+    @require_auth
+    def list_jobs_endpoint():
+        """List recent background jobs (without per-item detail)"""
+        jobs = list_jobs()
+        return jsonify({'success': True, 'jobs': jobs, 'count': len(jobs)}), 200
+    
+    @api.route('/jobs/<job_id>', methods=['GET'])
+    @require_auth
+    def get_job_endpoint(job_id):
+        """Get a background job's progress, including per-item status and the result"""
+        job = get_job(job_id)
+        if not job:
+            return jsonify({'error': 'Job not found'}), 404
+        return jsonify({'success': True, 'job': job}), 200
+    
+    # ========================================================================
+    # Live Updates Endpoint
+    # ========================================================================
+    
+    @api.route('/events', methods=['GET'])
+    @require_auth
+    def dashboard_events():
+        """Server-sent events stream of dashboard changes
+        
+        Sends a 'snapshot' event (stats, users, containers) on connect, then
+        'users', 'containers' ('upserted' / 'removed') and 'stats' events as
+        things change. Comment lines are sent as keep-alives.
+        """
+        hub = get_dashboard_hub(docker_mgr)
+        subscriber = hub.subscribe()
+        
+        def stream():
+            try:
+                # Browser reconnect delay (ms) if the connection drops
+                yield 'retry: 3000\n\n'
+                while hub.is_subscribed(subscriber):
+                    try:
+                        yield subscriber.get(timeout=15)
+                    except queue.Empty:
+                        yield ': keep-alive\n\n'
+            finally:
+                hub.unsubscribe(subscriber)
+        
+        return Response(stream(), mimetype='text/event-stream', headers={
+            'Cache-Control': 'no-cache',
+            'X-Accel-Buffering': 'no'
+        })
+    
     # ========================================================================
     # Logs Endpoint
     # ========================================================================
@@ -1076,79 +1325,11 @@ def create_api_blueprint():
         try:
             lines = request.args.get('lines', 100, type=int)
             
-            # Use Docker socket client directly to get raw logs
-            from ptmanagement.docker_mgmt.container import DockerSocketClient
-            import socket as sock_module
-            import json as json_module
-            
-            docker_client = DockerSocketClient()
-            
-            # List all containers to find pt-management
-            all_containers = docker_client.list_containers(all=True)
-            
-            pt_management_id = None
-            for container in all_containers:
-                names = container.get('Names', [])
-                # Docker returns names with leading slash
-                if '/pt-management' in names or 'pt-management' in names:
-                    pt_management_id = container['Id']
-                    break
-            
-            if not pt_management_id:
+            if not docker_mgr.client or not docker_mgr.client.inspect_container('pt-management'):
                 return jsonify({'error': 'Container not found'}), 404
             
-            # Get raw logs using socket (the built-in get_logs tries to JSON decode)
-            try:
-                sock = sock_module.socket(sock_module.AF_UNIX, sock_module.SOCK_STREAM)
-                sock.connect(docker_client.socket_path)
-                
-                logs_path = f"/v1.41/containers/{pt_management_id}/logs?stdout=1&stderr=1&tail={lines}"
-                request_line = f"GET {logs_path} HTTP/1.0\r\nHost: localhost\r\n\r\n"
-                sock.sendall(request_line.encode('utf-8'))
-                
-                # Receive response
-                response = b''
-                while True:
-                    chunk = sock.recv(4096)
-                    if not chunk:
-                        break
-                    response += chunk
-                sock.close()
-                
-                # Parse HTTP response
-                response_str = response.decode('utf-8', errors='ignore')
-                parts = response_str.split('\r\n\r\n', 1)
-                if len(parts) < 2:
-                    return jsonify({'error': 'Invalid response format'}), 500
-                
-                headers, body_raw = parts[0], response[len(parts[0]) + 4:]  # +4 for \r\n\r\n
-                
-                # Parse Docker log format: [8 bytes header][payload]...
-                # Header: [1 stream type][3 padding][4 size in big-endian]
-                logs_lines = []
-                i = 0
-                while i < len(body_raw):
-                    if i + 8 <= len(body_raw):
-                        # Get the size (bytes 4-7, big-endian)
-                        size = int.from_bytes(body_raw[i+4:i+8], 'big')
-                        i += 8
-                        
-                        # Extract the log line
-                        if i + size <= len(body_raw):
-                            line = body_raw[i:i+size].decode('utf-8', errors='ignore').strip()
-                            if line:
-                                logs_lines.append(line)
-                            i += size
-                        else:
-                            break
-                    else:
-                        break
-                
-                logs_text = '\n'.join(logs_lines[-lines:]) if logs_lines else "No logs available"
-                
-            except Exception as sock_err:
-                logger.error(f"Socket error getting logs: {sock_err}")
-                return jsonify({'error': f'Failed to get logs: {str(sock_err)}'}), 500
+            logs_lines = docker_mgr.get_container_logs('pt-management', tail=lines)
+            logs_text = '\n'.join(logs_lines[-lines:]) if logs_lines else "No logs available"
             
             return jsonify({
                 'success': True,
@@ -1166,61 +1347,69 @@ def create_api_blueprint():
     @api.route('/health-check', methods=['GET', 'POST'])
     @require_auth
     def run_health_check():
-        """Run the comprehensive health check script and return results"""
+        """Run the comprehensive health check script as a background job
+        
+        Returns 202 with a job_id; the job result (GET /api/jobs/<job_id>) has
+        the script output, pass/fail counts and overall status.
+        """
         try:
-            import os
-            import subprocess
-            import socket
-            
             # Get the project root from environment variable (default to /project for Docker)
             project_root = os.getenv('PROJECT_ROOT', '/project')
             health_check_path = os.path.join(project_root, 'health_check.sh')
-            workdir = project_root
             
             if not os.path.exists(health_check_path):
                 logger.error(f"health_check.sh not found at {health_check_path}")
                 return jsonify({'error': f'health_check.sh not found at {health_check_path}'}), 404
             
-            # Run the health check script
-            # The script will use docker commands which are available on the host
-            try:
-                result = subprocess.run(
-                    ['bash', health_check_path],
-                    cwd=workdir,
-                    capture_output=True,
-                    text=True,
-                    timeout=300  # 5 minute timeout
-                )
-                
-                output = result.stdout + result.stderr
-            except Exception as e:
-                logger.error(f"Failed to run health_check.sh: {e}")
-                output = f"Error running health check: {str(e)}"
-            
-            # Parse the output to extract pass/fail counts
-            tests_passed = output.count('✅ PASS')
-            tests_failed = output.count('❌ FAIL')
-            
-            # Determine overall status
-            overall_status = 'healthy' if tests_failed == 0 else 'degraded' if tests_failed < 5 else 'unhealthy'
-            
-            logger.info(f"Health check: {tests_passed} passed, {tests_failed} failed, status={overall_status}")
-            
-            return jsonify({
-                'success': True,
-                'output': output,
-                'tests_passed': tests_passed,
-                'tests_failed': tests_failed,
-                'overall_status': overall_status,
-                'exit_code': result.returncode if 'result' in locals() else -1
-            }), 200
-        except subprocess.TimeoutExpired:
-            logger.error("✗ Health check timed out")
-            return jsonify({'error': 'Health check timed out (exceeded 5 minutes)'}), 504
+            job = submit_job(
+                'health_check',
+                lambda job: _health_check(health_check_path, project_root),
+                meta={'requested_by': session.get('user')}
+            )
+            return jsonify({'success': True, 'job_id': job.id, 'status': job.status}), 202
         except Exception as e:
             logger.error(f"✗ Failed to run health check: {e}")
             return jsonify({'error': str(e)}), 500
     
+    def _health_check(health_check_path, workdir):
+        """Job body for run_health_check"""
+        # Run the health check script
+        # The script will use docker commands which are available on the host
+        try:
+            result = subprocess.run(
+                ['bash', health_check_path],
+                cwd=workdir,
+                capture_output=True,
+                text=True,
+                timeout=300  # 5 minute timeout
+            )
+            
+            output = result.stdout + result.stderr
+        except subprocess.TimeoutExpired:
+            logger.error("✗ Health check timed out")
+            raise RuntimeError('Health check timed out (exceeded 5 minutes)')
+        except Exception as e:
+            logger.error(f"Failed to run health_check.sh: {e}")
+            output = f"Error running health check: {str(e)}"
+        
+        # Parse the output to extract pass/fail counts
+        tests_passed = output.count('✅ PASS')
+        tests_failed = output.count('❌ FAIL')
+        
+        # Determine overall status
+        overall_status = 'healthy' if tests_failed == 0 else 'degraded' if tests_failed < 5 else 'unhealthy'
+        
+        logger.info(f"Health check: {tests_passed} passed, {tests_failed} failed, status={overall_status}")
+        
+        return {
+            'success': True,
+            'output': output,
+            'tests_passed': tests_passed,
+            'tests_failed': tests_failed,
+            'overall_status': overall_status,
+            'exit_code': result.returncode if 'result' in locals() else -1
+        }
+    
     return api
 
 
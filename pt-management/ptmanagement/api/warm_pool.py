@@ -0,0 +1,273 @@
+"""Warm pool of pre-booted Packet Tracer containers
+
+A fresh ptvnc container needs tens of seconds before its desktop is usable
+(Xvfb/XFCE/x11vnc startup, the Packet Tracer runtime installer). The warm
+pool keeps WARM_POOL_SIZE unassigned containers named ptwarm-<id> booted in
+the background. Creating a container for a user then only renames a booted
+one (e.g. ptwarm-1a2b3c -> ptvnc7), which takes milliseconds; when no warm
+container is ready the caller falls back to a normal create. A warm
+container is ready once the readiness probe has seen its VNC server and
+Packet Tracer install (docker_mgmt.readiness); the replenisher waits for
+each new one in the background.
+
+Claiming renames by the warm container's current name, so two workers can
+never claim the same one - the loser gets 404 and tries the next. One
+gunicorn worker at a time (elected with a file lock) replenishes the pool;
+it wakes up on a claim, on Docker events for ptwarm- containers and every
+WARM_POOL_CHECK_INTERVAL seconds.
+
+Settings (environment variables):
+    WARM_POOL_SIZE            Booted spare containers to keep (default 0 - disabled)
+    WARM_POOL_CHECK_INTERVAL  Seconds between replenishment checks (default 15)
+    WARM_POOL_LOCK_FILE       Lock file electing the replenishing worker
+"""
+
+import os
+import logging
+import threading
+import time
+import uuid
+
+from ptmanagement.api.leader import LeaderLock
+from ptmanagement.api.provisioning import (
+    DESKTOP_SETUP_STEPS, container_options, resolve_pt_deb, resolve_shared_path
+)
+from ptmanagement.docker_mgmt.container import DockerManager
+from ptmanagement.docker_mgmt.events import get_event_watcher
+from ptmanagement.docker_mgmt.readiness import get_readiness_tracker
+
+logger = logging.getLogger(__name__)
+
+POOL_SIZE = int(os.environ.get('WARM_POOL_SIZE', '0'))
+CHECK_INTERVAL = float(os.environ.get('WARM_POOL_CHECK_INTERVAL', '15'))
+LOCK_FILE = os.environ.get('WARM_POOL_LOCK_FILE', '/tmp/ptweb-warm-pool.lock')
+
+WARM_PREFIX = 'ptwarm-'
+
+# States in which a warm container is (or is becoming) usable
+LIVE_STATES = ('running', 'created', 'restarting')
+
+
+class WarmPool:
+    """Keeps booted spare ptvnc containers and hands them out by renaming"""
+    
+    def __init__(self, docker_mgr, size=POOL_SIZE, interval=CHECK_INTERVAL):
+        self.docker_mgr = docker_mgr
+        self.readiness = get_readiness_tracker(docker_mgr)
+        self.size = size
+        self.interval = interval
+        self.claims = 0
+        self.misses = 0
+        self.created = 0
+        self.removed = 0
+        self.last_replenish_at = None
+        self._counter_lock = threading.Lock()
+        self._watching = set()  # warm containers with a readiness wait running
+        self._wake = threading.Event()
+        self._thread = None
+        self._leader = LeaderLock(LOCK_FILE, 'warm pool replenishment')
+        
+        if docker_mgr.client:
+            get_event_watcher(docker_mgr.client).add_listener(self._on_event)
+    
+    @property
+    def enabled(self):
+        return self.size > 0 and self.docker_mgr.client is not None
+    
+    def start(self):
+        """Start the replenisher thread (no-op if disabled or already running)"""
+        if not self.enabled or (self._thread and self._thread.is_alive()):
+            return
+        self._thread = threading.Thread(target=self._run, name='warm-pool', daemon=True)
+        self._thread.start()
+    
+    def _count(self, counter):
+        with self._counter_lock:
+            setattr(self, counter, getattr(self, counter) + 1)
+    
+    def _on_event(self, event):
+        """Wake the replenisher when a warm container is renamed, dies or is removed"""
+        attributes = (event.get('Actor') or {}).get('Attributes') or {}
+        names = (attributes.get('name', ''), attributes.get('oldName', '').lstrip('/'))
+        if any(name.startswith(WARM_PREFIX) for name in names):
+            self._wake.set()
+    
+    def members(self):
+        """
+        Current warm containers, oldest first.
+        
+        Returns:
+            List of dicts with name, id, state and age (seconds since creation)
+        """
+        containers = self.docker_mgr.client.list_containers(all=True, filters={'name': [WARM_PREFIX]})
+        now = time.time()
+        members = []
+        for container in containers:
+            name = DockerManager._container_name(container)
+            # The name filter matches substrings - keep real pool members only
+            if not name.startswith(WARM_PREFIX):
+                continue
+            members.append({
+                'name': name,
+                'id': container.get('Id'),
+                'state': container.get('State'),
+                'age': now - container.get('Created', now)
+            })
+        members.sort(key=lambda m: m['age'], reverse=True)
+        return members
+    
+    def _is_ready(self, member, probe=True):
+        """Whether a warm container's desktop is usable (probe=False: only if already known)"""
+        if member['state'] != 'running':
+            return False
+        if not probe:
+            return self.readiness.is_ready(member['id'])
+        return self.readiness.check(member['name'], member['id'])['ready']
+    
+    def claim(self, container_name):
+        """
+        Take a booted warm container and rename it to container_name.
+        
+        Returns:
+            (container_id, error) - (id, None) when claimed, (None, None) when no
+            warm container is ready, (None, 'conflict') when container_name is taken
+        """
+        if not self.enabled:
+            return None, None
+        
+        try:
+            members = self.members()
+        except Exception as e:
+            logger.warning(f"⚠ Could not list warm containers: {e}")
+            return None, None
+        
+        for member in members:
+            if not self._is_ready(member):
+                continue
+            container_id, error = self.docker_mgr.rename_container(member['name'], container_name)
+            if error == 'conflict':
+                return None, 'conflict'
+            if error:
+                # 'not_found' means another worker claimed it first
+                if error != 'not_found':
+                    logger.warning(f"⚠ Could not claim {member['name']}: {error}")
+                continue
+            
+            self._count('claims')
+            self._wake.set()
+            logger.info(f"✓ Claimed warm container {member['name']} as {container_name}")
+            return container_id or member['id'], None
+        
+        self._count('misses')
+        self._wake.set()
+        return None, None
+    
+    def _run(self):
+        """Replenish on wake-up or interval while this worker holds the lock"""
+        while True:
+            try:
+                if self._leader.acquire():
+                    self.replenish()
+            except Exception as e:
+                logger.error(f"✗ Warm pool replenishment failed: {e}")
+            self._wake.wait(self.interval)
+            self._wake.clear()
+    
+    def replenish(self):
+        """Remove dead or surplus warm containers and boot new ones up to the pool size"""
+        live = []
+        for member in self.members():
+            if member['state'] in LIVE_STATES:
+                live.append(member)
+            else:
+                self._remove(member, 'not running')
+        
+        # Shrink by dropping the youngest (least booted) containers first
+        surplus = max(0, len(live) - self.size)
+        for member in live[len(live) - surplus:]:
+            self._remove(member, 'surplus')
+        
+        # Catch up on containers whose background wait ended with a previous replenisher
+        for member in live:
+            if member['state'] == 'running' and not self._is_ready(member, probe=False):
+                self._watch(member['name'], member['id'])
+        
+        for _ in range(self.size - len(live)):
+            self._create_one()
+        self.last_replenish_at = time.time()
+    
+    def _remove(self, member, reason):
+        if self.docker_mgr.delete_container(member['name'], force=True):
+            self._count('removed')
+            logger.info(f"ℹ Removed warm container {member['name']} ({reason})")
+    
+    def _watch(self, container_name, container_id=None):
+        """Wait for a warm container to become ready on a background thread"""
+        with self._counter_lock:
+            if container_name in self._watching:
+                return
+            self._watching.add(container_name)
+        
+        def wait():
+            try:
+                self.readiness.wait_ready(container_name, container_id=container_id)
+            finally:
+                with self._counter_lock:
+                    self._watching.discard(container_name)
+        
+        threading.Thread(target=wait, name='warm-pool-boot', daemon=True).start()
+    
+    def _create_one(self):
+        """Create, start and set up one warm container"""
+        container_name = f'{WARM_PREFIX}{uuid.uuid4().hex[:12]}'
+        container_id, error = self.docker_mgr.run_pt_container(
+            container_name, resolve_pt_deb(), resolve_shared_path(), **container_options()
+        )
+        if error:
+            logger.warning(f"⚠ Failed to create warm container: {error}")
+            return False
+        
+        exit_code, stdout, stderr = self.docker_mgr.exec_batch(container_name, DESKTOP_SETUP_STEPS)
+        if exit_code != 0:
+            logger.warning(f"⚠ Failed to create Desktop symlink in {container_name}: {stderr.strip()}")
+        self._watch(container_name, container_id)
+        self._count('created')
+        return True
+    
+    def status(self):
+        """Pool size and counters (counters are per worker process)"""
+        data = {
+            'enabled': self.enabled,
+            'target': self.size,
+            'ready': 0,
+            'booting': 0,
+            'replenisher': self._leader.held,
+            'claims': self.claims,
+            'misses': self.misses,
+            'created': self.created,
+            'removed': self.removed,
+            'last_replenish_at': self.last_replenish_at
+        }
+        if self.enabled:
+            for member in self.members():
+                if self._is_ready(member, probe=False):
+                    data['ready'] += 1
+                elif member['state'] in LIVE_STATES:
+                    data['booting'] += 1
+        return data
+
+
+_pool = None
+_pool_pid = None
+_pool_lock = threading.Lock()
+
+
+def get_warm_pool(docker_mgr):
+    """Get the warm pool for the current worker process, creating it on first use"""
+    global _pool, _pool_pid
+    pid = os.getpid()
+    with _pool_lock:
+        if _pool is None or _pool_pid != pid:
+            _pool = WarmPool(docker_mgr)
+            _pool_pid = pid
+        return _pool
@@ -1,28 +1,327 @@
-"""Database connection module"""
+"""Database connection module
+
+Connections are drawn from a process-wide pool instead of opening a new
+TCP + auth handshake against guacamole-mariadb for every query. Gunicorn
+forks its workers, so each worker process lazily builds its own pool
+(sized by DB_POOL_SIZE) on first use.
+
+The default size gives every gunicorn request thread (GUNICORN_THREADS) a
+connection, plus the background threads that query the database: job
+workers (JOB_WORKERS), the provisioning register stage (PROVISION_DB_WORKERS)
+and the dashboard hub, idle reaper, autoscaler/warm pool and job-store flush.
+When the pool stays exhausted for DB_POOL_TIMEOUT, queries raise
+PoolExhaustedError (answered with 503) rather than returning empty results.
+
+Pool settings (environment variables):
+    DB_POOL_SIZE          Max connections per worker process
+                          (default GUNICORN_THREADS + JOB_WORKERS + PROVISION_DB_WORKERS + 4)
+    DB_POOL_TIMEOUT       Seconds to wait for a free connection (default 10)
+    DB_POOL_MAX_LIFETIME  Seconds before a connection is recycled (default 1800)
+    DB_POOL_PING_AFTER    Ping borrowed connections idle longer than this (default 5)
+"""
 
 import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
 import mysql.connector
 from mysql.connector import Error
 import logging
 
+from ptmanagement.metrics import DB_QUERY_ERRORS, DB_QUERY_SECONDS, call_site
+
 logger = logging.getLogger(__name__)
 
+# Dashboard hub, idle reaper, autoscaler/warm pool leader and job-store flush
+BACKGROUND_DB_THREADS = 4
+
+
+class PoolExhaustedError(TimeoutError):
+    """No pooled database connection became free within the pool timeout"""
+
+
+def default_pool_size():
+    """One connection per request thread plus the background threads that query the database"""
+    return (
+        int(os.environ.get('GUNICORN_THREADS', '16'))
+        + int(os.environ.get('JOB_WORKERS', '4'))
+        + int(os.environ.get('PROVISION_DB_WORKERS', '4'))
+        + BACKGROUND_DB_THREADS
+    )
+
+
+def _connect():
+    """Open a raw connection using DB_HOST, DB_USER, DB_PASS, DB_NAME"""
+    return mysql.connector.connect(
+        host=os.environ.get('DB_HOST', 'guacamole-mariadb'),
+        user=os.environ.get('DB_USER', 'ptdbuser'),
+        password=os.environ.get('DB_PASS', 'ptdbpass'),
+        database=os.environ.get('DB_NAME', 'guacamole_db'),
+        raise_on_warnings=False,
+        autocommit=True,
+        # Drain unread result sets so a reused connection never trips over them
+        consume_results=True
+    )
+
+
+class PooledConnection:
+    """
+    Thin proxy around a pooled mysql.connector connection.
+
+    Behaves like the underlying connection, except close() hands the
+    connection back to the pool instead of tearing down the socket.
+    """
+
+    def __init__(self, pool, raw, created_at):
+        self._pool = pool
+        self._raw = raw
+        self._created_at = created_at
+        self._released = False
+
+    def __getattr__(self, name):
+        return getattr(self._raw, name)
+
+    def close(self):
+        """Return the connection to the pool (safe to call more than once)"""
+        if self._released:
+            return
+        self._released = True
+        self._pool.release(self._raw, self._created_at)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def __del__(self):
+        # Safety net for callers that bail out on an exception without close()
+        if not getattr(self, '_released', True):
+            logger.warning("⚠ Pooled database connection was not closed; returning it to the pool")
+            self.close()
+
+
+class ConnectionPool:
+    """Bounded pool of MariaDB connections with health checks and recycling"""
+
+    def __init__(self, size=5, timeout=10.0, max_lifetime=1800.0, ping_after=5.0, connect=_connect):
+        self.size = size
+        self.timeout = timeout
+        self.max_lifetime = max_lifetime
+        self.ping_after = ping_after
+        self._connect = connect
+        self._idle = deque()  # (raw, created_at, returned_at)
+        self._open = 0
+        self._cond = threading.Condition()
+        self._stats = {
+            'borrowed': 0,
+            'created': 0,
+            'recycled': 0,
+            'health_check_failures': 0,
+            'waits': 0,
+            'wait_seconds': 0.0,
+            'exhausted': 0,
+            'connect_errors': 0,
+        }
+
+    def acquire(self):
+        """
+        Borrow a connection from the pool.
+
+        Returns:
+            PooledConnection
+
+        Raises:
+            mysql.connector.Error if a new connection cannot be opened
+            PoolExhaustedError if the pool stays exhausted for longer than timeout
+        """
+        deadline = time.monotonic() + self.timeout
+        waited = False
+        wait_started = None
+
+        with self._cond:
+            while True:
+                if self._idle:
+                    raw, created_at, returned_at = self._idle.pop()
+                    break
+                if self._open < self.size:
+                    self._open += 1
+                    raw = None
+                    break
+
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self._stats['exhausted'] += 1
+                    logger.warning(f"⚠ Database pool exhausted ({self.size} connections in use)")
+                    raise PoolExhaustedError(
+                        f"Database busy: all {self.size} pooled connections in use for {self.timeout}s"
+                    )
+                if not waited:
+                    waited = True
+                    wait_started = time.monotonic()
+                    self._stats['waits'] += 1
+                self._cond.wait(remaining)
+
+            if waited:
+                self._stats['wait_seconds'] += time.monotonic() - wait_started
+            self._stats['borrowed'] += 1
+
+        if raw is not None and not self._is_usable(raw, created_at, returned_at):
+            self._discard(raw, reopen=True)
+            raw = None
+
+        if raw is None:
+            try:
+                raw = self._connect()
+            except Exception:
+                with self._cond:
+                    self._open -= 1
+                    self._stats['connect_errors'] += 1
+                    self._cond.notify()
+                raise
+            created_at = time.monotonic()
+            with self._cond:
+                self._stats['created'] += 1
+
+        return PooledConnection(self, raw, created_at)
+
+    def release(self, raw, created_at):
+        """Return a raw connection to the pool, discarding it if it is no longer reusable"""
+        try:
+            if raw.in_transaction:
+                raw.rollback()
+        except Exception:
+            self._discard(raw)
+            return
+
+        if time.monotonic() - created_at > self.max_lifetime:
+            with self._cond:
+                self._stats['recycled'] += 1
+            self._discard(raw)
+            return
+
+        with self._cond:
+            self._idle.append((raw, created_at, time.monotonic()))
+            self._cond.notify()
+
+    def _is_usable(self, raw, created_at, returned_at):
+        """Health-check a connection on borrow"""
+        now = time.monotonic()
+        if now - created_at > self.max_lifetime:
+            with self._cond:
+                self._stats['recycled'] += 1
+            return False
+        if now - returned_at < self.ping_after:
+            return True
+        try:
+            raw.ping(reconnect=False)
+            return True
+        except Exception:
+            with self._cond:
+                self._stats['health_check_failures'] += 1
+            return False
+
+    def _discard(self, raw, reopen=False):
+        """Close a raw connection; keep its slot reserved if the caller will reopen it"""
+        try:
+            raw.close()
+        except Exception:
+            pass
+        if not reopen:
+            with self._cond:
+                self._open -= 1
+                self._cond.notify()
+
+    def stats(self):
+        """Snapshot of pool usage counters"""
+        with self._cond:
+            stats = dict(self._stats)
+            stats['size'] = self.size
+            stats['open'] = self._open
+            stats['idle'] = len(self._idle)
+            stats['in_use'] = self._open - len(self._idle)
+            stats['wait_seconds'] = round(stats['wait_seconds'], 3)
+            return stats
+
+
+_pool = None
+_pool_pid = None
+_pool_lock = threading.Lock()
+
+
+def get_pool():
+    """Get (or lazily create) the connection pool for the current process"""
+    global _pool, _pool_pid
+    pid = os.getpid()
+    if _pool is None or _pool_pid != pid:
+        with _pool_lock:
+            if _pool is None or _pool_pid != pid:
+                # Never share sockets inherited across a gunicorn fork
+                _pool = ConnectionPool(
+                    size=int(os.environ.get('DB_POOL_SIZE') or default_pool_size()),
+                    timeout=float(os.environ.get('DB_POOL_TIMEOUT', '10')),
+                    max_lifetime=float(os.environ.get('DB_POOL_MAX_LIFETIME', '1800')),
+                    ping_after=float(os.environ.get('DB_POOL_PING_AFTER', '5')),
+                )
+                _pool_pid = pid
+    return _pool
+
+
+def get_pool_stats():
+    """Get usage counters of this process's connection pool"""
+    return get_pool().stats()
+
+
+@contextmanager
+def transaction():
+    """
+    Run several statements on one pooled connection inside a single transaction.
+    
+    Yields a dictionary cursor. The transaction is committed when the block
+    exits normally and rolled back if it raises; errors are re-raised. The
+    whole block is timed as one query of the function that opened it.
+    """
+    site = call_site(depth=2)  # past contextlib's __enter__
+    started = time.perf_counter()
+    try:
+        connection = get_pool().acquire()
+        cursor = None
+        try:
+            connection.start_transaction()
+            cursor = connection.cursor(dictionary=True)
+            yield cursor
+            connection.commit()
+        except Exception:
+            try:
+                connection.rollback()
+            except Error as e:
+                logger.error(f"Rollback failed: {e}")
+            raise
+        finally:
+            if cursor is not None:
+                cursor.close()
+            connection.close()
+    except Exception:
+        DB_QUERY_ERRORS.labels(site).inc()
+        raise
+    finally:
+        DB_QUERY_SECONDS.labels(site).observe(time.perf_counter() - started)
+
 
 def get_db_connection():
     """
-    Get a connection to the MariaDB/MySQL database.
+    Get a pooled connection to the MariaDB/MySQL database.
+    Call close() on the returned connection to hand it back to the pool.
     Uses environment variables: DB_HOST, DB_USER, DB_PASS, DB_NAME
+    
+    Returns None if the database cannot be reached.
+    
+    Raises:
+        PoolExhaustedError if every pooled connection stays in use
     """
     try:
-        connection = mysql.connector.connect(
-            host=os.environ.get('DB_HOST', 'guacamole-mariadb'),
-            user=os.environ.get('DB_USER', 'ptdbuser'),
-            password=os.environ.get('DB_PASS', 'ptdbpass'),
-            database=os.environ.get('DB_NAME', 'guacamole_db'),
-            raise_on_warnings=False,
-            autocommit=True
-        )
-        return connection
+        return get_pool().acquire()
     except Error as e:
         logger.error(f"Database connection failed: {e}")
         return None
@@ -42,10 +341,28 @@ def execute_query(query, params=None, fetch_one=False, fetch_all=False):
         If fetch_one: dict or None
         If fetch_all: list of dicts
         Otherwise: None (for INSERT/UPDATE/DELETE)
+    
+    Raises:
+        PoolExhaustedError if no pooled connection became free in time
     """
-    connection = get_db_connection()
+    site = call_site()
+    started = time.perf_counter()
+    try:
+        return _execute(query, params, fetch_one, fetch_all, site)
+    finally:
+        DB_QUERY_SECONDS.labels(site).observe(time.perf_counter() - started)
+
+
+def _execute(query, params, fetch_one, fetch_all, site):
+    """Body of execute_query; site is the caller recorded in the metrics"""
+    try:
+        connection = get_db_connection()
+    except PoolExhaustedError:
+        DB_QUERY_ERRORS.labels(site).inc()
+        raise
     if not connection:
         logger.error("Could not establish database connection")
+        DB_QUERY_ERRORS.labels(site).inc()
         return None if fetch_all else None
     
     try:
@@ -65,6 +382,7 @@ def execute_query(query, params=None, fetch_one=False, fetch_all=False):
         cursor.close()
         return result
     except Error as e:
+        DB_QUERY_ERRORS.labels(site).inc()
         logger.error(f"Query execution failed: {e}")
         logger.error(f"Failed query: {query}")
         if params:
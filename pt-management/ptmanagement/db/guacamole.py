@@ -39,12 +39,15 @@ Reference: https://stackoverflow.com/questions/71331479/generating-hashed-passwo
 """
 
 import logging
-import hashlib
-import os
-from ptmanagement.db.connection import execute_query
+from mysql.connector import Error
+from ptmanagement.db.connection import execute_query, transaction
+from ptmanagement.db.password_hash import hash_password, hash_passwords
 
 logger = logging.getLogger(__name__)
 
+# Rows per multi-row INSERT / IN (...) list in bulk operations
+BULK_CHUNK_SIZE = 500
+
 
 def _hash_password(password):
     """
@@ -67,17 +70,8 @@ def _hash_password(password):
     
     Reference: https://stackoverflow.com/questions/71331479
     """
-    # Generate a random 32-byte salt (matches Guacamole's expected size)
-    password_salt_bytes = os.urandom(32)
-    
-    # Convert salt to uppercase HEX string
-    password_salt_hex = password_salt_bytes.hex().upper()
-    
-    # Concatenate password + hex_salt_string, then hash
-    combined = password + password_salt_hex
-    password_hash = hashlib.sha256(combined.encode('utf-8')).digest()
-    
-    return password_hash, password_salt_bytes
+    # Random 32-byte salt (matches Guacamole's expected size), appended as uppercase hex
+    return hash_password(password)
 
 
 def create_user(username, password):
@@ -146,6 +140,302 @@ def create_user(username, password):
         return (None, False)
 
 
+def _chunks(items, size=BULK_CHUNK_SIZE):
+    """Yield successive slices of at most size items"""
+    for i in range(0, len(items), size):
+        yield items[i:i + size]
+
+
+def _placeholders(count, row='%s'):
+    """Build a comma-separated placeholder list, e.g. '(%s, %s), (%s, %s)'"""
+    return ', '.join([row] * count)
+
+
+def get_existing_usernames(usernames):
+    """
+    Find which of the given usernames already exist, using set-based lookups.
+    
+    Args:
+        usernames: Iterable of usernames
+    
+    Returns:
+        Set of usernames that already exist in guacamole_entity
+    """
+    existing = set()
+    names = list(dict.fromkeys(usernames))
+    for chunk in _chunks(names):
+        rows = execute_query(
+            f"SELECT name FROM guacamole_entity WHERE type = 'USER' AND name IN ({_placeholders(len(chunk))})",
+            tuple(chunk),
+            fetch_all=True
+        )
+        existing.update(r['name'] for r in (rows or []))
+    return existing
+
+
+def _ensure_vnc_connections(cursor, connections, vnc_port=5901, password="Cisco123"):
+    """
+    Get or create VNC connections with multi-row INSERTs on an open transaction.
+    
+    New connections get the same proxy settings, parameters and ptadmin READ
+    grant as create_vnc_connection().
+    
+    Args:
+        cursor: Dictionary cursor of an open transaction
+        connections: Dict of connection name (e.g. "pt03") -> container hostname
+    
+    Returns:
+        Dict of connection name -> connection_id
+    """
+    names = list(connections)
+    connection_ids = {}
+    for chunk in _chunks(names):
+        cursor.execute(
+            f"SELECT connection_id, connection_name FROM guacamole_connection WHERE connection_name IN ({_placeholders(len(chunk))})",
+            tuple(chunk)
+        )
+        connection_ids.update({r['connection_name']: r['connection_id'] for r in cursor.fetchall()})
+    
+    missing = [name for name in names if name not in connection_ids]
+    if not missing:
+        return connection_ids
+    
+    for chunk in _chunks(missing):
+        values = _placeholders(len(chunk), "(%s, 'vnc', 4822, 'pt-guacd', 'NONE', 1, 1, 0)")
+        cursor.execute(
+            "INSERT INTO guacamole_connection "
+            "(connection_name, protocol, proxy_port, proxy_hostname, proxy_encryption_method, "
+            "max_connections, max_connections_per_user, failover_only) "
+            f"VALUES {values}",
+            tuple(chunk)
+        )
+    
+    new_ids = {}
+    for chunk in _chunks(missing):
+        cursor.execute(
+            f"SELECT connection_id, connection_name FROM guacamole_connection WHERE connection_name IN ({_placeholders(len(chunk))})",
+            tuple(chunk)
+        )
+        new_ids.update({r['connection_name']: r['connection_id'] for r in cursor.fetchall()})
+    
+    parameters = [
+        (connection_id, param_name, param_value)
+        for name, connection_id in new_ids.items()
+        for param_name, param_value in (('hostname', connections[name]), ('port', str(vnc_port)), ('password', password))
+    ]
+    for chunk in _chunks(parameters):
+        cursor.execute(
+            "INSERT INTO guacamole_connection_parameter (connection_id, parameter_name, parameter_value) "
+            f"VALUES {_placeholders(len(chunk), '(%s, %s, %s)')}",
+            tuple(v for row in chunk for v in row)
+        )
+    
+    cursor.execute("SELECT entity_id FROM guacamole_entity WHERE name = 'ptadmin' AND type = 'USER'")
+    ptadmin = cursor.fetchone()
+    if ptadmin:
+        for chunk in _chunks(list(new_ids.values())):
+            values = _placeholders(len(chunk), "(%s, %s, 'READ')")
+            cursor.execute(
+                "INSERT INTO guacamole_connection_permission (entity_id, connection_id, permission) "
+                f"VALUES {values} "
+                "ON DUPLICATE KEY UPDATE permission = VALUES(permission)",
+                tuple(v for connection_id in chunk for v in (ptadmin['entity_id'], connection_id))
+            )
+    
+    connection_ids.update(new_ids)
+    return connection_ids
+
+
+def _insert_user_rows(cursor, rows):
+    """
+    Insert a batch of prepared user rows with multi-row INSERTs on an open transaction.
+    
+    Each row is a dict with username, password_hash, password_salt, is_admin,
+    connection_ids, vnc_connections and containers. Sets row['user_id'] on success.
+    """
+    names = [r['username'] for r in rows]
+    
+    for chunk in _chunks(names):
+        values = _placeholders(len(chunk), "(%s, 'USER')")
+        cursor.execute(f"INSERT INTO guacamole_entity (name, type) VALUES {values}", tuple(chunk))
+    
+    entity_ids = {}
+    for chunk in _chunks(names):
+        cursor.execute(
+            f"SELECT entity_id, name FROM guacamole_entity WHERE type = 'USER' AND name IN ({_placeholders(len(chunk))})",
+            tuple(chunk)
+        )
+        entity_ids.update({r['name']: r['entity_id'] for r in cursor.fetchall()})
+    
+    for chunk in _chunks(rows):
+        params = []
+        for r in chunk:
+            params.extend((entity_ids[r['username']], r['password_hash'], r['password_salt']))
+        cursor.execute(
+            "INSERT INTO guacamole_user (entity_id, password_hash, password_salt, password_date, disabled, expired) "
+            f"VALUES {_placeholders(len(chunk), '(%s, %s, %s, NOW(), 0, 0)')}",
+            tuple(params)
+        )
+    
+    user_ids = {}
+    entity_list = list(entity_ids.values())
+    for chunk in _chunks(entity_list):
+        cursor.execute(
+            f"SELECT user_id, entity_id FROM guacamole_user WHERE entity_id IN ({_placeholders(len(chunk))})",
+            tuple(chunk)
+        )
+        user_ids.update({r['entity_id']: r['user_id'] for r in cursor.fetchall()})
+    
+    admin_entities = [entity_ids[r['username']] for r in rows if r.get('is_admin')]
+    for chunk in _chunks(admin_entities):
+        values = _placeholders(len(chunk), "(%s, 'ADMINISTER')")
+        cursor.execute(
+            f"INSERT INTO guacamole_system_permission (entity_id, permission) VALUES {values} "
+            "ON DUPLICATE KEY UPDATE permission = VALUES(permission)",
+            tuple(chunk)
+        )
+    
+    vnc_connections = {}
+    for r in rows:
+        vnc_connections.update(r.get('vnc_connections', {}))
+    vnc_ids = _ensure_vnc_connections(cursor, vnc_connections) if vnc_connections else {}
+    
+    connection_perms = [
+        (entity_ids[r['username']], connection_id)
+        for r in rows
+        for connection_id in r.get('connection_ids', []) + [vnc_ids[name] for name in r.get('vnc_connections', {})]
+    ]
+    for chunk in _chunks(connection_perms):
+        values = _placeholders(len(chunk), "(%s, %s, 'READ')")
+        cursor.execute(
+            "INSERT INTO guacamole_connection_permission (entity_id, connection_id, permission) "
+            f"VALUES {values} "
+            "ON DUPLICATE KEY UPDATE permission = VALUES(permission)",
+            tuple(v for pair in chunk for v in pair)
+        )
+    
+    container_rows = [
+        (user_ids[entity_ids[r['username']]], container_name)
+        for r in rows for container_name in r.get('containers', [])
+    ]
+    for chunk in _chunks(container_rows):
+        values = _placeholders(len(chunk), "(%s, %s, 'active')")
+        cursor.execute(
+            "INSERT INTO user_container_mapping (user_id, container_name, status) "
+            f"VALUES {values} "
+            "ON DUPLICATE KEY UPDATE status = 'active', deleted_at = NULL",
+            tuple(v for pair in chunk for v in pair)
+        )
+    
+    for r in rows:
+        r['user_id'] = user_ids[entity_ids[r['username']]]
+
+
+def bulk_create_users(users, all_or_nothing=False):
+    """
+    Create many Guacamole users in one transaction using multi-row INSERTs.
+    
+    Entities, users, ADMINISTER system permissions, VNC connections, connection
+    permissions and container assignments are all written inside the same
+    transaction, so rows that fail or a rejected batch leave nothing behind.
+    
+    Args:
+        users: List of dicts with keys:
+            username, password (required)
+            is_admin (bool, optional)
+            connection_ids (list, optional): connections to grant READ on
+            vnc_connections (dict, optional): connection name -> container
+                hostname; created if missing, then granted READ on
+            containers (list, optional): container names to assign
+        all_or_nothing: If True, any invalid or failing row aborts the whole batch.
+            Otherwise failing rows are reported and the rest are committed.
+    
+    Returns:
+        Dict with keys:
+            created: list of {'username', 'user_id'}
+            failed: list of {'username', 'error'}
+            aborted: True if nothing was written because of all_or_nothing
+    """
+    created = []
+    failed = []
+    rows = []
+    seen = set()
+    
+    for user in users:
+        username = (user.get('username') or '').strip()
+        password = user.get('password') or ''
+        if not username or not password:
+            failed.append({'username': username, 'error': 'Missing username or password'})
+            continue
+        if username in seen:
+            failed.append({'username': username, 'error': 'Duplicate username in request'})
+            continue
+        seen.add(username)
+        rows.append({
+            'username': username,
+            'password': password,
+            'is_admin': bool(user.get('is_admin', False)),
+            'connection_ids': list(user.get('connection_ids') or []),
+            'vnc_connections': dict(user.get('vnc_connections') or {}),
+            'containers': list(user.get('containers') or [])
+        })
+    
+    try:
+        existing = get_existing_usernames(r['username'] for r in rows)
+    except Exception as e:
+        logger.error(f"✗ Failed to check existing users: {e}")
+        return {'created': [], 'failed': failed + [{'username': r['username'], 'error': 'Database error'} for r in rows], 'aborted': True}
+    
+    if existing:
+        failed.extend({'username': r['username'], 'error': 'User already exists'} for r in rows if r['username'] in existing)
+        rows = [r for r in rows if r['username'] not in existing]
+    
+    if all_or_nothing and failed:
+        logger.warning(f"⚠ Bulk create aborted: {len(failed)} invalid row(s)")
+        failed.extend({'username': r['username'], 'error': 'Aborted: batch contains invalid rows'} for r in rows)
+        return {'created': [], 'failed': failed, 'aborted': True}
+    
+    if not rows:
+        return {'created': [], 'failed': failed, 'aborted': False}
+    
+    # Hash the whole batch at once (one salt draw for every user)
+    hashes = hash_passwords([r.pop('password') for r in rows])
+    for r, (password_hash, password_salt) in zip(rows, hashes):
+        r['password_hash'], r['password_salt'] = password_hash, password_salt
+    
+    try:
+        with transaction() as cursor:
+            _insert_user_rows(cursor, rows)
+        created = [{'username': r['username'], 'user_id': r['user_id']} for r in rows]
+    except Exception as e:
+        if all_or_nothing:
+            logger.error(f"✗ Bulk create rolled back: {e}")
+            failed.extend({'username': r['username'], 'error': f'Aborted: {e}'} for r in rows)
+            return {'created': [], 'failed': failed, 'aborted': True}
+        
+        # Batch insert failed (e.g. a concurrent insert of the same name) - retry
+        # row by row with savepoints so one bad row doesn't sink the others
+        logger.warning(f"⚠ Bulk insert failed ({e}), retrying row by row")
+        try:
+            with transaction() as cursor:
+                for r in rows:
+                    cursor.execute("SAVEPOINT bulk_row")
+                    try:
+                        _insert_user_rows(cursor, [r])
+                        cursor.execute("RELEASE SAVEPOINT bulk_row")
+                        created.append({'username': r['username'], 'user_id': r['user_id']})
+                    except (Error, KeyError) as row_err:
+                        cursor.execute("ROLLBACK TO SAVEPOINT bulk_row")
+                        failed.append({'username': r['username'], 'error': str(row_err)})
+        except Exception as retry_err:
+            logger.error(f"✗ Bulk create failed: {retry_err}")
+            failed.extend({'username': c['username'], 'error': 'Database error'} for c in created)
+            created = []
+    
+    logger.info(f"✓ Bulk created {len(created)} Guacamole user(s), {len(failed)} failed")
+    return {'created': created, 'failed': failed, 'aborted': False}
+
+
 def reset_user_password(username, new_password):
     """
     Reset a user's password in Guacamole.
@@ -181,6 +471,62 @@ def reset_user_password(username, new_password):
         return (False, f"Failed to reset password: {str(e)}")
 
 
+def bulk_reset_passwords(resets):
+    """
+    Reset many users' passwords in one transaction.
+    
+    Passwords are hashed as a batch and applied with chunked UPDATE ... JOIN
+    statements rather than one lookup and UPDATE per user.
+    
+    Args:
+        resets: List of dicts with keys username, password
+    
+    Returns:
+        Dict with keys:
+            updated: list of usernames
+            failed: list of {'username', 'error'}
+    """
+    failed = []
+    latest = {}
+    for item in resets:
+        username = (item.get('username') or '').strip()
+        password = item.get('password') or ''
+        if not username or not password:
+            failed.append({'username': username, 'error': 'Missing username or password'})
+            continue
+        latest[username] = password
+    
+    existing = get_existing_usernames(latest)
+    failed.extend({'username': u, 'error': f'User {u} not found'} for u in latest if u not in existing)
+    names = [u for u in latest if u in existing]
+    if not names:
+        return {'updated': [], 'failed': failed}
+    
+    hashes = hash_passwords([latest[u] for u in names])
+    rows = [(u, h, salt) for u, (h, salt) in zip(names, hashes)]
+    
+    try:
+        with transaction() as cursor:
+            for chunk in _chunks(rows):
+                derived = ' UNION ALL '.join(['SELECT %s AS name, %s AS password_hash, %s AS password_salt'] * len(chunk))
+                cursor.execute(
+                    f"""
+                    UPDATE guacamole_user u
+                    JOIN guacamole_entity e ON u.entity_id = e.entity_id AND e.type = 'USER'
+                    JOIN ({derived}) v ON v.name = e.name
+                    SET u.password_hash = v.password_hash, u.password_salt = v.password_salt, u.password_date = NOW()
+                    """,
+                    tuple(v for row in chunk for v in row)
+                )
+    except Exception as e:
+        logger.error(f"✗ Bulk password reset failed: {e}")
+        failed.extend({'username': u, 'error': 'Database error'} for u in names)
+        return {'updated': [], 'failed': failed}
+    
+    logger.info(f"✓ Reset passwords for {len(names)} user(s)")
+    return {'updated': names, 'failed': failed}
+
+
 def delete_user(username):
     """
     Delete a Guacamole user from the database.
@@ -237,6 +583,101 @@ def delete_user(username):
         return False
 
 
+def get_user_ids(usernames):
+    """
+    Look up the entity and user IDs of many users with set-based queries.
+    
+    Args:
+        usernames: Iterable of usernames
+    
+    Returns:
+        Dict of username -> {'entity_id', 'user_id'} for the users that exist
+        (user_id is None for an entity without a user record)
+    """
+    users = {}
+    names = list(dict.fromkeys(usernames))
+    for chunk in _chunks(names):
+        rows = execute_query(
+            f"""
+            SELECT e.name, e.entity_id, u.user_id
+            FROM guacamole_entity e
+            LEFT JOIN guacamole_user u ON u.entity_id = e.entity_id
+            WHERE e.type = 'USER' AND e.name IN ({_placeholders(len(chunk))})
+            """,
+            tuple(chunk),
+            fetch_all=True
+        )
+        if rows is None:
+            raise Error("User lookup failed")
+        users.update((r['name'], {'entity_id': r['entity_id'], 'user_id': r['user_id']}) for r in rows)
+    return users
+
+
+def get_containers_by_users(usernames):
+    """
+    Get the active containers of many users with set-based queries.
+    
+    Returns:
+        Dict of username -> list of container names (users without any are left out)
+    """
+    containers = {}
+    names = list(dict.fromkeys(usernames))
+    for chunk in _chunks(names):
+        rows = execute_query(
+            f"""
+            SELECT e.name AS username, ucm.container_name
+            FROM user_container_mapping ucm
+            JOIN guacamole_user u ON ucm.user_id = u.user_id
+            JOIN guacamole_entity e ON u.entity_id = e.entity_id
+            WHERE e.name IN ({_placeholders(len(chunk))}) AND ucm.status = 'active'
+            ORDER BY ucm.container_name
+            """,
+            tuple(chunk),
+            fetch_all=True
+        )
+        if rows is None:
+            raise Error("Container lookup failed")
+        for r in rows:
+            containers.setdefault(r['username'], []).append(r['container_name'])
+    return containers
+
+
+def delete_users(users):
+    """
+    Delete many Guacamole users in one transaction with set-based DELETEs.
+    
+    Same cascade as delete_user (permissions, user record, entity); container
+    mappings go with the user records (ON DELETE CASCADE).
+    
+    Args:
+        users: Dict of username -> {'entity_id', 'user_id'} from get_user_ids()
+    
+    Returns:
+        List of deleted usernames
+    
+    Raises:
+        The database error if the transaction failed (nothing is deleted)
+    """
+    if not users:
+        return []
+    entity_ids = [u['entity_id'] for u in users.values()]
+    user_ids = [u['user_id'] for u in users.values() if u['user_id'] is not None]
+    
+    with transaction() as cursor:
+        for chunk in _chunks(user_ids):
+            in_list = _placeholders(len(chunk))
+            cursor.execute(f"DELETE FROM guacamole_user_permission WHERE affected_user_id IN ({in_list})", tuple(chunk))
+        for chunk in _chunks(entity_ids):
+            in_list = _placeholders(len(chunk))
+            cursor.execute(f"DELETE FROM guacamole_connection_permission WHERE entity_id IN ({in_list})", tuple(chunk))
+            cursor.execute(f"DELETE FROM guacamole_sharing_profile_permission WHERE entity_id IN ({in_list})", tuple(chunk))
+            cursor.execute(f"DELETE FROM guacamole_user WHERE entity_id IN ({in_list})", tuple(chunk))
+            cursor.execute(f"DELETE FROM guacamole_entity WHERE entity_id IN ({in_list})", tuple(chunk))
+    
+    logger.info(f"✓ Deleted {len(users)} Guacamole user(s)")
+    return list(users)
+
+
 def user_exists(username):
     """Check if a Guacamole user exists"""
     try:
@@ -251,6 +692,23 @@ def user_exists(username):
         return False
 
 
+def count_users():
+    """
+    Number of Guacamole users, for the stats tile.
+    
+    An uncached COUNT(*) on the indexed entity type, so writes made through
+    any gunicorn worker show up immediately.
+    
+    Returns:
+        Int (0 if the database is unreachable)
+    """
+    result = execute_query(
+        "SELECT COUNT(*) AS total FROM guacamole_entity WHERE type = 'USER'",
+        fetch_one=True
+    )
+    return result['total'] if result else 0
+
+
 def get_user_entity_id(username):
     """Get the entity_id for a user"""
     try:
@@ -265,12 +723,19 @@ def get_user_entity_id(username):
         return None
 
 
-def get_all_users():
+def get_all_users(include_connections=True):
     """
     Get all Guacamole users from the database with their connections.
     
+    Users and connection permissions are fetched with two set-based queries
+    and merged in Python, rather than one connection query per user.
+    
+    Args:
+        include_connections: If False, skip the connection lookup entirely
+    
     Returns:
         List of user dictionaries with keys: user_id, username, is_admin, connections
+        (connections is omitted when include_connections is False)
     """
     try:
         users = execute_query(
@@ -286,22 +751,29 @@ def get_all_users():
             fetch_all=True
         )
         
-        # For each user, get their connections
-        if users:
+        if users and include_connections:
+            # One query for every user's connections, grouped by username below
+            rows = execute_query(
+                """
+                SELECT e.name as username, c.connection_id, c.connection_name
+                FROM guacamole_connection c
+                JOIN guacamole_connection_permission cp ON c.connection_id = cp.connection_id
+                JOIN guacamole_entity e ON cp.entity_id = e.entity_id
+                WHERE e.type = 'USER'
+                ORDER BY c.connection_name
+                """,
+                fetch_all=True
+            )
+            
+            connections_by_user = {}
+            for row in rows or []:
+                connections_by_user.setdefault(row['username'], []).append({
+                    'connection_id': row['connection_id'],
+                    'connection_name': row['connection_name']
+                })
+            
             for user in users:
-                connections = execute_query(
-                    """
-                    SELECT c.connection_id, c.connection_name
-                    FROM guacamole_connection c
-                    JOIN guacamole_connection_permission cp ON c.connection_id = cp.connection_id
-                    JOIN guacamole_entity e ON cp.entity_id = e.entity_id
-                    WHERE e.name = %s AND e.type = 'USER'
-                    ORDER BY c.connection_name
-                    """,
-                    (user['username'],),
-                    fetch_all=True
-                )
-                user['connections'] = connections or []
+                user['connections'] = connections_by_user.get(user['username'], [])
         
         return users or []
     except Exception as e:
@@ -633,6 +1105,156 @@ def get_users_by_container(container_name):
         return []
 
 
+def get_container_user_map():
+    """
+    Get the active users of every container in one query.
+    
+    Returns:
+        Dict of container name -> list of usernames
+    """
+    try:
+        query = """
+        SELECT ucm.container_name, e.name as username
+        FROM user_container_mapping ucm
+        JOIN guacamole_user u ON ucm.user_id = u.user_id
+        JOIN guacamole_entity e ON u.entity_id = e.entity_id
+        WHERE ucm.status = 'active'
+        ORDER BY ucm.container_name, e.name
+        """
+        results = execute_query(query, fetch_all=True)
+        user_map = {}
+        for row in results or []:
+            user_map.setdefault(row['container_name'], []).append(row['username'])
+        return user_map
+    except Exception as e:
+        logger.error(f"✗ Failed to get container users: {e}")
+        return {}
+
+
+# Open history rows older than this are treated as abandoned (guacd crash, restart)
+MAX_SESSION_HOURS = 24
+
+HIBERNATION_TABLE_DDL = """
+CREATE TABLE IF NOT EXISTS pt_container_hibernation (
+    container_name VARCHAR(255) NOT NULL,
+    mode VARCHAR(10) NOT NULL,
+    hibernated_at DATETIME NOT NULL,
+    PRIMARY KEY (container_name)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8
+"""
+
+_hibernation_table_ready = False
+
+
+def _ensure_hibernation_table():
+    global _hibernation_table_ready
+    if not _hibernation_table_ready:
+        execute_query(HIBERNATION_TABLE_DDL)
+        _hibernation_table_ready = True
+
+
+def get_container_activity():
+    """
+    Get Guacamole session activity for every container with a VNC connection.
+    
+    Containers are matched through their connection's 'hostname' parameter.
+    
+    Returns:
+        Dict of container name -> {'active_sessions': int, 'idle_seconds': int or None}
+        (idle_seconds is None when the container has never been connected to)
+    """
+    try:
+        query = f"""
+        SELECT p.parameter_value AS container_name,
+               SUM(h.history_id IS NOT NULL AND h.end_date IS NULL
+                   AND h.start_date > NOW() - INTERVAL {MAX_SESSION_HOURS} HOUR) AS active_sessions,
+               TIMESTAMPDIFF(SECOND, MAX(COALESCE(h.end_date, h.start_date)), NOW()) AS idle_seconds
+        FROM guacamole_connection_parameter p
+        LEFT JOIN guacamole_connection_history h ON h.connection_id = p.connection_id
+        WHERE p.parameter_name = 'hostname'
+        GROUP BY p.parameter_value
+        """
+        results = execute_query(query, fetch_all=True)
+        return {
+            row['container_name']: {
+                'active_sessions': int(row['active_sessions'] or 0),
+                'idle_seconds': row['idle_seconds']
+            }
+            for row in results or []
+        }
+    except Exception as e:
+        logger.error(f"✗ Failed to get container activity: {e}")
+        return {}
+
+
+def mark_container_hibernated(container_name, mode):
+    """Record that a container was paused/stopped for idleness (timestamped with the DB clock)"""
+    try:
+        _ensure_hibernation_table()
+        execute_query(
+            """
+            INSERT INTO pt_container_hibernation (container_name, mode, hibernated_at)
+            VALUES (%s, %s, NOW())
+            ON DUPLICATE KEY UPDATE mode = VALUES(mode), hibernated_at = VALUES(hibernated_at)
+            """,
+            (container_name, mode)
+        )
+        return True
+    except Exception as e:
+        logger.error(f"✗ Failed to record hibernation of {container_name}: {e}")
+        return False
+
+
+def clear_container_hibernated(container_name):
+    """Forget a container's hibernation record"""
+    try:
+        _ensure_hibernation_table()
+        execute_query("DELETE FROM pt_container_hibernation WHERE container_name = %s", (container_name,))
+        return True
+    except Exception as e:
+        logger.error(f"✗ Failed to clear hibernation of {container_name}: {e}")
+        return False
+
+
+def get_hibernated_containers():
+    """
+    Get hibernated containers and whether someone has tried to connect since.
+    
+    A Guacamole connection attempt always writes a history row, even when
+    the container is down, so a row newer than the hibernation marks a
+    container that should be woken up.
+    
+    Returns:
+        Dict of container name -> {'mode', 'hibernated_at', 'wake_requested'}
+    """
+    try:
+        _ensure_hibernation_table()
+        query = """
+        SELECT z.container_name, z.mode, z.hibernated_at,
+               EXISTS (
+                   SELECT 1
+                   FROM guacamole_connection_parameter p
+                   JOIN guacamole_connection_history h ON h.connection_id = p.connection_id
+                   WHERE p.parameter_name = 'hostname'
+                     AND p.parameter_value = z.container_name
+                     AND h.start_date > z.hibernated_at
+               ) AS wake_requested
+        FROM pt_container_hibernation z
+        """
+        results = execute_query(query, fetch_all=True)
+        return {
+            row['container_name']: {
+                'mode': row['mode'],
+                'hibernated_at': row['hibernated_at'],
+                'wake_requested': bool(row['wake_requested'])
+            }
+            for row in results or []
+        }
+    except Exception as e:
+        logger.error(f"✗ Failed to get hibernated containers: {e}")
+        return {}
+
+
 def delete_connection(connection_name):
     """
     Delete a Guacamole connection and all associated permissions.
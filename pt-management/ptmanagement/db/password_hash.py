@@ -0,0 +1,59 @@
+"""Guacamole password hashing - single and batched
+
+Implements Guacamole's SHA256PasswordEncryptionService1G algorithm:
+    SHA256(password + salt.hex().upper()), with a random 32-byte salt
+
+See ptmanagement.db.guacamole for the background on the salt-hex detail.
+
+The batched path draws every salt from one os.urandom() call and hashes the
+whole batch in-process. At about 2 us per password even a 10k-user batch
+takes milliseconds, less than starting a worker pool and pickling the batch
+would cost (see benchmarks/bench_password_hashing.py).
+"""
+
+import hashlib
+import os
+
+SALT_BYTES = 32
+
+
+def hash_password(password, salt=None):
+    """
+    Hash a password the way Guacamole does.
+    
+    Args:
+        password: Plain-text password
+        salt: Optional salt bytes (a random 32-byte salt is generated if omitted)
+    
+    Returns:
+        (hash, salt) tuple as binary data
+    """
+    if salt is None:
+        salt = os.urandom(SALT_BYTES)
+    combined = password + salt.hex().upper()
+    return hashlib.sha256(combined.encode('utf-8')).digest(), salt
+
+
+def hash_passwords(passwords):
+    """
+    Hash many passwords at once.
+    
+    Args:
+        passwords: List of plain-text passwords
+    
+    Returns:
+        List of (hash, salt) tuples, in the same order as passwords
+    """
+    passwords = list(passwords)
+    count = len(passwords)
+    if not count:
+        return []
+    
+    # One syscall for every salt instead of one per user
+    salt_pool = os.urandom(SALT_BYTES * count)
+    salts = [salt_pool[i:i + SALT_BYTES] for i in range(0, len(salt_pool), SALT_BYTES)]
+    
+    sha256 = hashlib.sha256
+    digests = [sha256((password + salt.hex().upper()).encode('utf-8')).digest()
+               for password, salt in zip(passwords, salts)]
+    return list(zip(digests, salts))
@@ -1,75 +1,273 @@
 """Docker container management module - manages Packet Tracer containers"""
 
+import io
 import os
 import logging
 import json
+import shlex
 import socket
-import subprocess
+import tarfile
+import threading
 import time
+import http.client
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
 from urllib.parse import quote
 
+from ptmanagement.metrics import DOCKER_API_ERRORS, DOCKER_API_SECONDS, call_site
+from .events import get_event_watcher, RESYNC
+from .logs import LogDemuxer, LogTail, split_lines
+
 logger = logging.getLogger(__name__)
 
+# Max parallel inspect calls when listing containers
+INSPECT_CONCURRENCY = int(os.environ.get('DOCKER_INSPECT_CONCURRENCY', '16'))
+
+# Seconds the name->ID index is trusted without a live events stream
+INDEX_TTL = float(os.environ.get('DOCKER_INDEX_TTL', '30'))
+
+
+class _UnixHTTPConnection(http.client.HTTPConnection):
+    """HTTP/1.1 connection over the Docker Unix socket"""
+    
+    def __init__(self, socket_path, timeout=None):
+        super().__init__('localhost', timeout=timeout)
+        self.socket_path = socket_path
+    
+    def connect(self):
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        if self.timeout is not None:
+            sock.settimeout(self.timeout)
+        sock.connect(self.socket_path)
+        self.sock = sock
+
+
+class _SocketConnectionPool:
+    """Keep-alive connections to one Docker socket, shared by all clients in a process"""
+    
+    _pools = {}
+    _pools_lock = threading.Lock()
+    
+    def __init__(self, socket_path, size, timeout):
+        self.socket_path = socket_path
+        self.size = size
+        self.timeout = timeout
+        self._idle = []
+        self._lock = threading.Lock()
+    
+    @classmethod
+    def for_socket(cls, socket_path):
+        """Get the pool for socket_path in the current process (never reuse sockets across fork)"""
+        key = (socket_path, os.getpid())
+        with cls._pools_lock:
+            pool = cls._pools.get(key)
+            if pool is None:
+                pool = cls(
+                    socket_path,
+                    size=int(os.environ.get('DOCKER_POOL_SIZE', '8')),
+                    timeout=float(os.environ.get('DOCKER_API_TIMEOUT', '60'))
+                )
+                cls._pools[key] = pool
+            return pool
+    
+    def acquire(self):
+        """Return (connection, reused) - an idle keep-alive connection if one is available"""
+        with self._lock:
+            if self._idle:
+                return self._idle.pop(), True
+        return _UnixHTTPConnection(self.socket_path, timeout=self.timeout), False
+    
+    def release(self, conn):
+        """Return a connection whose response has been fully read"""
+        with self._lock:
+            if len(self._idle) < self.size:
+                self._idle.append(conn)
+                return
+        conn.close()
+
 
 class DockerSocketClient:
-    """Low-level Docker API client using direct Unix socket communication"""
+    """Low-level Docker API client speaking HTTP/1.1 keep-alive over the Unix socket"""
     
     def __init__(self, socket_path='/var/run/docker.sock'):
         """Initialize with Docker socket path"""
         self.socket_path = socket_path
+        self._pool = _SocketConnectionPool.for_socket(socket_path)
     
-    def _send_request(self, method, path, data=None):
-        """Send HTTP request to Docker socket and return (status_code, response_body)"""
-        try:
-            sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
-            sock.connect(self.socket_path)
-            
-            # Build HTTP request
-            request_line = f"{method} {path} HTTP/1.0\r\nHost: localhost\r\n"
+    def _request(self, method, path, body=None, headers=None):
+        """
+        Send a request on a pooled connection and read the whole response.
+        
+        http.client does the Content-Length / chunked decoding; the body is
+        returned as bytes without any text round trip.
+        
+        Returns:
+            (status_code, headers, body_bytes)
+        """
+        headers = dict(headers or {})
+        if body is not None:
+            headers.setdefault('Content-Length', str(len(body)))
+        
+        for attempt in range(2):
+            conn, reused = self._pool.acquire()
+            try:
+                conn.request(method, path, body=body, headers=headers)
+                response = conn.getresponse()
+                payload = response.read()
+            except (http.client.RemoteDisconnected, ConnectionResetError, BrokenPipeError):
+                conn.close()
+                # The daemon may drop an idle keep-alive connection - retry once on a new one
+                if reused and attempt == 0:
+                    continue
+                raise
+            except Exception:
+                conn.close()
+                raise
             
-            if data:
-                json_data = json.dumps(data).encode('utf-8')
-                request_line += f"Content-Type: application/json\r\nContent-Length: {len(json_data)}\r\n\r\n"
-                sock.sendall(request_line.encode('utf-8'))
-                sock.sendall(json_data)
+            if response.will_close:
+                conn.close()
             else:
-                request_line += "\r\n"
-                sock.sendall(request_line.encode('utf-8'))
+                self._pool.release(conn)
+            return response.status, response.headers, payload
+    
+    def _send_request(self, method, path, data=None, body=None, content_type=None):
+        """Send HTTP request to Docker socket and return (status_code, response_body)
+        
+        data is sent as JSON, or body as raw bytes of content_type (e.g. a tar
+        archive). JSON responses are parsed straight from bytes; other
+        responses are returned as bytes. Latency is recorded per calling
+        client method.
+        """
+        operation = call_site()
+        started = time.perf_counter()
+        try:
+            status_code, payload = self._send(method, path, data, body, content_type)
+        except Exception as e:
+            logger.error(f"✗ Socket request failed: {e}")
+            status_code, payload = None, None
+        DOCKER_API_SECONDS.labels(operation).observe(time.perf_counter() - started)
+        if status_code is None or status_code >= 500:
+            DOCKER_API_ERRORS.labels(operation).inc()
+        return status_code, payload
+    
+    def _send(self, method, path, data, body=None, content_type=None):
+        """Encode the body, send it and decode a JSON response"""
+        headers = {}
+        if body is not None:
+            headers['Content-Type'] = content_type or 'application/octet-stream'
+        elif data is not None:
+            body = json.dumps(data).encode('utf-8')
+            headers['Content-Type'] = 'application/json'
+        
+        status_code, response_headers, payload = self._request(method, path, body=body, headers=headers)
+        
+        if not payload:
+            return status_code, None
+        if 'json' in (response_headers.get('Content-Type') or ''):
+            try:
+                return status_code, json.loads(payload)
+            except json.JSONDecodeError:
+                pass
+        return status_code, payload
+    
+    def stream(self, method, path, data=None, chunk_size=65536, on_connect=None, on_open=None):
+        """
+        Send a request and yield the response body incrementally.
+        
+        Uses a dedicated connection with no read timeout (for follow/event
+        streams); the connection is closed when the generator finishes or is
+        closed. Non-2xx responses raise RuntimeError. on_connect(connection)
+        is called once the request is sent, e.g. so another thread can shut
+        the socket down to abort a blocked read. on_open() is called once the
+        response status is accepted, before the first body read - the
+        request only goes out when the generator is first iterated.
+        """
+        body = None
+        headers = {}
+        if data is not None:
+            body = json.dumps(data).encode('utf-8')
+            headers['Content-Type'] = 'application/json'
+            headers['Content-Length'] = str(len(body))
+        
+        conn = _UnixHTTPConnection(self.socket_path, timeout=None)
+        try:
+            conn.request(method, path, body=body, headers=headers)
+            if on_connect:
+                on_connect(conn)
+            response = conn.getresponse()
+            if response.status >= 300:
+                raise RuntimeError(f"Docker API {method} {path} returned {response.status}: {response.read()[:200]!r}")
+            if on_open:
+                on_open()
             
-            # Receive response
-            response = b''
             while True:
-                chunk = sock.recv(4096)
+                # read1 returns as soon as any data (up to one chunk) is available,
+                # so follow/event streams are delivered without waiting to fill a buffer
+                chunk = response.read1(chunk_size)
                 if not chunk:
                     break
-                response += chunk
-            sock.close()
-            
-            # Parse response
-            response_str = response.decode('utf-8', errors='ignore')
-            # Get status code from first line
-            status_line = response_str.split('\r\n')[0]
-            status_code = int(status_line.split()[1]) if len(status_line.split()) > 1 else None
-            
-            # Split headers and body
-            parts = response_str.split('\r\n\r\n', 1)
-            if len(parts) == 2:
-                body = parts[1]
-                try:
-                    return status_code, json.loads(body)
-                except json.JSONDecodeError:
-                    return status_code, body
-            return status_code, None
-        except Exception as e:
-            logger.error(f"✗ Socket request failed: {e}")
-            return None, None
+                yield chunk
+        finally:
+            conn.close()
     
-    def list_containers(self, all=False):
-        """List all containers"""
-        path = "/v1.41/containers/json" + ("?all=true" if all else "")
+    def stream_json(self, method, path, data=None, on_open=None):
+        """
+        Yield each object of a newline-delimited JSON stream (events, stats).
+        
+        Malformed lines are logged and skipped. Close the generator to drop
+        the connection. on_open is passed on to stream().
+        """
+        stream = self.stream(method, path, data, on_open=on_open)
+        buffer = bytearray()
+        try:
+            for chunk in stream:
+                buffer += chunk
+                start = 0
+                while True:
+                    end = buffer.find(b'\n', start)
+                    if end < 0:
+                        break
+                    line = bytes(buffer[start:end]).strip()
+                    start = end + 1
+                    if not line:
+                        continue
+                    try:
+                        obj = json.loads(line)
+                    except json.JSONDecodeError:
+                        logger.warning(f"⚠ Ignoring malformed line from {path}: {line[:200]!r}")
+                        continue
+                    yield obj
+                del buffer[:start]
+        finally:
+            stream.close()
+    
+    def list_containers(self, all=False, filters=None):
+        """List all containers (optionally filtered server-side, e.g. {"name": ["ptwarm-"]})"""
+        params = []
+        if all:
+            params.append("all=true")
+        if filters:
+            params.append(f"filters={quote(json.dumps(filters), safe='')}")
+        path = "/v1.41/containers/json" + ("?" + "&".join(params) if params else "")
         status_code, response = self._send_request("GET", path)
         return response if isinstance(response, list) else []
     
+    def info(self):
+        """Daemon/host information (NCPU, MemTotal, ...), or None"""
+        status_code, response = self._send_request("GET", "/v1.41/info")
+        return response if status_code == 200 and isinstance(response, dict) else None
+    
+    def container_stats(self, container_id):
+        """One stats sample of a container without waiting for a second reading, or None"""
+        path = f"/v1.41/containers/{container_id}/stats?stream=false&one-shot=true"
+        status_code, response = self._send_request("GET", path)
+        return response if status_code == 200 and isinstance(response, dict) else None
+    
+    def inspect_container(self, container_id):
+        """Inspect a container, returning the parsed JSON or None"""
+        status_code, response = self._send_request("GET", f"/v1.41/containers/{container_id}/json")
+        return response if status_code == 200 and isinstance(response, dict) else None
+    
     def create_container(self, **kwargs):
         """Create a new container"""
         # Extract container name for query parameter
@@ -92,17 +290,39 @@ class DockerSocketClient:
         # 204 No Content means success, or 200 OK
         return status_code in [200, 204]
     
+    def pause_container(self, container_id):
+        """Pause (freeze) a container"""
+        status_code, response = self._send_request("POST", f"/v1.41/containers/{container_id}/pause")
+        return status_code in [200, 204]
+    
+    def unpause_container(self, container_id):
+        """Unpause a paused container"""
+        status_code, response = self._send_request("POST", f"/v1.41/containers/{container_id}/unpause")
+        return status_code in [200, 204]
+    
+    def restart_container(self, container_id, timeout=10):
+        """Restart a container (stop with timeout seconds of grace, then start)"""
+        path = f"/v1.41/containers/{container_id}/restart?t={int(timeout)}"
+        status_code, response = self._send_request("POST", path)
+        return status_code in [200, 204]
+    
     def remove_container(self, container_id, force=False):
         """Remove a container"""
         path = f"/v1.41/containers/{container_id}" + ("?force=true" if force else "")
         status_code, response = self._send_request("DELETE", path)
         return status_code in [200, 204]
     
+    def rename_container(self, container_id, new_name):
+        """Rename a container, returning the HTTP status (204 on success, 404, 409 on name conflict)"""
+        path = f"/v1.41/containers/{container_id}/rename?name={quote(new_name, safe='')}"
+        status_code, response = self._send_request("POST", path)
+        return status_code
+    
     def get_logs(self, container_id, tail=100):
-        """Get container logs"""
+        """Get container logs as raw bytes (framed unless the container has a TTY), None on error"""
         path = f"/v1.41/containers/{container_id}/logs?stdout=1&stderr=1&tail={tail}"
         status_code, response = self._send_request("GET", path)
-        return response
+        return response if status_code == 200 else None
     
     def exec_create(self, container_id, cmd):
         """Create an exec instance inside a container"""
@@ -125,6 +345,45 @@ class DockerSocketClient:
         status_code, response = self._send_request("POST", path, data)
         return response
     
+    def exec_inspect(self, exec_id):
+        """Inspect an exec instance (Running, ExitCode), None on error"""
+        path = f"/v1.41/exec/{exec_id}/json"
+        status_code, response = self._send_request("GET", path)
+        return response if status_code == 200 else None
+    
+    def exec_run(self, container_id, cmd):
+        """
+        Run a command inside a container and wait for it to exit.
+        
+        Returns:
+            (exit_code, stdout_bytes, stderr_bytes); exit_code is None if the
+            exec could not be created (e.g. the container is not running)
+        """
+        exec_result = self.exec_create(container_id, cmd)
+        if not exec_result or 'Id' not in exec_result:
+            return None, b'', b''
+        
+        # Without a TTY the output comes framed like container logs
+        output = self.exec_start(exec_result['Id'])
+        stdout, stderr = bytearray(), bytearray()
+        if isinstance(output, bytes):
+            for stream, payload in LogDemuxer().feed(output):
+                (stderr if stream == 'stderr' else stdout).extend(payload)
+        
+        details = self.exec_inspect(exec_result['Id'])
+        return (details.get('ExitCode') if details else None), bytes(stdout), bytes(stderr)
+    
+    def put_archive(self, container_id, path, archive):
+        """Extract a tar archive (bytes) into directory path of a container; True on success"""
+        api_path = f"/v1.41/containers/{container_id}/archive?path={quote(path, safe='')}"
+        status_code, response = self._send_request("PUT", api_path, body=archive, content_type='application/x-tar')
+        return status_code == 200
+    
+    def connect_network(self, network, container_id):
+        """Connect a container to a network, returning (status_code, response) - 200 on success"""
+        path = f"/v1.41/networks/{quote(network, safe='')}/connect"
+        return self._send_request("POST", path, {"Container": container_id})
+    
     def update_container(self, container_id, **kwargs):
         """Update container resource limits"""
         path = f"/v1.41/containers/{container_id}/update"
@@ -132,12 +391,329 @@ class DockerSocketClient:
         return status_code in [200, 204], response
 
 
+class ContainerIndex:
+    """
+    Exact container name -> full ID map shared by every DockerManager in a process.
+    
+    Kept current from the Docker events stream (create/rename/destroy), so
+    resolving a name costs no API call. While the stream is down the index
+    falls back to a full relist once it is older than INDEX_TTL seconds, and
+    a lookup miss triggers one rate-limited relist in case an event has not
+    arrived yet.
+    """
+    
+    def __init__(self, client, ttl=INDEX_TTL, min_refresh_interval=1.0):
+        self.client = client
+        self.ttl = ttl
+        self.min_refresh_interval = min_refresh_interval
+        self._by_name = {}
+        self._refreshed_at = None  # monotonic time of the last relist, None = stale
+        self._journal = None  # changes applied while a relist is in flight
+        self._watcher = None
+        self._lock = threading.Lock()
+        self._refresh_lock = threading.Lock()
+    
+    def attach(self, watcher):
+        """Subscribe to a DockerEventWatcher"""
+        self._watcher = watcher
+        watcher.add_listener(self.handle_event)
+    
+    def _is_fresh(self):
+        if self._refreshed_at is None:
+            return False
+        if self._watcher is not None and self._watcher.connected:
+            return True
+        return time.monotonic() - self._refreshed_at < self.ttl
+    
+    def refresh(self, force=False):
+        """Rebuild the index from one /containers/json?all=true call"""
+        with self._refresh_lock:
+            if not force and self._refreshed_at is not None and \
+                    time.monotonic() - self._refreshed_at < self.min_refresh_interval:
+                return True
+            
+            with self._lock:
+                self._journal = []
+            try:
+                status_code, containers = self.client._send_request("GET", "/v1.41/containers/json?all=true")
+                if status_code != 200 or not isinstance(containers, list):
+                    logger.warning(f"⚠ Could not refresh container index (status {status_code})")
+                    return False
+                
+                by_name = {}
+                for container in containers:
+                    if container.get('Id'):
+                        by_name[DockerManager._container_name(container)] = container['Id']
+                
+                with self._lock:
+                    journal, self._by_name = self._journal, by_name
+                    # Changes that landed during the list may be newer than it
+                    for change in journal:
+                        self._apply(*change)
+                    self._refreshed_at = time.monotonic()
+                return True
+            finally:
+                with self._lock:
+                    self._journal = None
+    
+    def resolve(self, name):
+        """
+        Resolve an exact container name (or an ID / ID prefix) to the full container ID.
+        
+        Returns:
+            Full container ID, or None if no such container exists
+        """
+        if not self._is_fresh():
+            self.refresh()
+        
+        with self._lock:
+            container_id = self._by_name.get(name)
+        if container_id:
+            return container_id
+        
+        # Miss: the create event may still be in flight
+        if self.refresh():
+            with self._lock:
+                container_id = self._by_name.get(name)
+                if not container_id and len(name) >= 12:
+                    container_id = next((cid for cid in self._by_name.values() if cid.startswith(name)), None)
+        return container_id
+    
+    def _apply(self, op, name=None, container_id=None):
+        """Apply one change (call with _lock held): 'set', 'drop_name' or 'drop_id'"""
+        if self._journal is not None:
+            self._journal.append((op, name, container_id))
+        if op == 'set':
+            self._by_name[name] = container_id
+        elif op == 'drop_name':
+            if container_id is None or self._by_name.get(name) == container_id:
+                self._by_name.pop(name, None)
+        elif op == 'drop_id':
+            for key in [k for k, v in self._by_name.items() if v == container_id]:
+                del self._by_name[key]
+    
+    def record(self, name, container_id):
+        """Add a container this process just created"""
+        with self._lock:
+            self._apply('set', name, container_id)
+    
+    def forget(self, name):
+        """Drop a container this process just removed"""
+        with self._lock:
+            self._apply('drop_name', name)
+    
+    def handle_event(self, event):
+        """Apply one Docker container event"""
+        action = event.get('Action') or event.get('status') or ''
+        if action == RESYNC:
+            # Events may have been missed while the stream was down
+            with self._lock:
+                self._refreshed_at = None
+            return
+        if event.get('Type', 'container') != 'container':
+            return
+        
+        actor = event.get('Actor') or {}
+        attributes = actor.get('Attributes') or {}
+        container_id = actor.get('ID') or event.get('id')
+        name = attributes.get('name')
+        if not container_id:
+            return
+        
+        with self._lock:
+            if action == 'destroy':
+                self._apply('drop_id', container_id=container_id)
+                return
+            if action == 'rename':
+                self._apply('drop_name', (attributes.get('oldName') or '').lstrip('/'), container_id)
+            if name:
+                self._apply('set', name, container_id)
+
+
+# Container events that can change a ptvnc container's state record
+STATE_EVENTS = {'create', 'start', 'restart', 'stop', 'die', 'kill', 'pause', 'unpause', 'update', 'rename', 'oom'}
+
+
+class ContainerStateCache:
+    """
+    Materialised state of every ptvnc container, maintained from Docker events.
+    
+    Each record holds what the read endpoints serve: status, image, ports,
+    resource limits, attached networks and start time. The cache is rebuilt
+    (one list + a batch of inspects) whenever the events stream (re)connects;
+    afterwards each relevant event re-inspects only the affected container.
+    Every change bumps `version`, which clients can compare to skip refetching.
+    
+    The cache is only authoritative while the events stream is connected;
+    callers fall back to querying Docker directly otherwise (see is_live).
+    """
+    
+    def __init__(self, client, describe, inspect_many):
+        """
+        Args:
+            client: DockerSocketClient
+            describe: Callable (container_name, inspect_data) -> record dict
+            inspect_many: Callable [(container_name, list entry), ...] -> {full Id: inspect data}
+        """
+        self.client = client
+        self.describe = describe
+        self.inspect_many = inspect_many
+        self.version = 0
+        self._records = {}  # full container Id -> record
+        self._counts = Counter()  # status -> number of records, kept in step with _records
+        self._ready = False
+        self._watcher = None
+        self._lock = threading.Lock()
+    
+    def attach(self, watcher):
+        """Subscribe to a DockerEventWatcher"""
+        self._watcher = watcher
+        watcher.add_listener(self.handle_event)
+        if watcher.connected:
+            # Subscribed after the stream's resync event - build now
+            self.rebuild()
+    
+    def is_live(self):
+        """True when the records reflect Docker's current state"""
+        return self._ready and self._watcher is not None and self._watcher.connected
+    
+    def rebuild(self):
+        """Replace every record from a full list + batched inspect"""
+        status_code, containers = self.client._send_request("GET", "/v1.41/containers/json?all=true")
+        if status_code != 200 or not isinstance(containers, list):
+            logger.warning(f"⚠ Could not rebuild container state (status {status_code})")
+            with self._lock:
+                self._ready = False
+            return False
+        
+        pt_containers = []
+        for container in containers:
+            name = DockerManager._container_name(container)
+            if name.startswith('ptvnc') and container.get('Id'):
+                pt_containers.append((name, container))
+        
+        records = {}
+        for container_id, data in self.inspect_many(pt_containers).items():
+            if data:
+                records[container_id] = self.describe(data.get('Name', '').lstrip('/'), data)
+        
+        with self._lock:
+            self._records = records
+            self._counts = Counter(r['status'] for r in records.values())
+            self._ready = True
+            self.version += 1
+        logger.info(f"✓ Container state cache rebuilt ({len(records)} ptvnc containers, version {self.version})")
+        return True
+    
+    def refresh_one(self, container_id):
+        """Re-inspect one container and update (or drop) its record"""
+        data = self.client.inspect_container(container_id)
+        name = data.get('Name', '').lstrip('/') if data else ''
+        with self._lock:
+            if data and name.startswith('ptvnc'):
+                self._put(data['Id'], self.describe(name, data))
+            elif self._put(container_id, None) is None:
+                return
+            self.version += 1
+    
+    def _put(self, container_id, record):
+        """Replace (or with None, drop) a record and its status count; returns the old record"""
+        old = self._records.pop(container_id, None)
+        if old is not None:
+            self._counts[old['status']] -= 1
+        if record is not None:
+            self._records[container_id] = record
+            self._counts[record['status']] += 1
+        return old
+    
+    def handle_event(self, event):
+        """Apply one Docker event"""
+        action = event.get('Action') or event.get('status') or ''
+        if action == RESYNC:
+            self.rebuild()
+            return
+        
+        attributes = (event.get('Actor') or {}).get('Attributes') or {}
+        if event.get('Type') == 'network':
+            container_id = attributes.get('container')
+            if action in ('connect', 'disconnect') and container_id in self._records:
+                self.refresh_one(container_id)
+            return
+        
+        container_id = (event.get('Actor') or {}).get('ID') or event.get('id')
+        name = attributes.get('name') or ''
+        if not container_id or not (name.startswith('ptvnc') or container_id in self._records):
+            return
+        
+        if action == 'destroy':
+            with self._lock:
+                if self._put(container_id, None) is not None:
+                    self.version += 1
+        elif action in STATE_EVENTS:
+            self.refresh_one(container_id)
+    
+    def snapshot(self):
+        """Return (version, list of record copies sorted by name)"""
+        with self._lock:
+            records = [dict(r) for r in self._records.values()]
+            version = self.version
+        records.sort(key=lambda r: r['name'])
+        return version, records
+    
+    def counts(self):
+        """Return (version, {status: number of containers}) without walking the records"""
+        with self._lock:
+            return self.version, {status: n for status, n in self._counts.items() if n}
+    
+    def get(self, name):
+        """Return a copy of the record for an exact container name, or None"""
+        with self._lock:
+            for record in self._records.values():
+                if record['name'] == name:
+                    return dict(record)
+        return None
+
+
+_index = None
+_index_pid = None
+_state = None
+_state_pid = None
+_shared_lock = threading.Lock()
+
+
+def get_container_index(client):
+    """Get the process-wide container index, subscribing it to Docker events on first use"""
+    global _index, _index_pid
+    pid = os.getpid()
+    with _shared_lock:
+        if _index is None or _index_pid != pid:
+            _index = ContainerIndex(client)
+            _index.attach(get_event_watcher(client))
+            _index_pid = pid
+        return _index
+
+
+def get_container_state(client, describe, inspect_many):
+    """Get the process-wide ptvnc state cache, subscribing it to Docker events on first use"""
+    global _state, _state_pid
+    pid = os.getpid()
+    with _shared_lock:
+        if _state is None or _state_pid != pid:
+            _state = ContainerStateCache(client, describe, inspect_many)
+            _state.attach(get_event_watcher(client))
+            _state_pid = pid
+        return _state
+
+
 class DockerManager:
     """Manages Docker containers for Packet Tracer instances"""
     
     def __init__(self):
         """Initialize Docker client using direct socket communication"""
         self.client = None
+        self.index = None
+        self.state = None
+        self.events = None
         try:
             self.client = DockerSocketClient()
             # Test connection
@@ -146,10 +722,44 @@ class DockerManager:
                 logger.info(f"✓ Docker socket initialized - found {len(containers)} containers")
             else:
                 logger.warning("⚠ Docker socket connection succeeded but no data returned")
+            self.index = get_container_index(self.client)
+            self.state = get_container_state(self.client, self._state_record, self._inspect_batch)
+            self.events = get_event_watcher(self.client)
+            self.events.start()
         except Exception as e:
             logger.warning(f"⚠ Docker socket initialization failed: {e}")
             self.client = None
     
+    def _live_state(self):
+        """The shared state cache if it is currently authoritative, else None"""
+        return self.state if self.state and self.state.is_live() else None
+    
+    def state_version(self):
+        """
+        Invalidation counter of the container state cache.
+        
+        Returns:
+            Int that changes whenever any ptvnc container changes, or None
+            while the events stream is down (clients should then just refetch)
+        """
+        state = self._live_state()
+        return state.version if state else None
+    
+    def event_status(self):
+        """Status of the Docker events subscription and state cache"""
+        if not self.events:
+            return {'connected': False}
+        status = self.events.status()
+        status['state_live'] = self._live_state() is not None
+        status['state_version'] = self.state.version if self.state else None
+        return status
+    
+    def _resolve_container_id(self, container_name):
+        """Resolve an exact container name (or ID prefix) to its full ID via the shared index"""
+        if not self.index:
+            return None
+        return self.index.resolve(container_name)
+    
     def health_check(self):
         """Check if Docker socket is accessible"""
         try:
@@ -161,12 +771,17 @@ class DockerManager:
             logger.error(f"✗ Docker health check failed: {e}")
             return False
     
-    def list_containers(self, all=False):
+    def list_containers(self, all=False, with_resources=True):
         """
         List all Packet Tracer containers from Docker with resource info.
         
+        Served from the events-driven state cache while it is live; otherwise
+        makes one /containers/json call plus a bounded-concurrency batch of
+        inspects (one per ptvnc container) for the resource limits.
+        
         Args:
             all: If True, include stopped containers
+            with_resources: If False, skip the inspects (memory/cpus are 'N/A')
         
         Returns:
             List of container dicts with keys: id, name, status, ports, image, memory, cpus
@@ -176,39 +791,41 @@ class DockerManager:
                 logger.error("✗ Docker client not initialized")
                 return []
             
+            state = self._live_state()
+            if state:
+                version, records = state.snapshot()
+                return [r for r in records if all or r['status'] == 'running']
+            
             containers_data = self.client.list_containers(all=all)
             if not isinstance(containers_data, list):
                 logger.warning(f"⚠ Unexpected response type: {type(containers_data)}")
                 return []
             
-            containers_list = []
+            pt_containers = []
             for container in containers_data:
-                names = container.get('Names', [])
-                if isinstance(names, list) and names:
-                    # Names come with leading slash, e.g. "/pt-guacd/ptvnc1" or "/ptvnc1"
-                    # Extract the actual container name (last part after final slash)
-                    full_name = names[0].lstrip('/')
-                    # Get just the container name part
-                    container_name = full_name.split('/')[-1] if '/' in full_name else full_name
-                else:
-                    container_name = 'unknown'
-                
+                container_name = self._container_name(container)
                 # Only include ptvnc containers (instance containers)
                 if isinstance(container_name, str) and container_name.startswith('ptvnc'):
-                    # Get resource info
-                    resources = self.get_container_resources(container_name)
-                    memory = resources['memory'] if resources else 'N/A'
-                    cpus = resources['cpus'] if resources else 'N/A'
-                    
-                    containers_list.append({
-                        'id': container.get('Id', '')[:12],
-                        'name': container_name,
-                        'status': container.get('State', 'unknown'),
-                        'ports': container.get('Ports', []),
-                        'image': container.get('Image', 'unknown'),
-                        'memory': memory,
-                        'cpus': cpus
-                    })
+                    pt_containers.append((container_name, container))
+            
+            # Inspect every ptvnc container once, with bounded concurrency,
+            # instead of re-listing all containers for each one
+            resources = self._inspect_resources_batch(pt_containers) if with_resources else {}
+            
+            containers_list = []
+            for container_name, container in pt_containers:
+                res = resources.get(container.get('Id'))
+                containers_list.append({
+                    'id': container.get('Id', '')[:12],
+                    'name': container_name,
+                    'status': container.get('State', 'unknown'),
+                    'ports': container.get('Ports', []),
+                    'image': container.get('Image', 'unknown'),
+                    'memory': res['memory'] if res else 'N/A',
+                    'cpus': res['cpus'] if res else 'N/A',
+                    'memory_bytes': res['memory_bytes'] if res else None,
+                    'nano_cpus': res['nano_cpus'] if res else None
+                })
             
             if containers_list:
                 logger.info(f"✓ Found {len(containers_list)} Packet Tracer containers")
@@ -220,6 +837,85 @@ class DockerManager:
             logger.error(f"✗ Failed to list containers: {e}")
             return []
     
+    @staticmethod
+    def _container_name(container):
+        """Extract the container name from a /containers/json entry"""
+        names = container.get('Names', [])
+        if isinstance(names, list) and names:
+            # Names come with leading slash, e.g. "/pt-guacd/ptvnc1" or "/ptvnc1"
+            # Extract the actual container name (last part after final slash)
+            full_name = names[0].lstrip('/')
+            return full_name.split('/')[-1] if '/' in full_name else full_name
+        return 'unknown'
+    
+    def _inspect_batch(self, containers):
+        """
+        Inspect many containers concurrently.
+        
+        Args:
+            containers: List of (container_name, /containers/json entry) tuples
+        
+        Returns:
+            Dict of full container Id -> inspect data (None if the inspect failed)
+        """
+        if not containers:
+            return {}
+        
+        def inspect(item):
+            container_name, container = item
+            try:
+                return container.get('Id'), self.client.inspect_container(container.get('Id'))
+            except Exception as e:
+                logger.warning(f"⚠ Failed to inspect {container_name}: {e}")
+                return container.get('Id'), None
+        
+        workers = min(INSPECT_CONCURRENCY, len(containers))
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            return dict(executor.map(inspect, containers))
+    
+    def _inspect_resources_batch(self, containers):
+        """
+        Inspect many containers concurrently and extract their resource limits.
+        
+        Returns:
+            Dict of full container Id -> resources dict (see get_container_resources)
+        """
+        names = {container.get('Id'): container_name for container_name, container in containers}
+        return {
+            container_id: self._resources_from_inspect(names[container_id], data) if data else None
+            for container_id, data in self._inspect_batch(containers).items()
+        }
+    
+    def _state_record(self, container_name, inspect_data):
+        """Build a state cache record (list_containers shape plus extras) from inspect output"""
+        state = inspect_data.get('State', {}) or {}
+        network_settings = inspect_data.get('NetworkSettings', {}) or {}
+        
+        # Same shape as the Ports list of /containers/json
+        ports = []
+        for port_key, bindings in (network_settings.get('Ports') or {}).items():
+            private_port, _, port_type = port_key.partition('/')
+            for binding in bindings or [{}]:
+                port = {'PrivatePort': int(private_port), 'Type': port_type or 'tcp'}
+                if binding.get('HostPort'):
+                    port['IP'] = binding.get('HostIp', '')
+                    port['PublicPort'] = int(binding['HostPort'])
+                ports.append(port)
+        
+        record = {
+            'id': inspect_data.get('Id', '')[:12],
+            'name': container_name,
+            'status': state.get('Status', 'unknown'),
+            'ports': ports,
+            'image': (inspect_data.get('Config', {}) or {}).get('Image', 'unknown'),
+            'networks': sorted((network_settings.get('Networks') or {}).keys()),
+            'started_at': state.get('StartedAt', ''),
+            'created': inspect_data.get('Created', '')
+        }
+        resources = self._resources_from_inspect(container_name, inspect_data)
+        record.update({k: v for k, v in resources.items() if k != 'name'})
+        return record
+    
     def get_container_info(self, container_name):
         """
         Get detailed information about a container using docker inspect.
@@ -231,34 +927,39 @@ class DockerManager:
             Dict with container details or None
         """
         try:
-            cmd = ['docker', 'inspect', container_name]
-            result = subprocess.run(cmd, capture_output=True, text=True, timeout=5)
-            
-            if result.returncode == 0:
-                data = json.loads(result.stdout)
-                if data and len(data) > 0:
-                    container = data[0]
-                    ports_list = []
-                    if container.get('NetworkSettings', {}).get('Ports'):
-                        for port_key, port_bindings in container['NetworkSettings']['Ports'].items():
-                            if port_bindings:
-                                ports_list.append(f"{port_bindings[0]['HostPort']}:{port_key}")
-                    
-                    return {
-                        'id': container.get('Id', '')[:12],
-                        'name': container.get('Name', '').lstrip('/'),
-                        'status': container.get('State', {}).get('Status', 'unknown'),
-                        'image': container.get('Config', {}).get('Image', 'unknown'),
-                        'ports': ports_list,
-                        'created': container.get('Created', ''),
-                        'started': container.get('State', {}).get('StartedAt', ''),
-                    }
-            else:
-                logger.error(f"✗ Failed to inspect container {container_name}: {result.stderr}")
+            state = self._live_state()
+            record = state.get(container_name) if state else None
+            if record:
+                return {
+                    'id': record['id'],
+                    'name': record['name'],
+                    'status': record['status'],
+                    'image': record['image'],
+                    'ports': [f"{p['PublicPort']}:{p['PrivatePort']}/{p['Type']}" for p in record['ports'] if p.get('PublicPort')],
+                    'created': record['created'],
+                    'started': record['started_at'],
+                }
+            
+            container = self.client.inspect_container(container_name)
+            if not container:
+                logger.error(f"✗ Failed to inspect container {container_name}")
                 return None
-        except json.JSONDecodeError:
-            logger.error(f"✗ Invalid JSON response for {container_name}")
-            return None
+            
+            ports_list = []
+            if container.get('NetworkSettings', {}).get('Ports'):
+                for port_key, port_bindings in container['NetworkSettings']['Ports'].items():
+                    if port_bindings:
+                        ports_list.append(f"{port_bindings[0]['HostPort']}:{port_key}")
+            
+            return {
+                'id': container.get('Id', '')[:12],
+                'name': container.get('Name', '').lstrip('/'),
+                'status': container.get('State', {}).get('Status', 'unknown'),
+                'image': container.get('Config', {}).get('Image', 'unknown'),
+                'ports': ports_list,
+                'created': container.get('Created', ''),
+                'started': container.get('State', {}).get('StartedAt', ''),
+            }
         except Exception as e:
             logger.error(f"✗ Failed to get container info for {container_name}: {e}")
             return None
@@ -272,38 +973,57 @@ class DockerManager:
             tail: Number of lines to retrieve
         
         Returns:
-            List of log lines
+            List of log lines (stdout and stderr, in order)
         """
         try:
             if not self.client:
                 logger.error("✗ Docker client not initialized")
                 return []
             
-            # Get logs from Docker API
-            logs_data = self.client.get_logs(container_name, tail=tail)
+            data = self.client.inspect_container(container_name)
+            if not data:
+                logger.warning(f"⚠ Container not found for logs: {container_name}")
+                return []
             
+            logs_data = self.client.get_logs(data['Id'], tail=tail)
             if logs_data is None:
                 logger.warning(f"⚠ No logs returned for {container_name}")
                 return []
-            
-            # Docker logs API returns raw stream data, not JSON
-            # Parse it as text
             if isinstance(logs_data, str):
-                # Split into lines and return
-                lines = logs_data.strip().split('\n')
-                return [line for line in lines if line.strip()]
-            elif isinstance(logs_data, bytes):
-                # Decode bytes to string
-                text = logs_data.decode('utf-8', errors='ignore')
-                lines = text.strip().split('\n')
-                return [line for line in lines if line.strip()]
-            else:
-                logger.warning(f"⚠ Unexpected logs format: {type(logs_data)}")
-                return []
+                logs_data = logs_data.encode('utf-8')
+            
+            # Non-TTY output is framed per stdout/stderr write - demultiplex it
+            tty = bool((data.get('Config') or {}).get('Tty'))
+            lines = (line.decode('utf-8', errors='replace').rstrip('\r') for _, line in split_lines(logs_data, tty))
+            return [line for line in lines if line.strip()]
         except Exception as e:
             logger.error(f"✗ Failed to get logs for {container_name}: {e}")
             return []
     
+    def tail_container_logs(self, container_name, follow=False, since=None, tail=None, tty=False):
+        """
+        Start reading a container's logs incrementally (see docker_mgmt.logs).
+        
+        Args:
+            container_name: Name or ID of the container
+            follow: Keep the stream open for new lines
+            since: Cursor from a previous batch (Unix seconds, inclusive)
+            tail: Number of lines to start with (None for all)
+            tty: The container has a TTY (unframed output)
+        
+        Returns:
+            Started LogTail; close() it when done
+        """
+        params = ["stdout=1", "stderr=1", "timestamps=1"]
+        if follow:
+            params.append("follow=1")
+        if since:
+            params.append(f"since={since}")
+        if tail is not None:
+            params.append(f"tail={tail}")
+        path = f"/v1.41/containers/{quote(container_name, safe='')}/logs?" + "&".join(params)
+        return LogTail(self.client, path, tty).start()
+    
     def create_container(self, image, container_name, environment=None, ports=None):
         """
         Create a new container using Docker socket API.
@@ -384,6 +1104,8 @@ class DockerManager:
             
             if response and "Id" in response:
                 container_id = response["Id"][:12]
+                if self.index:
+                    self.index.record(container_name, response["Id"])
                 
                 # Start the container
                 self.client.start_container(response["Id"])
@@ -397,6 +1119,114 @@ class DockerManager:
             logger.error(f"✗ Failed to create container {container_name}: {e}")
             return None
     
+    def run_pt_container(self, container_name, pt_deb, shared_path, network='ptnet', cpus=0.1, memory='1G', image='ptvnc'):
+        """
+        Create and start a Packet Tracer container via the socket API.
+        
+        Equivalent of deploy.sh's `docker run -d --restart unless-stopped
+        --cpus --memory --ulimit nproc=2048 --ulimit nofile=1024 --network
+        --dns=127.0.0.1 ...` with the .deb, pt_opt and /shared mounts; the
+        container joins `network` at creation, so no separate connect call
+        is needed.
+        
+        Args:
+            container_name: Name for the new container (e.g. ptvnc7)
+            pt_deb: Host path of CiscoPacketTracer.deb
+            shared_path: Host path mounted at /shared
+            network: Docker network to join
+            cpus: CPU limit (cores)
+            memory: Memory limit (e.g. '1G')
+            image: Image name
+        
+        Returns:
+            (container_id, error) - error is None on success and 'conflict'
+            when the name is already taken
+        """
+        try:
+            if not self.client:
+                return None, 'Docker client not initialized'
+            
+            memory_bytes = self._parse_memory_to_bytes(memory)
+            response = self.client.create_container(
+                name=container_name,
+                Image=image,
+                Env=['PT_DEB_PATH=/PacketTracer.deb'],
+                HostConfig={
+                    'RestartPolicy': {'Name': 'unless-stopped'},
+                    'NanoCpus': int(float(cpus) * 1e9),
+                    'Memory': memory_bytes,
+                    'Ulimits': [
+                        {'Name': 'nproc', 'Soft': 2048, 'Hard': 2048},
+                        {'Name': 'nofile', 'Soft': 1024, 'Hard': 1024}
+                    ],
+                    'NetworkMode': network,
+                    'Dns': ['127.0.0.1'],
+                    'Binds': [f'{pt_deb}:/PacketTracer.deb:ro', 'pt_opt:/opt/pt'],
+                    'Mounts': [{
+                        'Type': 'bind',
+                        'Source': shared_path,
+                        'Target': '/shared',
+                        'BindOptions': {'Propagation': 'rprivate'}
+                    }]
+                }
+            )
+            
+            if not isinstance(response, dict) or 'Id' not in response:
+                message = response.get('message', '') if isinstance(response, dict) else str(response)
+                if 'already in use' in message:
+                    return None, 'conflict'
+                logger.error(f"✗ Failed to create container {container_name}: {message}")
+                return None, message or 'Container creation failed'
+            
+            container_id = response['Id']
+            if self.index:
+                self.index.record(container_name, container_id)
+            
+            if not self.client.start_container(container_id):
+                logger.error(f"✗ Created {container_name} but failed to start it")
+                return container_id, 'Container start failed'
+            
+            logger.info(f"✓ Created and started container {container_name} ({container_id[:12]}) on {network}")
+            return container_id, None
+        except Exception as e:
+            logger.error(f"✗ Failed to create container {container_name}: {e}")
+            return None, str(e)
+    
+    def rename_container(self, container_name, new_name):
+        """
+        Rename a container, keeping the name index in step.
+        
+        Renaming by the current name makes this an atomic claim: if another
+        process renamed the container first, Docker answers 404.
+        
+        Returns:
+            (container_id, error) - error is None on success, 'not_found' when
+            container_name no longer exists and 'conflict' when new_name is taken
+        """
+        try:
+            if not self.client:
+                return None, 'Docker client not initialized'
+            
+            container_id = self._resolve_container_id(container_name)
+            status_code = self.client.rename_container(container_name, new_name)
+            if status_code == 404:
+                return None, 'not_found'
+            if status_code == 409:
+                return None, 'conflict'
+            if status_code not in [200, 204]:
+                return None, f'Rename failed (HTTP {status_code})'
+            
+            if self.index:
+                self.index.forget(container_name)
+                container_id = container_id or self.index.resolve(new_name)
+                if container_id:
+                    self.index.record(new_name, container_id)
+            logger.info(f"✓ Renamed container {container_name} to {new_name}")
+            return container_id, None
+        except Exception as e:
+            logger.error(f"✗ Failed to rename container {container_name}: {e}")
+            return None, str(e)
+    
     def start_container(self, container_name):
         """Start a stopped container using Docker socket API"""
         try:
@@ -404,14 +1234,7 @@ class DockerManager:
                 logger.error("✗ Docker client not initialized")
                 return False
             
-            # Get container ID first
-            containers = self.client.list_containers(all=True)
-            container_id = None
-            for c in containers:
-                names = c.get('Names', [])
-                if any(name.endswith(container_name) or name.endswith('/' + container_name) for name in names):
-                    container_id = c.get('Id')
-                    break
+            container_id = self._resolve_container_id(container_name)
             
             if not container_id:
                 logger.error(f"✗ Container {container_name} not found")
@@ -435,14 +1258,7 @@ class DockerManager:
                 logger.error("✗ Docker client not initialized")
                 return False
             
-            # Get container ID first
-            containers = self.client.list_containers(all=True)
-            container_id = None
-            for c in containers:
-                names = c.get('Names', [])
-                if any(name.endswith(container_name) or name.endswith('/' + container_name) for name in names):
-                    container_id = c.get('Id')
-                    break
+            container_id = self._resolve_container_id(container_name)
             
             if not container_id:
                 logger.error(f"✗ Container {container_name} not found")
@@ -459,6 +1275,50 @@ class DockerManager:
             logger.error(f"✗ Failed to stop container {container_name}: {e}")
             return False
     
+    def pause_container(self, container_name):
+        """Pause a running container using Docker socket API"""
+        try:
+            if not self.client:
+                logger.error("✗ Docker client not initialized")
+                return False
+            
+            container_id = self._resolve_container_id(container_name)
+            
+            if not container_id:
+                logger.error(f"✗ Container {container_name} not found")
+                return False
+            
+            if self.client.pause_container(container_id):
+                logger.info(f"✓ Paused container {container_name}")
+                return True
+            logger.error(f"✗ Failed to pause container {container_name}")
+            return False
+        except Exception as e:
+            logger.error(f"✗ Failed to pause container {container_name}: {e}")
+            return False
+    
+    def unpause_container(self, container_name):
+        """Unpause a paused container using Docker socket API"""
+        try:
+            if not self.client:
+                logger.error("✗ Docker client not initialized")
+                return False
+            
+            container_id = self._resolve_container_id(container_name)
+            
+            if not container_id:
+                logger.error(f"✗ Container {container_name} not found")
+                return False
+            
+            if self.client.unpause_container(container_id):
+                logger.info(f"✓ Unpaused container {container_name}")
+                return True
+            logger.error(f"✗ Failed to unpause container {container_name}")
+            return False
+        except Exception as e:
+            logger.error(f"✗ Failed to unpause container {container_name}: {e}")
+            return False
+    
     def restart_container(self, container_name):
         """Restart a container using Docker socket API"""
         try:
@@ -466,23 +1326,13 @@ class DockerManager:
                 logger.error("✗ Docker client not initialized")
                 return False
             
-            # Get container ID first
-            containers = self.client.list_containers(all=True)
-            container_id = None
-            for c in containers:
-                names = c.get('Names', [])
-                if any(name.endswith(container_name) or name.endswith('/' + container_name) for name in names):
-                    container_id = c.get('Id')
-                    break
+            container_id = self._resolve_container_id(container_name)
             
             if not container_id:
                 logger.error(f"✗ Container {container_name} not found")
                 return False
             
-            # Stop then start the container
-            self.client.stop_container(container_id)
-            time.sleep(1)  # Give it a moment to stop
-            result = self.client.start_container(container_id)
+            result = self.client.restart_container(container_id)
             
             if result:
                 logger.info(f"✓ Restarted container {container_name}")
@@ -495,60 +1345,165 @@ class DockerManager:
             return False
     
     def exec_in_container(self, container_name, cmd_list):
-        """Execute a command inside a container using Docker API"""
+        """Execute a command inside a container using Docker API; True if it exited 0"""
+        exit_code, stdout, stderr = self.exec_run(container_name, cmd_list)
+        if exit_code == 0:
+            logger.info(f"✓ Executed command in {container_name}: {' '.join(cmd_list)}")
+            return True
+        if exit_code is None:
+            logger.error(f"✗ Failed to exec in container {container_name}: {stderr}")
+        else:
+            logger.error(f"✗ Command in {container_name} exited {exit_code}: {stderr.strip()[-500:]}")
+        return False
+    
+    @staticmethod
+    def batch_script(steps):
+        """
+        Build one bash script running steps in order, stopping at the first failure.
+        
+        Args:
+            steps: Commands, each an argument list (quoted for the shell) or a shell string
+        
+        Returns:
+            Script text; a failing step prints 'step N failed (exit X): <command>'
+            to stderr and the script exits with the step's status
+        """
+        lines = []
+        for number, step in enumerate(steps, 1):
+            command = step if isinstance(step, str) else shlex.join(step)
+            lines.append(
+                f"{command} || {{ rc=$?; printf 'step %d failed (exit %d): %s\\n' {number} \"$rc\" "
+                f"{shlex.quote(command)} >&2; exit $rc; }}"
+            )
+        return '\n'.join(lines)
+    
+    def exec_batch(self, container_name, steps):
+        """
+        Run several setup steps inside a container with a single exec.
+        
+        Args:
+            container_name: Name of the container
+            steps: Commands (argument lists or shell strings), see batch_script()
+        
+        Returns:
+            (exit_code, stdout, stderr) like exec_run()
+        """
+        return self.exec_run(container_name, ['bash', '-c', self.batch_script(steps)])
+    
+    def exec_run(self, container_name, cmd_list):
+        """
+        Run a command inside a container and capture its output.
+        
+        Returns:
+            (exit_code, stdout, stderr) with the output decoded as text;
+            exit_code is None if the command could not be run
+        """
         try:
-            # Get container ID
-            containers = self.list_containers()
-            container_id = None
-            for c in containers:
-                if c.get('name') == container_name or c.get('id').startswith(container_name):
-                    container_id = c.get('id')
-                    break
+            container_id = self._resolve_container_id(container_name)
+            if not container_id:
+                return None, '', f'Container {container_name} not found'
             
+            exit_code, stdout, stderr = self.client.exec_run(container_id, cmd_list)
+            if exit_code is None:
+                return None, '', stderr.decode('utf-8', errors='replace') or f'Could not exec in {container_name}'
+            return exit_code, stdout.decode('utf-8', errors='replace'), stderr.decode('utf-8', errors='replace')
+        except Exception as e:
+            logger.warning(f"⚠ Failed to exec in container {container_name}: {e}")
+            return None, '', str(e)
+    
+    def copy_to_container(self, container_name, dest_path, content, mode=0o644):
+        """
+        Write a file into a container (like docker cp) through the archive API.
+        
+        Args:
+            container_name: Name of the container
+            dest_path: Absolute path of the file inside the container
+            content: File content (str or bytes)
+            mode: Permission bits of the file
+        
+        Returns:
+            True if successful, False otherwise
+        """
+        try:
+            container_id = self._resolve_container_id(container_name)
             if not container_id:
-                logger.error(f"✗ Container {container_name} not found for exec")
+                logger.error(f"✗ Container {container_name} not found")
                 return False
             
-            # Create exec instance
-            exec_result = self.client.exec_create(container_id, cmd_list)
-            if not exec_result or 'Id' not in exec_result:
-                logger.error(f"✗ Failed to create exec instance in {container_name}")
-                return False
+            data = content.encode('utf-8') if isinstance(content, str) else content
+            buffer = io.BytesIO()
+            with tarfile.open(fileobj=buffer, mode='w') as archive:
+                info = tarfile.TarInfo(os.path.basename(dest_path))
+                info.size = len(data)
+                info.mode = mode
+                info.mtime = int(time.time())
+                archive.addfile(info, io.BytesIO(data))
             
-            # Start exec instance
-            exec_id = exec_result['Id']
-            start_result = self.client.exec_start(exec_id)
-            logger.info(f"✓ Executed command in {container_name}: {' '.join(cmd_list)}")
+            if not self.client.put_archive(container_id, os.path.dirname(dest_path) or '/', buffer.getvalue()):
+                logger.error(f"✗ Failed to copy {dest_path} into {container_name}")
+                return False
+            logger.info(f"✓ Copied {dest_path} into {container_name}")
             return True
-            
         except Exception as e:
-            logger.error(f"✗ Failed to exec in container {container_name}: {e}")
+            logger.error(f"✗ Failed to copy {dest_path} into {container_name}: {e}")
             return False
     
-    def delete_container(self, container_name, force=False):
-        """Delete a container using Docker socket API"""
+    def connect_network(self, container_name, network):
+        """
+        Connect a container to a Docker network.
+        
+        Returns:
+            True if connected (or it already was), False otherwise
+        """
         try:
-            # Get container info first
-            containers = self.list_containers()
-            container_id = None
-            for c in containers:
-                if c.get('name') == container_name or c.get('id').startswith(container_name):
-                    container_id = c.get('id')
-                    break
+            status_code, response = self.client.connect_network(network, container_name)
+            if status_code == 200:
+                logger.info(f"✓ Connected {container_name} to {network} network")
+                return True
+            message = response.get('message', '') if isinstance(response, dict) else ''
+            if 'already exists' in message:
+                logger.info(f"ℹ {container_name} is already connected to {network}")
+                return True
+            logger.warning(f"⚠ Failed to connect {container_name} to {network}: {message or status_code}")
+            return False
+        except Exception as e:
+            logger.warning(f"⚠ Error connecting {container_name} to {network}: {e}")
+            return False
+    
+    def delete_container(self, container_name, force=False, stop_first=True):
+        """
+        Delete a container using Docker socket API.
+        
+        Args:
+            container_name: Name of the container
+            force: Remove it even if it is still running (kills it)
+            stop_first: Stop it gracefully before removing; teardowns that
+                force-remove skip this to avoid the stop timeout
+        
+        Returns:
+            True if the container was removed, False otherwise
+        """
+        try:
+            container_id = self._resolve_container_id(container_name)
             
             if not container_id:
                 logger.error(f"✗ Container {container_name} not found")
                 return False
             
             # Stop container if running
-            try:
-                response = self.client.stop_container(container_id)
-                logger.info(f"Stopped container {container_name}")
-            except Exception as e:
-                logger.warning(f"Could not stop container: {e}")
+            if stop_first:
+                try:
+                    response = self.client.stop_container(container_id)
+                    logger.info(f"Stopped container {container_name}")
+                except Exception as e:
+                    logger.warning(f"Could not stop container: {e}")
             
             # Delete the container via socket API
-            response = self.client.remove_container(container_id, force=force)
+            if not self.client.remove_container(container_id, force=force):
+                logger.error(f"✗ Docker refused to remove container {container_name}")
+                return False
+            if self.index:
+                self.index.forget(container_name)
             logger.info(f"✓ Deleted container {container_name}")
             return True
             
@@ -556,7 +1511,7 @@ class DockerManager:
             logger.error(f"✗ Failed to delete container {container_name}: {e}")
             return False
     
-    def update_container_resources(self, container_name, memory, cpus):
+    def update_container_resources(self, container_name, memory, cpus, container_id=None):
         """
         Update memory and CPU limits for a container using Docker socket API.
         
@@ -564,6 +1519,7 @@ class DockerManager:
             container_name: Name of the container
             memory: Memory limit (e.g., '512M', '1G', '2048M')
             cpus: CPU limit (e.g., '1', '2', '0.5')
+            container_id: Container ID if already known (skips the name lookup)
         
         Returns:
             True if successful, False otherwise
@@ -573,14 +1529,7 @@ class DockerManager:
                 logger.error("✗ Docker client not initialized")
                 return False
             
-            # Get container ID first
-            containers = self.client.list_containers(all=True)
-            container_id = None
-            for c in containers:
-                names = c.get('Names', [])
-                if any(name.endswith(container_name) or name.endswith('/' + container_name) for name in names):
-                    container_id = c.get('Id')
-                    break
+            container_id = container_id or self._resolve_container_id(container_name)
             
             if not container_id:
                 logger.error(f"✗ Container {container_name} not found")
@@ -656,47 +1605,50 @@ class DockerManager:
                 logger.error("✗ Docker client not initialized")
                 return None
             
-            # Get container ID first
-            containers = self.client.list_containers(all=True)
-            container_id = None
-            for c in containers:
-                names = c.get('Names', [])
-                if any(name.endswith(container_name) or name.endswith('/' + container_name) for name in names):
-                    container_id = c.get('Id')
-                    break
+            state = self._live_state()
+            record = state.get(container_name) if state else None
+            if record:
+                return {
+                    'name': container_name,
+                    'memory': record['memory'],
+                    'cpus': record['cpus'],
+                    'memory_bytes': record['memory_bytes'],
+                    'nano_cpus': record['nano_cpus']
+                }
+            
+            container_id = self._resolve_container_id(container_name)
             
             if not container_id:
                 logger.warning(f"⚠ Container {container_name} not found")
                 return None
             
             # Inspect the container to get resource limits
-            path = f"/v1.41/containers/{container_id}/json"
-            status_code, response = self.client._send_request("GET", path)
+            response = self.client.inspect_container(container_id)
             
-            if status_code != 200 or not response:
+            if not response:
                 logger.warning(f"⚠ Failed to inspect {container_name}")
                 return None
             
-            # Extract resource limits
-            host_config = response.get('HostConfig', {})
-            memory_bytes = host_config.get('Memory', 0)
-            nano_cpus = host_config.get('NanoCpus', 0)
-            
-            # Convert to human-readable format
-            memory_str = self._format_bytes_to_memory(memory_bytes)
-            cpus_str = self._format_nanoseconds_to_cpus(nano_cpus)
-            
-            return {
-                'name': container_name,
-                'memory': memory_str,
-                'cpus': cpus_str,
-                'memory_bytes': memory_bytes,
-                'nano_cpus': nano_cpus
-            }
+            return self._resources_from_inspect(container_name, response)
         except Exception as e:
             logger.error(f"✗ Failed to get container resources for {container_name}: {e}")
             return None
     
+    def _resources_from_inspect(self, container_name, inspect_data):
+        """Build the resources dict from docker inspect output"""
+        host_config = inspect_data.get('HostConfig', {}) or {}
+        memory_bytes = host_config.get('Memory', 0) or 0
+        nano_cpus = host_config.get('NanoCpus', 0) or 0
+        
+        # Convert to human-readable format
+        return {
+            'name': container_name,
+            'memory': self._format_bytes_to_memory(memory_bytes),
+            'cpus': self._format_nanoseconds_to_cpus(nano_cpus),
+            'memory_bytes': memory_bytes,
+            'nano_cpus': nano_cpus
+        }
+    
     def _format_bytes_to_memory(self, bytes_value):
         """Convert bytes to human-readable memory format"""
         if bytes_value == 0:
@@ -727,7 +1679,20 @@ class DockerManager:
             Dict with total running, stopped, and resource usage
         """
         try:
-            containers = self.list_containers(all=True)
+            state = self._live_state()
+            if state:
+                # Counters maintained by the events-driven cache - no Docker call
+                version, counts = state.counts()
+                total = sum(counts.values())
+                return {
+                    'total': total,
+                    'running': counts.get('running', 0),
+                    'stopped': total - counts.get('running', 0),
+                    'pt_containers': total,
+                    'version': version
+                }
+            
+            containers = self.list_containers(all=True, with_resources=False)
             
             running = sum(1 for c in containers if c.get('status') == 'running')
             stopped = len(containers) - running
@@ -737,7 +1702,8 @@ class DockerManager:
                 'total': len(containers),
                 'running': running,
                 'stopped': stopped,
-                'pt_containers': pt_containers
+                'pt_containers': pt_containers,
+                'version': self.state_version()
             }
         except Exception as e:
             logger.error(f"✗ Failed to get stats: {e}")
@@ -0,0 +1,146 @@
+"""Docker events watcher - background subscriber to the daemon's /events stream
+
+One watcher runs per process (gunicorn worker). It keeps a single
+streaming connection to /events filtered to container and network events, decodes the
+newline-delimited JSON incrementally and hands each event to registered
+listeners. Each time Docker accepts the subscription, and before any event
+is read from it, listeners get a synthetic 'resync' event: events may have
+been missed while disconnected, and anything that changes during their
+resync is delivered on the new stream afterwards. When the stream drops it
+reconnects with exponential backoff.
+"""
+
+import os
+import json
+import logging
+import threading
+import time
+from urllib.parse import quote
+
+logger = logging.getLogger(__name__)
+
+# Synthetic action sent to listeners after (re)connecting
+RESYNC = 'resync'
+
+# Set DOCKER_EVENTS_ENABLED=false to disable the background subscription
+EVENTS_ENABLED = os.environ.get('DOCKER_EVENTS_ENABLED', 'true').lower() in ('true', '1', 'yes', 'on')
+
+
+class DockerEventWatcher:
+    """Streams container/network events from Docker and dispatches them to listeners"""
+    
+    def __init__(self, client):
+        """
+        Args:
+            client: DockerSocketClient used to open the event stream
+        """
+        self.client = client
+        self.connected = False
+        self.events_seen = 0
+        self.last_event_at = None
+        self._listeners = []
+        self._lock = threading.Lock()
+        self._thread = None
+        self._stop = threading.Event()
+    
+    def add_listener(self, callback):
+        """Register callback(event_dict); it is called on the watcher thread"""
+        with self._lock:
+            if callback not in self._listeners:
+                self._listeners.append(callback)
+    
+    def remove_listener(self, callback):
+        """Unregister a callback"""
+        with self._lock:
+            if callback in self._listeners:
+                self._listeners.remove(callback)
+    
+    def start(self):
+        """Start the background thread (no-op if already running or disabled)"""
+        if not EVENTS_ENABLED:
+            return
+        with self._lock:
+            if self._thread and self._thread.is_alive():
+                return
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name='docker-events', daemon=True)
+            self._thread.start()
+    
+    def stop(self):
+        """Ask the background thread to exit after the current read"""
+        self._stop.set()
+    
+    def _dispatch(self, event):
+        """Hand one event to every listener, isolating listener failures"""
+        with self._lock:
+            listeners = list(self._listeners)
+        for callback in listeners:
+            try:
+                callback(event)
+            except Exception as e:
+                logger.error(f"✗ Docker event listener failed: {e}")
+    
+    def _run(self):
+        """Subscribe to /events, reconnecting with backoff until stopped"""
+        filters = quote(json.dumps({'type': ['container', 'network']}), safe='')
+        path = f"/v1.41/events?filters={filters}"
+        backoff = 1
+        
+        def subscribed():
+            # The subscription is live, so changes from here on reach the stream
+            nonlocal backoff
+            self.connected = True
+            backoff = 1
+            logger.info("✓ Subscribed to Docker events stream")
+            self._dispatch({'Action': RESYNC})
+        
+        while not self._stop.is_set():
+            try:
+                stream = self.client.stream_json("GET", path, on_open=subscribed)
+                for event in stream:
+                    self.events_seen += 1
+                    self.last_event_at = time.time()
+                    self._dispatch(event)
+                    if self._stop.is_set():
+                        stream.close()
+                        break
+                
+                logger.warning("⚠ Docker events stream ended")
+            except Exception as e:
+                logger.warning(f"⚠ Docker events stream failed: {e}")
+            finally:
+                self.connected = False
+            
+            if self._stop.wait(backoff):
+                break
+            backoff = min(backoff * 2, 30)
+    
+    def status(self):
+        """Connection state and counters"""
+        return {
+            'connected': self.connected,
+            'events_seen': self.events_seen,
+            'last_event_at': self.last_event_at
+        }
+
+
+_watcher = None
+_watcher_pid = None
+_watcher_lock = threading.Lock()
+
+
+def get_event_watcher(client):
+    """
+    Get the process-wide event watcher, creating it on first use.
+    Register listeners before calling start() on it.
+    
+    Args:
+        client: DockerSocketClient used if the watcher has to be created
+    """
+    global _watcher, _watcher_pid
+    pid = os.getpid()
+    with _watcher_lock:
+        if _watcher is None or _watcher_pid != pid:
+            _watcher = DockerEventWatcher(client)
+            _watcher_pid = pid
+        return _watcher
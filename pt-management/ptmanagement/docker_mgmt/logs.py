@@ -0,0 +1,315 @@
+"""Incremental reading of Docker container log streams
+
+/containers/{id}/logs multiplexes stdout and stderr of non-TTY containers
+into frames: an 8-byte header (stream type, 3 padding bytes, big-endian
+payload size) followed by the payload. Frames are split arbitrarily across
+HTTP chunks and lines can span frames, so both are buffered until complete.
+Containers with a TTY send their output raw, without frames (all stdout).
+
+LogDemuxer is the one parser for every log path (the log endpoints and
+DockerManager.get_container_logs). feed_lines() demultiplexes and splits in
+one pass: a frame holding one complete line is sliced out of the chunk once,
+and only frames cut by a chunk boundary or holding several or partial lines
+go through LineSplitter. On a whole body it keeps up with the old slicing
+parser, and streamed it never holds more than a chunk
+(see benchmarks/bench_log_demux.py).
+
+Logs are requested with timestamps=1, so every line starts with an RFC 3339
+timestamp (nanosecond precision). The timestamp of the last line sent is the
+stream's cursor: passed back as `since` it resumes right after that line.
+"""
+
+import re
+import socket
+import struct
+import calendar
+import logging
+import queue
+import threading
+from datetime import datetime
+
+logger = logging.getLogger(__name__)
+
+# Stream type, 3 padding bytes, big-endian payload size
+HEADER = struct.Struct('>BxxxL')
+STREAM_NAMES = {0: 'stdin', 1: 'stdout', 2: 'stderr'}
+
+# Cursor / since value: Unix seconds with up to nanosecond fraction
+CURSOR_PATTERN = re.compile(r'^\d+(\.\d{1,9})?$')
+
+
+class LogDemuxer:
+    """Splits a log byte stream into frames, or straight into lines"""
+    
+    def __init__(self, tty=False):
+        """
+        Args:
+            tty: The container has a TTY - its output is not framed
+        """
+        self.tty = tty
+        self._pending = bytearray()  # start of a frame cut off at the end of a chunk
+    
+    def feed(self, chunk):
+        """
+        Add bytes from the wire and return the (stream name, payload) frames they completed.
+        
+        Payloads are memoryviews of chunk (or of a copy, for a frame that
+        straddled chunks); they stay valid after later feed() calls.
+        """
+        if self.tty:
+            return [('stdout', memoryview(chunk))] if chunk else []
+        
+        frames = []
+        offset = 0
+        if self._pending:
+            frame, offset = self._complete_pending(chunk)
+            if frame is None:
+                return frames
+            frames.append((frame[0], memoryview(frame[1])))
+        
+        view = memoryview(chunk)
+        end_of_chunk = len(view)
+        while end_of_chunk - offset >= HEADER.size:
+            stream, size = HEADER.unpack_from(view, offset)
+            end = offset + HEADER.size + size
+            if end > end_of_chunk:
+                break
+            frames.append((STREAM_NAMES.get(stream, 'stdout'), view[offset + HEADER.size:end]))
+            offset = end
+        if offset < end_of_chunk:
+            self._pending += view[offset:]
+        return frames
+    
+    def feed_lines(self, chunk, splitter):
+        """
+        Add bytes from the wire and return the (stream name, line bytes) pairs they completed.
+        
+        Demultiplexes and splits in one pass. A frame holding exactly one
+        complete line (the common case) is sliced out of the chunk once,
+        without its newline; only frames with several or partial lines, and
+        frames cut by a chunk boundary, go through splitter.
+        
+        Args:
+            chunk: Bytes from the wire
+            splitter: LineSplitter holding the unfinished line of each stream
+        """
+        if not isinstance(chunk, bytes):
+            chunk = bytes(chunk)
+        lines = []
+        if self.tty:
+            if chunk:
+                lines.extend(splitter.feed('stdout', chunk))
+            return lines
+        
+        offset = 0
+        if self._pending:
+            frame, offset = self._complete_pending(chunk)
+            if frame is None:
+                return lines
+            lines.extend(splitter.feed(*frame))
+        
+        append = lines.append
+        unpack_from = HEADER.unpack_from
+        find = chunk.find
+        partial = splitter.partial
+        end_of_chunk = len(chunk)
+        while end_of_chunk - offset >= HEADER.size:
+            stream, size = unpack_from(chunk, offset)
+            start = offset + HEADER.size
+            end = start + size
+            if end > end_of_chunk:
+                break
+            name = STREAM_NAMES.get(stream, 'stdout')
+            if size and chunk[end - 1] == 10 and name not in partial and find(b'\n', start, end - 1) < 0:
+                append((name, chunk[start:end - 1]))
+            else:
+                lines.extend(splitter.feed(name, chunk[start:end]))
+            offset = end
+        if offset < end_of_chunk:
+            self._pending += chunk[offset:]
+        return lines
+    
+    def _complete_pending(self, chunk):
+        """
+        Fill the pending frame from the front of chunk.
+        
+        Returns:
+            (frame, offset) - the completed (stream name, payload bytes), or
+            None if chunk ran out first, and where the rest of chunk starts
+        """
+        pending = self._pending
+        offset = 0
+        if len(pending) < HEADER.size:
+            offset = HEADER.size - len(pending)
+            pending += chunk[:offset]
+            if len(pending) < HEADER.size:
+                return None, len(chunk)
+        stream, size = HEADER.unpack_from(pending)
+        needed = HEADER.size + size - len(pending)
+        pending += chunk[offset:offset + needed]
+        if len(pending) < HEADER.size + size:
+            return None, len(chunk)
+        self._pending = bytearray()
+        return (STREAM_NAMES.get(stream, 'stdout'), bytes(pending[HEADER.size:])), offset + needed
+    
+    @property
+    def truncated(self):
+        """True if the stream ended in the middle of a frame"""
+        return bool(self._pending)
+
+
+class LineSplitter:
+    """Reassembles lines that span frames, separately per stream"""
+    
+    def __init__(self):
+        self.partial = {}  # stream name -> bytes of an unfinished line
+    
+    def feed(self, stream, payload):
+        """Return the (stream, line bytes) pairs completed by a payload"""
+        partial = self.partial.pop(stream, None)
+        data = partial + payload if partial else bytes(payload)
+        lines = data.split(b'\n')
+        if lines[-1]:
+            self.partial[stream] = lines[-1]
+        return [(stream, line) for line in lines[:-1]]
+    
+    def flush(self):
+        """Return whatever unfinished lines are left (end of stream)"""
+        lines = [(stream, line) for stream, line in self.partial.items() if line]
+        self.partial = {}
+        return lines
+
+
+def split_lines(data, tty=False):
+    """
+    Demultiplex a complete (non-streamed) log body into lines.
+    
+    Returns:
+        List of (stream name, line bytes) in the order Docker sent them
+    """
+    demuxer = LogDemuxer(tty)
+    splitter = LineSplitter()
+    lines = demuxer.feed_lines(data, splitter)
+    lines.extend(splitter.flush())
+    if demuxer.truncated:
+        logger.warning("⚠ Log stream ended inside a frame; dropped the partial frame")
+    return lines
+
+
+def timestamp_cursor(timestamp):
+    """
+    Cursor just after an RFC 3339 log timestamp.
+    
+    Docker's `since` is inclusive, so the cursor is one nanosecond later to
+    resume after the line instead of repeating it.
+    
+    Args:
+        timestamp: e.g. '2024-01-01T12:00:00.123456789Z'
+    
+    Returns:
+        'seconds.nanoseconds' string, or None if unparseable
+    """
+    stamp, _, fraction = timestamp.rstrip('Z').partition('.')
+    try:
+        seconds = calendar.timegm(datetime.fromisoformat(stamp).timetuple())
+        nanos = int(fraction.ljust(9, '0')[:9] or 0)
+    except ValueError:
+        return None
+    total = seconds * 1_000_000_000 + nanos + 1
+    return f"{total // 1_000_000_000}.{total % 1_000_000_000:09d}"
+
+
+def _entry(stream, line):
+    """Decode one timestamped line into an entry dict"""
+    text = line.decode('utf-8', errors='replace').rstrip('\r')
+    timestamp, _, message = text.partition(' ')
+    return {'stream': stream, 'time': timestamp, 'line': message}
+
+
+def iter_log_batches(chunks, tty=False):
+    """
+    Turn the raw chunks of a timestamped log stream into batches.
+    
+    Yields:
+        (entries, cursor) per chunk that completed at least one line; entries
+        are dicts with stream, time and line, cursor resumes after the last one
+    """
+    demuxer = LogDemuxer(tty)
+    splitter = LineSplitter()
+    for chunk in chunks:
+        entries = [_entry(stream, line) for stream, line in demuxer.feed_lines(chunk, splitter)]
+        if entries:
+            yield entries, timestamp_cursor(entries[-1]['time'])
+    entries = [_entry(stream, line) for stream, line in splitter.flush()]
+    if entries:
+        yield entries, timestamp_cursor(entries[-1]['time'])
+
+
+class LogTail:
+    """
+    Reads a container's log stream on a background thread.
+    
+    The consumer polls get() with a timeout, so it can send keep-alives while
+    a followed container is quiet, and close() aborts the blocked read when
+    the consumer goes away.
+    """
+    
+    def __init__(self, client, path, tty=False):
+        self.client = client
+        self.path = path
+        self.tty = tty
+        self._batches = queue.Queue()
+        self._connection = None
+        self._closed = False
+        self._thread = threading.Thread(target=self._read, name='log-tail', daemon=True)
+    
+    def start(self):
+        self._thread.start()
+        return self
+    
+    def _connected(self, connection):
+        self._connection = connection
+        if self._closed:
+            self._abort()
+    
+    def _read(self):
+        try:
+            chunks = self.client.stream("GET", self.path, on_connect=self._connected)
+            for batch in iter_log_batches(chunks, self.tty):
+                if self._closed:
+                    break
+                self._batches.put(batch)
+        except Exception as e:
+            if not self._closed:
+                logger.warning(f"⚠ Log stream {self.path} failed: {e}")
+                self._batches.put(e)
+        finally:
+            self._batches.put(None)
+    
+    def get(self, timeout):
+        """
+        Next (entries, cursor) batch.
+        
+        Returns:
+            The batch, or None once the stream has ended
+        
+        Raises:
+            queue.Empty if nothing arrived within timeout
+            The reader's exception if the stream failed
+        """
+        batch = self._batches.get(timeout=timeout)
+        if isinstance(batch, Exception):
+            raise batch
+        return batch
+    
+    def _abort(self):
+        try:
+            self._connection.sock.shutdown(socket.SHUT_RDWR)
+        except (AttributeError, OSError):
+            pass
+    
+    def close(self):
+        """Stop reading (unblocks a follow stream waiting for new lines)"""
+        self._closed = True
+        if self._connection is not None:
+            self._abort()
@@ -0,0 +1,253 @@
+"""Readiness of Packet Tracer desktops
+
+A ptvnc container is running well before its desktop can be used: Xvfb and
+the VNC server start one after the other and the Packet Tracer runtime
+installer may still be unpacking. A Guacamole session opened in that window
+just fails. A desktop counts as ready once
+
+    vnc           the VNC server answers with the RFB protocol banner on 5901
+    pt_installed  /start has finished the runtime installer (/tmp/pt-install.done)
+
+Both are checked by one exec inside the container, so the probe works
+whatever networks pt-management shares with the container. wait_ready()
+repeats it with exponential backoff (READINESS_BACKOFF doubling up to
+READINESS_BACKOFF_MAX) until READINESS_TIMEOUT; a Docker start, restart or
+unpause event for the container cuts the current delay short.
+
+A ready container gets a marker file named after its ID in READINESS_DIR,
+which all gunicorn workers share, so a desktop is probed until ready once
+rather than per worker. The marker holds the container's start time. Every
+worker drops the marker on the container's start/stop/die/pause events.
+After an events reconnect a worker re-inspects the marked containers and
+drops only the markers of those that are gone, stopped, paused or were
+restarted while events were missed, so one worker's reconnect does not
+send every desktop back to probing.
+
+Settings (environment variables):
+    READINESS_TIMEOUT       Seconds wait_ready() gives a desktop (default 300)
+    READINESS_BACKOFF       First delay between probes in seconds (default 0.5)
+    READINESS_BACKOFF_MAX   Longest delay between probes in seconds (default 8)
+    READINESS_DIR           Shared marker directory (default /tmp/ptweb-readiness)
+"""
+
+import os
+import logging
+import threading
+import time
+
+from ptmanagement.docker_mgmt.events import RESYNC, get_event_watcher
+
+logger = logging.getLogger(__name__)
+
+TIMEOUT = float(os.environ.get('READINESS_TIMEOUT', '300'))
+BACKOFF = float(os.environ.get('READINESS_BACKOFF', '0.5'))
+BACKOFF_MAX = float(os.environ.get('READINESS_BACKOFF_MAX', '8'))
+MARKER_DIR = os.environ.get('READINESS_DIR', '/tmp/ptweb-readiness')
+
+VNC_PORT = 5901
+INSTALL_MARKER = '/tmp/pt-install.done'
+
+# Exit 2: no RFB banner yet, exit 3: Packet Tracer still installing
+EXIT_VNC_DOWN = 2
+EXIT_INSTALLING = 3
+PROBE_CMD = ['bash', '-c', (
+    f'exec 2>/dev/null 3<>/dev/tcp/127.0.0.1/{VNC_PORT} || exit {EXIT_VNC_DOWN}; '
+    f'IFS= read -r -t 2 -n 4 banner <&3; [ "$banner" = "RFB " ] || exit {EXIT_VNC_DOWN}; '
+    f'[ -f {INSTALL_MARKER} ] || exit {EXIT_INSTALLING}'
+)]
+
+# Events after which a desktop has to be probed again
+RESET_EVENTS = {'start', 'restart', 'stop', 'die', 'kill', 'pause', 'destroy'}
+# Events after which a waiting probe should not sit out its backoff
+WAKE_EVENTS = {'start', 'restart', 'unpause'}
+
+
+class ReadinessTracker:
+    """Probes ptvnc desktops for a usable VNC session and remembers ready ones"""
+    
+    def __init__(self, docker_mgr, timeout=TIMEOUT, backoff=BACKOFF, backoff_max=BACKOFF_MAX, directory=MARKER_DIR):
+        self.docker_mgr = docker_mgr
+        self.timeout = timeout
+        self.backoff = backoff
+        self.backoff_max = backoff_max
+        self.directory = directory
+        self._lock = threading.Lock()
+        self._waiters = {}     # container ID -> set of Events of wait_ready() calls
+        self._generation = {}  # container ID -> count of reset events seen
+        os.makedirs(directory, exist_ok=True)
+        
+        if docker_mgr.client:
+            get_event_watcher(docker_mgr.client).add_listener(self._on_event)
+    
+    def _marker(self, container_id):
+        return os.path.join(self.directory, container_id)
+    
+    def _clear(self, container_id):
+        try:
+            os.unlink(self._marker(container_id))
+        except FileNotFoundError:
+            pass
+    
+    def _mark_ready(self, container_id, started_at):
+        """Write the marker, holding the start time, in one step (other workers read it)"""
+        path = self._marker(container_id)
+        temp = f"{path}.{os.getpid()}.tmp"
+        with open(temp, 'w') as f:
+            f.write(started_at)
+        os.replace(temp, path)
+    
+    def _resync(self):
+        """Drop the markers of containers whose state changed while events were missed"""
+        for container_id in os.listdir(self.directory):
+            if container_id.endswith('.tmp'):
+                continue
+            try:
+                with open(self._marker(container_id)) as f:
+                    started_at = f.read()
+            except FileNotFoundError:
+                continue
+            try:
+                state = (self.docker_mgr.client.inspect_container(container_id) or {}).get('State') or {}
+            except Exception as e:
+                logger.warning(f"⚠ Could not inspect {container_id[:12]} after events reconnect: {e}")
+                state = {}
+            # Gone, stopped, paused or restarted since it was found ready
+            if not state.get('Running') or state.get('Paused') or state.get('StartedAt') != started_at:
+                self._clear(container_id)
+    
+    def _on_event(self, event):
+        """Forget readiness on (re)start/stop and wake waiters of started containers"""
+        if event.get('Action') == RESYNC:
+            self._resync()
+            return
+        if event.get('Type') != 'container':
+            return
+        action = (event.get('Action') or '').split(':')[0]
+        container_id = (event.get('Actor') or {}).get('ID')
+        if not container_id:
+            return
+        
+        if action in RESET_EVENTS:
+            with self._lock:
+                self._generation[container_id] = self._generation.get(container_id, 0) + 1
+            self._clear(container_id)
+        if action in WAKE_EVENTS:
+            with self._lock:
+                waiters = list(self._waiters.get(container_id, ()))
+            for wake in waiters:
+                wake.set()
+    
+    def is_ready(self, container_id):
+        """Whether a container was found ready since it last started (no probe)"""
+        return bool(container_id) and os.path.exists(self._marker(container_id))
+    
+    def check(self, container_name, container_id=None):
+        """
+        Readiness of a desktop, probing it unless it is already known ready.
+        
+        Args:
+            container_name: Container name (or ID)
+            container_id: Full container ID, if the caller already knows it
+        
+        Returns:
+            Dict with ready, status ('ready', 'starting', 'installing',
+            'not_running' or 'not_found'), vnc and pt_installed
+        """
+        container_id = container_id or self.docker_mgr._resolve_container_id(container_name)
+        if not container_id:
+            return {'ready': False, 'status': 'not_found', 'vnc': False, 'pt_installed': False}
+        if self.is_ready(container_id):
+            return {'ready': True, 'status': 'ready', 'vnc': True, 'pt_installed': True}
+        
+        with self._lock:
+            generation = self._generation.get(container_id, 0)
+        try:
+            # By ID straight through the client: the name index only knows names,
+            # so resolving an ID would relist every container
+            exit_code, _, _ = self.docker_mgr.client.exec_run(container_id, PROBE_CMD)
+        except Exception as e:
+            logger.warning(f"⚠ Readiness probe of {container_name} failed: {e}")
+            exit_code = None
+        if exit_code == 0:
+            try:
+                info = self.docker_mgr.client.inspect_container(container_id) or {}
+            except Exception:
+                info = {}
+            # An unknown start time is dropped at the next events reconnect
+            started_at = (info.get('State') or {}).get('StartedAt', '')
+            with self._lock:
+                # Not if the container stopped or restarted while being probed
+                if self._generation.get(container_id, 0) == generation:
+                    self._mark_ready(container_id, started_at)
+            return {'ready': True, 'status': 'ready', 'vnc': True, 'pt_installed': True}
+        if exit_code == EXIT_INSTALLING:
+            return {'ready': False, 'status': 'installing', 'vnc': True, 'pt_installed': False}
+        if exit_code is None:
+            # exec is refused while the container is not running
+            return {'ready': False, 'status': 'not_running', 'vnc': False, 'pt_installed': False}
+        return {'ready': False, 'status': 'starting', 'vnc': False, 'pt_installed': None}
+    
+    def wait_ready(self, container_name, timeout=None, container_id=None):
+        """
+        Probe a desktop with exponential backoff until it is ready.
+        
+        Args:
+            container_name: Container name (or ID)
+            timeout: Seconds to give it (default READINESS_TIMEOUT)
+            container_id: Full container ID, if the caller already knows it
+        
+        Returns:
+            The last check() result, plus waited (seconds); on time-out
+            ready is False and status tells what was still missing
+        """
+        timeout = self.timeout if timeout is None else timeout
+        started = time.monotonic()
+        deadline = started + timeout
+        container_id = container_id or self.docker_mgr._resolve_container_id(container_name)
+        if not container_id:
+            return {'ready': False, 'status': 'not_found', 'vnc': False, 'pt_installed': False, 'waited': 0}
+        
+        wake = threading.Event()
+        with self._lock:
+            self._waiters.setdefault(container_id, set()).add(wake)
+        try:
+            delay = self.backoff
+            while True:
+                result = self.check(container_name, container_id)
+                remaining = deadline - time.monotonic()
+                if result['ready'] or result['status'] == 'not_found' or remaining <= 0:
+                    break
+                if wake.wait(min(delay, remaining)):
+                    # (Re)started - probe right away and back off from the start again
+                    wake.clear()
+                    delay = self.backoff
+                else:
+                    delay = min(delay * 2, self.backoff_max)
+        finally:
+            with self._lock:
+                waiters = self._waiters.get(container_id)
+                if waiters is not None:
+                    waiters.discard(wake)
+                    if not waiters:
+                        del self._waiters[container_id]
+        
+        result['waited'] = round(time.monotonic() - started, 2)
+        if not result['ready']:
+            logger.warning(f"⚠ {container_name} not ready after {result['waited']}s ({result['status']})")
+        return result
+
+
+_tracker = None
+_tracker_pid = None
+_tracker_lock = threading.Lock()
+
+
+def get_readiness_tracker(docker_mgr):
+    """Get the readiness tracker for the current worker process, creating it on first use"""
+    global _tracker, _tracker_pid
+    pid = os.getpid()
+    with _tracker_lock:
+        if _tracker is None or _tracker_pid != pid:
+            _tracker = ReadinessTracker(docker_mgr)
+            _tracker_pid = pid
+        return _tracker
@@ -0,0 +1,58 @@
+"""Decoding of Docker /containers/{id}/stats samples into usage figures
+
+CPU usage is a rate, so it needs two samples: the container's cumulative
+CPU time and the host's are both counters, and their deltas give the share
+of the host the container used in between. One-shot samples (no precpu
+data) are therefore diffed against the caller's previous sample.
+"""
+
+
+def cpu_cores(previous, current):
+    """
+    CPU cores used between two samples (0.5 = half a core).
+    
+    Returns:
+        Float, or None if there is no usable baseline
+    """
+    if not previous or not current:
+        return None
+    cpu = current.get('cpu_stats') or {}
+    pre = previous.get('cpu_stats') or {}
+    cpu_delta = (cpu.get('cpu_usage') or {}).get('total_usage', 0) - (pre.get('cpu_usage') or {}).get('total_usage', 0)
+    system_delta = cpu.get('system_cpu_usage', 0) - pre.get('system_cpu_usage', 0)
+    if cpu_delta < 0 or system_delta <= 0:
+        return None
+    online_cpus = cpu.get('online_cpus') or len((cpu.get('cpu_usage') or {}).get('percpu_usage') or []) or 1
+    return cpu_delta / system_delta * online_cpus
+
+
+def memory_usage(sample):
+    """Memory in use in bytes, excluding reclaimable page cache (as `docker stats` shows it)"""
+    memory = (sample or {}).get('memory_stats') or {}
+    usage = memory.get('usage', 0) or 0
+    stats = memory.get('stats') or {}
+    # cgroup v2 reports inactive_file, cgroup v1 total_inactive_file / cache
+    cache = stats.get('inactive_file', stats.get('total_inactive_file', stats.get('cache', 0))) or 0
+    return max(usage - cache, 0)
+
+
+def summarize(previous, current):
+    """
+    Usage summary of one container between two samples.
+    
+    Returns:
+        Dict with cpu_cores, cpu_percent (of one core), memory_bytes,
+        memory_limit, pids, rx_bytes and tx_bytes (cumulative)
+    """
+    cores = cpu_cores(previous, current)
+    memory = current.get('memory_stats') or {}
+    networks = current.get('networks') or {}
+    return {
+        'cpu_cores': cores,
+        'cpu_percent': round(cores * 100, 2) if cores is not None else None,
+        'memory_bytes': memory_usage(current),
+        'memory_limit': memory.get('limit'),
+        'pids': (current.get('pids_stats') or {}).get('current'),
+        'rx_bytes': sum(n.get('rx_bytes', 0) for n in networks.values()),
+        'tx_bytes': sum(n.get('tx_bytes', 0) for n in networks.values())
+    }
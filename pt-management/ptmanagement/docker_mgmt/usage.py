@@ -0,0 +1,199 @@
+"""Live resource usage of ptvnc containers
+
+get_container_resources only reports configured limits. The usage collector
+keeps one Docker stats stream open per running ptvnc container (Docker
+pushes a sample about every second) and records a point every
+METRICS_SAMPLE_SECONDS into a per-container ring buffer of
+METRICS_HISTORY points: CPU, memory in use, pids and network rates.
+
+Streams are opened on the first metrics request in a worker process and
+closed again after METRICS_IDLE_SECONDS without one, so an unwatched
+dashboard costs nothing. A supervisor thread matches streams to the set of
+running containers every few seconds; a stream also ends on its own when
+its container stops.
+
+Settings (environment variables):
+    METRICS_SAMPLE_SECONDS  Seconds between recorded points (default 5)
+    METRICS_HISTORY         Points kept per container (default 360 - 30 minutes)
+    METRICS_IDLE_SECONDS    Stop streaming after this long without requests (default 600)
+"""
+
+import os
+import logging
+import threading
+import time
+from collections import deque
+
+from .stats import summarize
+
+logger = logging.getLogger(__name__)
+
+SAMPLE_SECONDS = float(os.environ.get('METRICS_SAMPLE_SECONDS', '5'))
+HISTORY = int(os.environ.get('METRICS_HISTORY', '360'))
+IDLE_SECONDS = float(os.environ.get('METRICS_IDLE_SECONDS', '600'))
+
+# Seconds between supervisor passes (new/stopped containers)
+SUPERVISE_SECONDS = 5
+# A container is 'hot' when it used at least this share of its CPU limit ...
+HOT_CPU_SHARE = 0.9
+# ... on average over this window
+HOT_WINDOW_SECONDS = 60
+
+
+class UsageCollector:
+    """Streams Docker stats for every running ptvnc container into ring buffers"""
+    
+    def __init__(self, docker_mgr, sample_seconds=SAMPLE_SECONDS, history=HISTORY, idle_seconds=IDLE_SECONDS):
+        self.docker_mgr = docker_mgr
+        self.sample_seconds = sample_seconds
+        self.history = history
+        self.idle_seconds = idle_seconds
+        self._buffers = {}  # container name -> deque of points
+        self._streams = {}  # container name -> streaming thread
+        self._limits = {}  # container name -> CPU limit in cores (0 = unlimited)
+        self._lock = threading.Lock()
+        self._last_request = 0
+        self._supervisor = None
+    
+    def touch(self):
+        """Note a metrics request, starting collection if it is not running"""
+        self._last_request = time.monotonic()
+        with self._lock:
+            if self._supervisor and self._supervisor.is_alive():
+                return
+            self._supervisor = threading.Thread(target=self._supervise, name='usage-supervisor', daemon=True)
+            self._supervisor.start()
+        logger.info("ℹ Started container usage collection")
+    
+    def _idle(self):
+        return time.monotonic() - self._last_request > self.idle_seconds
+    
+    def _supervise(self):
+        """Open streams for new running containers until nobody asks for metrics"""
+        while not self._idle():
+            try:
+                containers = self.docker_mgr.list_containers(all=False)
+                running = {c['name']: c for c in containers if c.get('status') == 'running'}
+                with self._lock:
+                    for name, container in running.items():
+                        self._limits[name] = (container.get('nano_cpus') or 0) / 1e9
+                        thread = self._streams.get(name)
+                        if thread is None or not thread.is_alive():
+                            thread = threading.Thread(
+                                target=self._stream, args=(name, container['id']),
+                                name=f'usage-{name}', daemon=True
+                            )
+                            self._streams[name] = thread
+                            thread.start()
+                    # Drop the history of containers that stopped (their stream has ended)
+                    for name in [n for n in self._buffers if n not in running and n not in self._streams]:
+                        del self._buffers[name]
+                        self._limits.pop(name, None)
+                    for name in [n for n, t in self._streams.items() if not t.is_alive()]:
+                        del self._streams[name]
+            except Exception as e:
+                logger.error(f"✗ Usage supervisor failed: {e}")
+            time.sleep(SUPERVISE_SECONDS)
+        logger.info("ℹ Stopped container usage collection (no metrics requests)")
+    
+    def _stream(self, name, container_id):
+        """Read one container's stats stream, recording a point every sample_seconds"""
+        last_recorded = 0
+        previous_point = None
+        try:
+            stream = self.docker_mgr.client.stream_json("GET", f"/v1.41/containers/{container_id}/stats?stream=true")
+            for sample in stream:
+                if self._idle():
+                    stream.close()
+                    break
+                now = time.time()
+                if now - last_recorded < self.sample_seconds:
+                    continue
+                last_recorded = now
+                
+                # Streamed samples carry the previous reading as precpu_stats
+                point = summarize({'cpu_stats': sample.get('precpu_stats')}, sample)
+                point['t'] = now
+                if previous_point:
+                    elapsed = now - previous_point['t']
+                    point['rx_rate'] = max(point['rx_bytes'] - previous_point['rx_bytes'], 0) / elapsed
+                    point['tx_rate'] = max(point['tx_bytes'] - previous_point['tx_bytes'], 0) / elapsed
+                previous_point = point
+                
+                with self._lock:
+                    buffer = self._buffers.get(name)
+                    if buffer is None:
+                        buffer = self._buffers[name] = deque(maxlen=self.history)
+                    buffer.append(point)
+        except Exception as e:
+            logger.warning(f"⚠ Stats stream for {name} ended: {e}")
+    
+    def history_for(self, name, points=None):
+        """
+        Recorded points of one container, oldest first.
+        
+        Returns:
+            List of point dicts, or None if nothing was recorded for the container
+        """
+        with self._lock:
+            buffer = self._buffers.get(name)
+            if buffer is None:
+                return None
+            history = list(buffer)
+        return history[-points:] if points else history
+    
+    def _is_hot(self, name, history):
+        """True if the container sat near its CPU limit for the whole hot window"""
+        limit = self._limits.get(name)
+        window = [p for p in history if p['t'] >= time.time() - HOT_WINDOW_SECONDS]
+        cpu = [p['cpu_cores'] for p in window if p.get('cpu_cores') is not None]
+        if not limit or len(cpu) < 2 or history[0]['t'] > time.time() - HOT_WINDOW_SECONDS:
+            return False
+        return sum(cpu) / len(cpu) >= HOT_CPU_SHARE * limit
+    
+    def summary(self):
+        """
+        Latest point of every container plus totals and CPU-bound ('hot') containers.
+        
+        Returns:
+            Dict with containers (name -> latest point), totals, top_cpu and hot
+        """
+        with self._lock:
+            histories = {name: list(buffer) for name, buffer in self._buffers.items() if buffer}
+            streaming = sum(1 for t in self._streams.values() if t.is_alive())
+        
+        latest = {name: dict(history[-1], cpu_limit=self._limits.get(name)) for name, history in histories.items()}
+        totals = {
+            'containers': len(latest),
+            'cpu_cores': round(sum(p['cpu_cores'] or 0 for p in latest.values()), 3),
+            'memory_bytes': sum(p['memory_bytes'] or 0 for p in latest.values()),
+            'pids': sum(p['pids'] or 0 for p in latest.values()),
+            'rx_rate': sum(p.get('rx_rate', 0) for p in latest.values()),
+            'tx_rate': sum(p.get('tx_rate', 0) for p in latest.values())
+        }
+        top_cpu = sorted(latest, key=lambda n: latest[n]['cpu_cores'] or 0, reverse=True)[:10]
+        return {
+            'collecting': self._supervisor is not None and self._supervisor.is_alive(),
+            'streams': streaming,
+            'sample_seconds': self.sample_seconds,
+            'containers': latest,
+            'totals': totals,
+            'top_cpu': top_cpu,
+            'hot': sorted(name for name, history in histories.items() if self._is_hot(name, history))
+        }
+
+
+_collector = None
+_collector_pid = None
+_collector_lock = threading.Lock()
+
+
+def get_usage_collector(docker_mgr):
+    """Get the usage collector for the current worker process, creating it on first use"""
+    global _collector, _collector_pid
+    pid = os.getpid()
+    with _collector_lock:
+        if _collector is None or _collector_pid != pid:
+            _collector = UsageCollector(docker_mgr)
+            _collector_pid = pid
+        return _collector
@@ -0,0 +1,146 @@
+"""Prometheus metrics for pt-management
+
+Exposed on GET /metrics (internal addresses or a logged-in session):
+
+    ptweb_http_request_duration_seconds{endpoint,method,status}
+    ptweb_db_query_duration_seconds{call_site}     execute_query calls and transaction() blocks, by calling function
+    ptweb_db_query_errors_total{call_site}
+    ptweb_docker_api_duration_seconds{operation}   DockerSocketClient, by client method
+    ptweb_docker_api_errors_total{operation}
+    ptweb_containers{state}                        ptvnc containers, counted from Docker at scrape time
+    ptweb_job_queue_depth / ptweb_jobs_running     background jobs waiting / executing
+    ptweb_jobs_total{kind,outcome}
+
+Every gunicorn worker records its own samples. With PROMETHEUS_MULTIPROC_DIR
+set (the Dockerfile does) prometheus_client keeps them in files in that
+directory and a scrape of any worker aggregates all of them; gunicorn.conf.py
+empties the directory on startup and retires the gauges of dead workers.
+"""
+
+import os
+import sys
+import time
+import logging
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST, REGISTRY, CollectorRegistry, Counter, Gauge, Histogram,
+    generate_latest, multiprocess
+)
+from prometheus_client.core import GaugeMetricFamily
+
+logger = logging.getLogger(__name__)
+
+MULTIPROC_DIR = os.environ.get('PROMETHEUS_MULTIPROC_DIR')
+if MULTIPROC_DIR:
+    os.makedirs(MULTIPROC_DIR, exist_ok=True)
+
+# Docker and MariaDB calls are mostly sub-10ms; requests and jobs span seconds
+FAST_BUCKETS = (.001, .0025, .005, .01, .025, .05, .1, .25, .5, 1, 2.5, 5, 10)
+
+HTTP_REQUEST_SECONDS = Histogram(
+    'ptweb_http_request_duration_seconds', 'Time spent handling a request, by Flask endpoint',
+    ['endpoint', 'method', 'status']
+)
+DB_QUERY_SECONDS = Histogram(
+    'ptweb_db_query_duration_seconds',
+    'execute_query call or transaction() block latency (including pool wait), by calling function',
+    ['call_site'], buckets=FAST_BUCKETS
+)
+DB_QUERY_ERRORS = Counter(
+    'ptweb_db_query_errors_total', 'execute_query calls or transactions that failed, by calling function',
+    ['call_site']
+)
+DOCKER_API_SECONDS = Histogram(
+    'ptweb_docker_api_duration_seconds', 'Docker socket API latency, by client method',
+    ['operation'], buckets=FAST_BUCKETS
+)
+DOCKER_API_ERRORS = Counter(
+    'ptweb_docker_api_errors_total', 'Docker API calls that failed or returned 5xx, by client method', ['operation']
+)
+JOB_QUEUE_DEPTH = Gauge(
+    'ptweb_job_queue_depth', 'Background jobs waiting for a job worker thread', multiprocess_mode='livesum'
+)
+JOBS_RUNNING = Gauge(
+    'ptweb_jobs_running', 'Background jobs currently executing', multiprocess_mode='livesum'
+)
+JOBS_TOTAL = Counter(
+    'ptweb_jobs_total', 'Background jobs that ended, by kind and outcome', ['kind', 'outcome']
+)
+
+# Every state Docker reports, so absent states show up as 0 rather than vanish
+CONTAINER_STATES = ('created', 'running', 'paused', 'restarting', 'removing', 'exited', 'dead')
+
+
+def call_site(depth=1):
+    """
+    Name of a calling function as 'module.function'.
+    
+    Args:
+        depth: 1 = the caller of the function that calls call_site()
+    """
+    frame = sys._getframe(depth + 1)
+    module = frame.f_globals.get('__name__', '?').rsplit('.', 1)[-1]
+    return f"{module}.{frame.f_code.co_name}"
+
+
+def instrument_app(app):
+    """Time every request of a Flask app by endpoint"""
+    from flask import g, request
+    
+    @app.before_request
+    def _start_request_timer():
+        g.metrics_started = time.perf_counter()
+    
+    @app.after_request
+    def _observe_request(response):
+        started = g.pop('metrics_started', None)
+        if started is not None:
+            HTTP_REQUEST_SECONDS.labels(
+                request.endpoint or 'unmatched', request.method, response.status_code
+            ).observe(time.perf_counter() - started)
+        return response
+
+
+class ContainerStateCollector:
+    """Counts containers by state with one Docker list call per scrape"""
+    
+    def __init__(self, docker_mgr):
+        self.docker_mgr = docker_mgr
+    
+    def collect(self):
+        family = GaugeMetricFamily('ptweb_containers', 'Packet Tracer (ptvnc) containers, by state', labels=['state'])
+        try:
+            containers = self.docker_mgr.list_containers(all=True, with_resources=False)
+        except Exception as e:
+            logger.warning(f"⚠ Could not count containers for metrics: {e}")
+            containers = None
+        if containers is not None:
+            counts = dict.fromkeys(CONTAINER_STATES, 0)
+            for container in containers:
+                state = container.get('status') or 'unknown'
+                counts[state] = counts.get(state, 0) + 1
+            for state, count in counts.items():
+                family.add_metric([state], count)
+        yield family
+
+
+_container_registry = None
+
+
+def render_metrics(docker_mgr):
+    """
+    Current metrics in the Prometheus text format.
+    
+    Returns:
+        (body_bytes, content_type)
+    """
+    global _container_registry
+    if MULTIPROC_DIR:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    if _container_registry is None:
+        _container_registry = CollectorRegistry()
+        _container_registry.register(ContainerStateCollector(docker_mgr))
+    return generate_latest(registry) + generate_latest(_container_registry), CONTENT_TYPE_LATEST
@@ -40,6 +40,57 @@ async function apiRequest(endpoint, method = 'GET', data = null) {
     }
 }
 
+/**
+ * Poll a background job until it finishes
+ *
+ * onProgress(job) is called after every poll. Resolves with the finished
+ * job, or null if it could not be followed.
+ */
+async function trackJob(jobId, onProgress = null, intervalMs = 1000) {
+    let misses = 0;
+    while (true) {
+        await new Promise(resolve => setTimeout(resolve, intervalMs));
+
+        const response = await fetch(`${API_URL}/jobs/${jobId}`, { headers: { 'Accept': 'application/json' } });
+        if (!response.ok) {
+            // Another worker process may have answered - retry a few times
+            if (++misses > 10) {
+                console.warn(`Lost track of job ${jobId}`);
+                return null;
+            }
+            continue;
+        }
+
+        const result = await response.json();
+        if (onProgress) {
+            onProgress(result.job);
+        }
+        if (!['queued', 'running'].includes(result.job.status)) {
+            return result.job;
+        }
+    }
+}
+
+/**
+ * Resolve an API response that may have started a background job
+ *
+ * Responses with a job_id are followed to completion and replaced by the
+ * job's result, so callers handle both shapes the same way.
+ */
+async function awaitJobResult(result, onProgress = null) {
+    if (!result || !result.job_id) {
+        return result;
+    }
+    const job = await trackJob(result.job_id, onProgress);
+    if (!job) {
+        return { success: false, error: 'Lost track of the background job' };
+    }
+    if (job.status !== 'finished') {
+        return { success: false, error: job.error || `Job ${job.status}` };
+    }
+    return job.result;
+}
+
 /**
  * Show notification message
  */
@@ -78,16 +129,22 @@ function showNotification(message, type = 'info') {
  */
 async function loadUsers() {
     const result = await apiRequest('/users');
-    
-    if (!result || !result.success) {
+    renderUsers(result && result.success ? (result.users || []) : null);
+}
+
+/**
+ * Populate the users table (null shows the empty state)
+ */
+function renderUsers(users) {
+    if (!users) {
         document.getElementById('users-table').style.display = 'none';
         document.getElementById('users-empty').style.display = 'block';
         document.getElementById('users-loading').style.display = 'none';
         return;
     }
 
-    const users = result.users || [];
     const tbody = document.getElementById('users-tbody');
+    const selected = checkedRowKeys(tbody, '.user-checkbox', 'data-username');
     tbody.innerHTML = '';
 
     if (users.length === 0) {
@@ -127,6 +184,7 @@ async function loadUsers() {
         
         tbody.appendChild(row);
     });
+    restoreCheckedRows(tbody, '.user-checkbox', 'data-username', selected);
 
     document.getElementById('users-table').style.display = 'table';
     document.getElementById('users-empty').style.display = 'none';
@@ -172,16 +230,22 @@ async function deleteUser(username) {
  */
 async function loadContainers() {
     const result = await apiRequest('/containers');
-    
-    if (!result || !result.success) {
+    renderContainers(result && result.success ? (result.containers || []) : null);
+}
+
+/**
+ * Populate the containers table (null shows the empty state)
+ */
+function renderContainers(containers) {
+    if (!containers) {
         document.getElementById('containers-table').style.display = 'none';
         document.getElementById('containers-empty').style.display = 'block';
         document.getElementById('containers-loading').style.display = 'none';
         return;
     }
 
-    const containers = result.containers || [];
     const tbody = document.getElementById('containers-tbody');
+    const selected = checkedRowKeys(tbody, '.container-checkbox', 'data-container-name');
     tbody.innerHTML = '';
 
     if (containers.length === 0) {
@@ -241,6 +305,7 @@ async function loadContainers() {
         `;
         tbody.appendChild(row);
     });
+    restoreCheckedRows(tbody, '.container-checkbox', 'data-container-name', selected);
 
     document.getElementById('containers-table').style.display = 'table';
     document.getElementById('containers-empty').style.display = 'none';
@@ -391,16 +456,171 @@ async function loadStats() {
         return;
     }
 
-    document.getElementById('stat-users').textContent = result.users.total || 0;
-    document.getElementById('stat-containers').textContent = result.containers.total || 0;
-    document.getElementById('stat-running').textContent = result.containers.running || 0;
-    document.getElementById('stat-stopped').textContent = result.containers.stopped || 0;
+    renderStats(result);
+}
+
+/**
+ * Load stats, users and containers with a single request
+ */
+async function loadOverview() {
+    const result = await apiRequest('/overview');
+
+    if (!result || !result.success) {
+        renderUsers(null);
+        renderContainers(null);
+        return;
+    }
+
+    renderStats(result.stats);
+    renderUsers(result.users);
+    renderContainers(result.containers);
+}
+
+/**
+ * Update the statistics cards
+ */
+function renderStats(stats) {
+    document.getElementById('stat-users').textContent = stats.users.total || 0;
+    document.getElementById('stat-containers').textContent = stats.containers.total || 0;
+    document.getElementById('stat-running').textContent = stats.containers.running || 0;
+    document.getElementById('stat-stopped').textContent = stats.containers.stopped || 0;
+}
+
+/**
+ * Keys of the checked rows in a table body (so re-rendering keeps the selection)
+ */
+function checkedRowKeys(tbody, checkboxSelector, keyAttribute) {
+    const keys = new Set();
+    tbody.querySelectorAll(`${checkboxSelector}:checked`).forEach(cb => {
+        keys.add(cb.closest('tr').getAttribute(keyAttribute));
+    });
+    return keys;
+}
+
+/**
+ * Re-check rows whose key is in keys
+ */
+function restoreCheckedRows(tbody, checkboxSelector, keyAttribute, keys) {
+    if (keys.size === 0) {
+        return;
+    }
+    tbody.querySelectorAll(checkboxSelector).forEach(cb => {
+        if (keys.has(cb.closest('tr').getAttribute(keyAttribute))) {
+            cb.checked = true;
+        }
+    });
+}
+
+/**
+ * pt-management log tail: an EventSource on the streaming logs endpoint
+ */
+const logState = {
+    source: null,
+    lines: 0
+};
+
+/**
+ * Render one log line, color coded by log level
+ */
+function logLineHtml(line) {
+    if (!line.trim()) {
+        return '\n';
+    }
+
+    let className = '';
+    if (line.includes(' - ERROR') || line.includes('✗')) {
+        className = 'text-danger';
+    } else if (line.includes(' - WARNING') || line.includes('⚠')) {
+        className = 'text-warning';
+    } else if (line.includes(' - INFO') || line.includes('✓')) {
+        className = 'text-success';
+    } else if (line.includes(' - DEBUG')) {
+        className = 'text-info';
+    }
+
+    return className
+        ? `<div class="${className}">${escapeHtml(line)}</div>`
+        : `<div>${escapeHtml(line)}</div>`;
+}
+
+/**
+ * Append streamed lines, keeping only the selected number on screen
+ */
+function appendLogLines(lines) {
+    const container = document.getElementById('logs-container');
+    const max = parseInt(document.getElementById('logLines').value, 10);
+    const atBottom = container.scrollHeight - container.scrollTop - container.clientHeight < 20;
+
+    if (logState.lines === 0) {
+        container.innerHTML = '';
+    }
+    container.insertAdjacentHTML('beforeend', lines.map(logLineHtml).join(''));
+    logState.lines += lines.length;
+    while (logState.lines > max && container.firstChild) {
+        container.removeChild(container.firstChild);
+        logState.lines--;
+    }
+
+    if (atBottom || logState.lines === lines.length) {
+        container.scrollTop = container.scrollHeight;
+    }
+}
+
+/**
+ * Stop following the logs
+ */
+function stopLogStream() {
+    if (logState.source) {
+        logState.source.close();
+        logState.source = null;
+    }
 }
 
 /**
  * Load and display logs
+ *
+ * Streams the last N lines and, with auto-refresh on, keeps following new
+ * ones; only new lines cross the wire. Falls back to a one-off fetch
+ * without EventSource.
  */
 async function refreshLogs() {
+    if (!window.EventSource) {
+        return loadLogsOnce();
+    }
+
+    const lines = document.getElementById('logLines').value;
+    const autoRefresh = document.getElementById('autoRefresh');
+    const follow = !autoRefresh || autoRefresh.checked;
+
+    stopLogStream();
+    logState.lines = 0;
+    document.getElementById('logs-container').innerHTML = '<div class="text-center text-muted py-4">Loading logs...</div>';
+
+    const source = new EventSource(`${API_URL}/containers/pt-management/logs/stream?tail=${lines}&follow=${follow ? 1 : 0}`);
+    logState.source = source;
+
+    source.addEventListener('logs', (e) => {
+        appendLogLines(JSON.parse(e.data).lines.map(entry => entry.line));
+    });
+
+    source.addEventListener('end', () => {
+        // Finished (no follow, or the container stopped) - don't let EventSource reconnect
+        source.close();
+        if (logState.lines === 0) {
+            document.getElementById('logs-container').innerHTML = '<div class="text-muted">No logs available</div>';
+        }
+    });
+
+    source.addEventListener('failed', () => {
+        source.close();
+        document.getElementById('logs-container').innerHTML = '<div class="text-danger">Failed to load logs</div>';
+    });
+}
+
+/**
+ * Fetch the last N log lines once (browsers without EventSource)
+ */
+async function loadLogsOnce() {
     const lines = document.getElementById('logLines').value;
     const container = document.getElementById('logs-container');
     
@@ -412,37 +632,7 @@ async function refreshLogs() {
             return;
         }
         
-        // Format logs with syntax highlighting for log levels
-        const logs = result.logs || '';
-        const logLines = logs.split('\n');
-        
-        let html = '';
-        logLines.forEach(line => {
-            if (!line.trim()) {
-                html += '\n';
-                return;
-            }
-            
-            // Color code by log level
-            let className = '';
-            if (line.includes(' - ERROR') || line.includes('✗')) {
-                className = 'text-danger';
-            } else if (line.includes(' - WARNING') || line.includes('⚠')) {
-                className = 'text-warning';
-            } else if (line.includes(' - INFO') || line.includes('✓')) {
-                className = 'text-success';
-            } else if (line.includes(' - DEBUG')) {
-                className = 'text-info';
-            }
-            
-            if (className) {
-                html += `<div class="${className}">${escapeHtml(line)}</div>`;
-            } else {
-                html += `<div>${escapeHtml(line)}</div>`;
-            }
-        });
-        
-        container.innerHTML = html;
+        container.innerHTML = (result.logs || '').split('\n').map(logLineHtml).join('');
         container.scrollTop = container.scrollHeight; // Scroll to bottom
     } catch (error) {
         console.error('Error loading logs:', error);
@@ -468,6 +658,7 @@ function escapeHtml(text) {
  * Clear logs display
  */
 function clearLogs() {
+    logState.lines = 0;
     document.getElementById('logs-container').innerHTML = '<div class="text-center text-muted py-4">Logs cleared</div>';
 }
 
@@ -491,7 +682,7 @@ async function runHealthCheck() {
     runBtn.innerHTML = '<i class="bi bi-hourglass-split"></i> Running...';
     
     try {
-        const result = await apiRequest('/health-check', 'POST');
+        const result = await awaitJobResult(await apiRequest('/health-check', 'POST'));
         
         if (!result || !result.success) {
             outputDiv.innerHTML = `<div class="text-danger">Error: ${result?.error || 'Unknown error'}</div>`;
@@ -537,42 +728,112 @@ async function runHealthCheck() {
  * Refresh all data
  */
 async function refreshAll() {
-    await loadStats();
-    await loadUsers();
-    await loadContainers();
-    await refreshLogs();
+    await loadOverview();
+    if (!logState.source) {
+        await refreshLogs();
+    }
+}
+
+/**
+ * Live dashboard state, kept current by server-sent events from /api/events
+ */
+const liveState = {
+    users: new Map(),
+    containers: new Map(),
+    pollTimer: null
+};
+
+function byNaturalKey(key) {
+    return (a, b) => a[key].localeCompare(b[key], undefined, { numeric: true });
+}
+
+function applyLiveDelta(map, delta, key) {
+    (delta.removed || []).forEach(name => map.delete(name));
+    (delta.upserted || []).forEach(item => map.set(item[key], item));
+}
+
+function renderLiveUsers() {
+    renderUsers([...liveState.users.values()].sort(byNaturalKey('username')));
+}
+
+function renderLiveContainers() {
+    renderContainers([...liveState.containers.values()].sort(byNaturalKey('name')));
+}
+
+/**
+ * Fall back to polling every 10 seconds (no EventSource, or the stream was refused)
+ */
+function startPolling() {
+    if (liveState.pollTimer) {
+        return;
+    }
+    refreshAll();
+    liveState.pollTimer = setInterval(refreshAll, 10000);
+}
+
+/**
+ * Subscribe to /api/events; returns false if the browser has no EventSource
+ */
+function startLiveUpdates() {
+    if (!window.EventSource) {
+        return false;
+    }
+
+    const source = new EventSource(`${API_URL}/events`);
+
+    source.addEventListener('snapshot', (e) => {
+        const data = JSON.parse(e.data);
+        liveState.users = new Map(data.users.map(u => [u.username, u]));
+        liveState.containers = new Map(data.containers.map(c => [c.name, c]));
+        renderStats(data.stats);
+        renderLiveUsers();
+        renderLiveContainers();
+    });
+
+    source.addEventListener('users', (e) => {
+        applyLiveDelta(liveState.users, JSON.parse(e.data), 'username');
+        renderLiveUsers();
+    });
+
+    source.addEventListener('containers', (e) => {
+        applyLiveDelta(liveState.containers, JSON.parse(e.data), 'name');
+        renderLiveContainers();
+    });
+
+    source.addEventListener('stats', (e) => {
+        renderStats(JSON.parse(e.data));
+    });
+
+    source.onerror = () => {
+        // EventSource retries dropped connections itself; CLOSED means it gave up
+        if (source.readyState === EventSource.CLOSED) {
+            console.warn('Live updates unavailable, falling back to polling');
+            startPolling();
+        }
+    };
+
+    return true;
 }
 
 // Load data on page ready
 document.addEventListener('DOMContentLoaded', () => {
-    refreshAll();
-    
-    // Refresh every 10 seconds
-    setInterval(refreshAll, 10000);
+    // Dashboard data is pushed by the server; poll only if that is unavailable
+    if (startLiveUpdates()) {
+        refreshLogs();
+    } else {
+        startPolling();
+    }
     
-    // Setup auto-refresh for logs
-    let logsRefreshInterval = null;
+    // Auto-refresh follows the log stream; unchecking it stops following
     const autoRefreshCheckbox = document.getElementById('autoRefresh');
     
     if (autoRefreshCheckbox) {
         autoRefreshCheckbox.addEventListener('change', (e) => {
             if (e.target.checked) {
-                // Start auto-refresh
-                logsRefreshInterval = setInterval(() => {
-                    refreshLogs();
-                }, 5000);
+                refreshLogs();
             } else {
-                // Stop auto-refresh
-                if (logsRefreshInterval) {
-                    clearInterval(logsRefreshInterval);
-                    logsRefreshInterval = null;
-                }
+                stopLogStream();
             }
         });
-        
-        // Start auto-refresh by default
-        logsRefreshInterval = setInterval(() => {
-            refreshLogs();
-        }, 5000);
     }
 });
@@ -252,6 +252,17 @@ document.getElementById('bulkCreateBtn')?.addEventListener('click', async functi
 
         const result = await apiRequest('/users', 'POST', { users: usersToCreate });
 
+        if (result && result.success && result.job_id) {
+            // Containers are provisioned in the background - follow the job
+            const job = await trackJob(result.job_id, (progress) => {
+                btn.innerHTML = `<span class="spinner-border spinner-border-sm"></span> Provisioning containers ${progress.done + progress.failed}/${progress.total}...`;
+            });
+            if (job) {
+                result.count_failed += job.failed;
+                result.count_created -= job.failed;
+            }
+        }
+
         if (result && result.success) {
             const message = createContainers 
                 ? `Created ${result.count_created} users with new containers${result.count_failed > 0 ? `, ${result.count_failed} failed` : ''}`
@@ -275,9 +286,7 @@ document.getElementById('bulkCreateBtn')?.addEventListener('click', async functi
             bootstrap.Modal.getInstance(document.getElementById('bulkCreateModal')).hide();
 
             // Refresh users and containers
-            await loadUsers();
-            await loadContainers();
-            await loadStats();
+            await loadOverview();
         }
     } finally {
         btn.disabled = false;
@@ -305,7 +314,12 @@ document.getElementById('bulkDeleteBtn')?.addEventListener('click', async functi
     btn.innerHTML = '<span class="spinner-border spinner-border-sm"></span> Deleting...';
 
     try {
-        const result = await apiRequest('/users/bulk/delete', 'POST', { users: csvDeleteData });
+        const result = await awaitJobResult(
+            await apiRequest('/users/bulk/delete', 'POST', { users: csvDeleteData }),
+            (job) => {
+                btn.innerHTML = `<span class="spinner-border spinner-border-sm"></span> Deleting... ${job.done + job.failed}/${job.total}`;
+            }
+        );
 
         if (result && result.success) {
             showNotification(
@@ -368,6 +382,19 @@ async function createNewContainer() {
             image: 'ptvnc'
         });
         
+        if (result && result.success && result.job_id) {
+            // Created in the background and registered once its desktop is ready
+            const job = await trackJob(result.job_id, (progress) => {
+                const stage = progress.items?.[0]?.stage || 'queued';
+                btn.innerHTML = `<span class="spinner-border spinner-border-sm"></span> ${result.container_name}: ${stage}...`;
+            });
+            const item = job?.items?.[0];
+            if (!item || item.status !== 'done') {
+                result.success = false;
+                result.message = item?.error || 'Lost track of the container creation job';
+            }
+        }
+        
         if (result && result.success) {
             statusDiv.innerHTML = `<div class="alert alert-success"><i class="bi bi-check-circle"></i> Container <strong>${result.container_name}</strong> created successfully!</div>`;
             
@@ -862,10 +889,15 @@ async function applyBulkTuning() {
     
     statusDiv.innerHTML = '<div class="spinner-border spinner-border-sm me-2" role="status"></div>Updating all containers...';
     
-    const result = await apiRequest('/containers/resources/bulk-update', 'PUT', {
-        memory: memory,
-        cpus: parseFloat(cpus)
-    });
+    const result = await awaitJobResult(
+        await apiRequest('/containers/resources/bulk-update', 'PUT', {
+            memory: memory,
+            cpus: parseFloat(cpus)
+        }),
+        (job) => {
+            statusDiv.innerHTML = `<div class="spinner-border spinner-border-sm me-2" role="status"></div>Updating all containers... ${job.done + job.failed}/${job.total}`;
+        }
+    );
     
     if (result && result.success) {
         statusDiv.innerHTML = `
@@ -0,0 +1,9 @@
+"""Shared pytest setup: run the tests from the pt-management directory
+
+    python -m pytest tests
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
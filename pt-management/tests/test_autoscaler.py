@@ -0,0 +1,31 @@
+"""Autoscaler budget sharing"""
+
+import pytest
+
+from ptmanagement.api.autoscaler import fit_to_budget
+
+
+def test_targets_within_budget_are_granted_as_asked():
+    targets = {'ptvnc3': 1.0, 'ptvnc4': 0.5}
+    assert fit_to_budget(targets, {'ptvnc3': 0.1, 'ptvnc4': 0.1}, budget=2.0) == targets
+
+
+def test_overrun_is_shared_out_above_the_floors():
+    targets = {'ptvnc3': 2.1, 'ptvnc4': 1.1, 'ptvnc5': 0.1}
+    floors = {'ptvnc3': 0.1, 'ptvnc4': 0.1, 'ptvnc5': 0.1}
+    
+    granted = fit_to_budget(targets, floors, budget=1.8)
+    assert sum(granted.values()) == pytest.approx(1.8)
+    # 1.5 above the floors split 2:1 like the requests above the floors
+    assert granted['ptvnc3'] == pytest.approx(1.1)
+    assert granted['ptvnc4'] == pytest.approx(0.6)
+    assert granted['ptvnc5'] == pytest.approx(0.1)
+
+
+def test_floors_are_kept_when_they_exceed_the_budget():
+    floors = {'ptvnc3': 0.5, 'ptvnc4': 0.5}
+    assert fit_to_budget({'ptvnc3': 1.0, 'ptvnc4': 1.0}, floors, budget=0.8) == floors
+
+
+def test_empty():
+    assert fit_to_budget({}, {}, budget=1.0) == {}
@@ -0,0 +1,77 @@
+"""Bulk operation filters"""
+
+import pytest
+
+from ptmanagement.api import bulk
+from ptmanagement.api.bulk import parse_filters, select_containers
+
+
+class FakeDockerManager:
+    def __init__(self, containers):
+        self.containers = containers
+        self.listings = 0
+    
+    def list_containers(self, all=False, with_resources=True):
+        self.listings += 1
+        return [dict(c) for c in self.containers]
+
+
+CONTAINERS = [
+    {'name': 'ptvnc1', 'status': 'running'},
+    {'name': 'ptvnc10', 'status': 'exited'},
+    {'name': 'ptvnc11', 'status': 'running'},
+    {'name': 'ptvnc2', 'status': 'created'},
+]
+
+
+def names(containers):
+    return [c['name'] for c in containers]
+
+
+def test_no_filters():
+    assert parse_filters({}) == ({}, None)
+    assert parse_filters(None) == ({}, None)
+    assert parse_filters({'filters': {'name': '', 'state': []}}) == ({}, None)
+
+
+def test_filters_are_normalized():
+    filters, error = parse_filters({'filters': {'name': ' ptvnc1* ', 'state': 'running', 'names': ['ptvnc2']}})
+    assert error is None
+    assert filters == {'name': 'ptvnc1*', 'state': ['running'], 'names': ['ptvnc2']}
+
+
+@pytest.mark.parametrize('raw, message', [
+    ('running', 'filters must be an object'),
+    ({'image': 'ptvnc'}, 'Unknown filter(s): image'),
+    ({'name': ['ptvnc1']}, 'Filter name must be a string'),
+    ({'names': ['ptvnc1', 3]}, 'Filter names must be a string or a list of strings'),
+    ({'state': ['running', 'sleeping']}, 'Unknown state(s): sleeping'),
+])
+def test_invalid_filters(raw, message):
+    filters, error = parse_filters({'filters': raw})
+    assert filters is None
+    assert error.startswith(message)
+
+
+def test_select_by_name_glob_and_state_from_one_listing():
+    docker_mgr = FakeDockerManager(CONTAINERS)
+    selected = select_containers(docker_mgr, {'name': 'ptvnc1*', 'state': ['running']})
+    assert names(selected) == ['ptvnc1', 'ptvnc11']
+    assert docker_mgr.listings == 1
+
+
+def test_select_by_explicit_names():
+    selected = select_containers(FakeDockerManager(CONTAINERS), {'names': ['ptvnc2', 'ptvnc10', 'missing']})
+    assert names(selected) == ['ptvnc10', 'ptvnc2']
+
+
+def test_select_by_user(monkeypatch):
+    monkeypatch.setattr(bulk, 'get_container_user_map', lambda: {
+        'ptvnc1': ['alice'], 'ptvnc11': ['bob', 'alice'], 'ptvnc2': ['bob']
+    })
+    selected = select_containers(FakeDockerManager(CONTAINERS), {'user': 'alice'})
+    assert names(selected) == ['ptvnc1', 'ptvnc11']
+
+
+def test_select_without_filters_returns_everything():
+    assert names(select_containers(FakeDockerManager(CONTAINERS), {})) == names(CONTAINERS)
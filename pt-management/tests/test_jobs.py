@@ -0,0 +1,67 @@
+"""Job progress and stored-job status"""
+
+import json
+import time
+
+import pytest
+
+from ptmanagement.api import jobs
+from ptmanagement.api.jobs import STALE_SECONDS, Job, _row_to_dict
+
+
+@pytest.fixture(autouse=True)
+def no_store(monkeypatch):
+    # Jobs report changes to the process's store, which writes to MariaDB
+    monkeypatch.setattr(jobs, '_job_changed', lambda job: None)
+
+
+def row(status, updated_ago, finished_at=None):
+    now = time.time()
+    return {
+        'job_id': 'abc', 'kind': 'bulk_delete', 'status': status,
+        'total': 2, 'done': 1, 'failed': 0,
+        'created_at': now - 600, 'updated_at': now - updated_ago, 'finished_at': finished_at,
+        'meta': json.dumps({'requested_by': 'admin'}),
+        'items': json.dumps([{'name': 'alice', 'status': 'done'}]),
+        'result': None, 'error': None
+    }
+
+
+@pytest.mark.parametrize('status', ['queued', 'running'])
+def test_silent_unfinished_job_is_interrupted(status):
+    assert _row_to_dict(row(status, STALE_SECONDS + 5))['status'] == 'interrupted'
+
+
+@pytest.mark.parametrize('status', ['queued', 'running'])
+def test_recently_written_job_keeps_its_status(status):
+    assert _row_to_dict(row(status, 1))['status'] == status
+
+
+def test_finished_job_is_never_interrupted():
+    data = _row_to_dict(row('finished', STALE_SECONDS * 10, finished_at=time.time()))
+    assert data['status'] == 'finished'
+    assert data['pending'] == 1
+    assert data['meta'] == {'requested_by': 'admin'}
+    assert data['items'] == [{'name': 'alice', 'status': 'done'}]
+
+
+def test_job_finishes_when_returned_and_every_item_ended():
+    job = Job('provision', ['alice', 'bob'])
+    assert job.status == 'queued'
+    
+    job.update('alice', status='running', stage='create')
+    job.complete()
+    assert job.status == 'running'
+    
+    job.update('alice', status='done', stage='ready')
+    job.fail('bob', 'Container creation failed')
+    data = job.to_dict()
+    assert job.status == 'finished'
+    assert (data['done'], data['failed'], data['pending']) == (1, 1, 0)
+
+
+def test_job_error_ends_it_with_items_pending():
+    job = Job('health_check', ['a'])
+    job.complete(error='boom')
+    assert job.status == 'failed'
+    assert job.finished
@@ -0,0 +1,73 @@
+"""Dashboard hub deltas"""
+
+import json
+
+from ptmanagement.api.live import DashboardHub
+
+
+class FakeDockerManager:
+    client = None
+
+
+def make_hub():
+    return DashboardHub(FakeDockerManager(), interval=3600)
+
+
+def state(users=(), containers=(), stats=None, version=1):
+    return {
+        'stats': stats or {'users': {'total': len(users)}},
+        'users': {u['username']: u for u in users},
+        'containers': {c['name']: c for c in containers},
+        'version': version
+    }
+
+
+def decode(message):
+    event, data = message.strip().split('\n')
+    return event[len('event: '):], json.loads(data[len('data: '):])
+
+
+def test_diff_reports_upserted_values_and_removed_keys():
+    old = {'a': {'n': 1}, 'b': {'n': 2}, 'c': {'n': 3}}
+    new = {'a': {'n': 1}, 'b': {'n': 20}, 'd': {'n': 4}}
+    
+    upserted, removed = DashboardHub._diff(old, new)
+    assert upserted == [{'n': 20}, {'n': 4}]
+    assert removed == ['c']
+
+
+def test_diff_of_equal_dicts_is_empty():
+    assert DashboardHub._diff({'a': 1}, {'a': 1}) == ([], [])
+
+
+def test_changes_from_nothing_is_a_snapshot():
+    hub = make_hub()
+    new = state(users=[{'username': 'alice'}])
+    
+    (message,) = hub._changes(None, new)
+    event, data = decode(message)
+    assert event == 'snapshot'
+    assert data['users'] == [{'username': 'alice'}]
+
+
+def test_changes_only_sends_what_changed():
+    hub = make_hub()
+    old = state(users=[{'username': 'alice'}], containers=[{'name': 'ptvnc3', 'status': 'running'}])
+    new = state(users=[{'username': 'alice'}], containers=[{'name': 'ptvnc3', 'status': 'exited'}], version=2)
+    
+    (message,) = hub._changes(old, new)
+    event, data = decode(message)
+    assert event == 'containers'
+    assert data == {'upserted': [{'name': 'ptvnc3', 'status': 'exited'}], 'removed': [], 'version': 2}
+    assert hub._changes(new, new) == []
+
+
+def test_subscriber_gets_the_snapshot_before_later_deltas():
+    hub = make_hub()
+    hub._state = state(users=[{'username': 'alice'}])
+    subscriber = hub.subscribe()
+    
+    with hub._lock:
+        hub._publish(hub._changes(hub._state, state(users=[{'username': 'alice'}, {'username': 'bob'}])))
+    events = [decode(subscriber.get_nowait())[0] for _ in range(subscriber.qsize())]
+    assert events == ['snapshot', 'users', 'stats']
@@ -0,0 +1,45 @@
+"""Log stream cursors"""
+
+import struct
+
+import pytest
+
+from ptmanagement.docker_mgmt.logs import CURSOR_PATTERN, iter_log_batches, timestamp_cursor
+
+
+def frame(stream, payload):
+    return struct.pack('>BxxxL', stream, len(payload)) + payload
+
+
+@pytest.mark.parametrize('timestamp, cursor', [
+    ('2024-01-01T12:00:00.123456789Z', '1704110400.123456790'),
+    ('2024-01-01T12:00:00.5Z', '1704110400.500000001'),
+    ('2024-01-01T12:00:00Z', '1704110400.000000001'),
+    # Carries into the next second
+    ('2024-01-01T12:00:00.999999999Z', '1704110401.000000000'),
+])
+def test_cursor_is_one_nanosecond_after_the_line(timestamp, cursor):
+    assert timestamp_cursor(timestamp) == cursor
+    assert CURSOR_PATTERN.match(cursor)
+
+
+@pytest.mark.parametrize('timestamp', ['', 'not a time', '2024-13-01T00:00:00Z', '2024-01-01T12:00:00.12abZ'])
+def test_unparseable_timestamp_has_no_cursor(timestamp):
+    assert timestamp_cursor(timestamp) is None
+
+
+def test_batches_carry_the_cursor_of_their_last_line():
+    body = (frame(1, b'2024-01-01T12:00:00.000000001Z first\n')
+            + frame(2, b'2024-01-01T12:00:00.000000002Z second\n')
+            + frame(1, b'2024-01-01T12:00:00.000000003Z third'))
+    chunks = [body[:30], body[30:90], body[90:]]
+    
+    batches = list(iter_log_batches(chunks))
+    entries = [entry for batch, _ in batches for entry in batch]
+    assert [(e['stream'], e['line']) for e in entries] == [
+        ('stdout', 'first'), ('stderr', 'second'), ('stdout', 'third')
+    ]
+    # The unterminated last line is flushed at the end of the stream
+    assert batches[-1][1] == '1704110400.000000004'
+    for batch, cursor in batches:
+        assert cursor == timestamp_cursor(batch[-1]['time'])
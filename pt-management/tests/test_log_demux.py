@@ -0,0 +1,91 @@
+"""Log frame demultiplexing and line splitting"""
+
+import struct
+
+import pytest
+
+from ptmanagement.docker_mgmt.logs import LineSplitter, LogDemuxer, split_lines
+
+
+def frame(stream, payload):
+    return struct.pack('>BxxxL', stream, len(payload)) + payload
+
+
+# One line per frame, several lines in one frame, and lines spanning frames
+# (interleaved with the other stream)
+BODY = b''.join([
+    frame(1, b'one\n'),
+    frame(2, b'err one\n'),
+    frame(1, b'two\nthree\n'),
+    frame(1, b'fo'),
+    frame(2, b'err '),
+    frame(1, b'ur\n'),
+    frame(2, b'two\n'),
+    frame(1, b'\n'),
+    frame(1, b''),
+    frame(2, b'tail'),
+])
+LINES = [
+    ('stdout', b'one'),
+    ('stderr', b'err one'),
+    ('stdout', b'two'),
+    ('stdout', b'three'),
+    ('stdout', b'four'),
+    ('stderr', b'err two'),
+    ('stdout', b''),
+    ('stderr', b'tail'),
+]
+
+
+def streamed(chunks, tty=False):
+    demuxer = LogDemuxer(tty)
+    splitter = LineSplitter()
+    lines = []
+    for chunk in chunks:
+        lines.extend(demuxer.feed_lines(chunk, splitter))
+    return lines + splitter.flush(), demuxer
+
+
+def test_split_lines_of_a_whole_body():
+    assert split_lines(BODY) == LINES
+
+
+@pytest.mark.parametrize('cut', range(1, len(BODY)))
+def test_any_chunk_boundary_gives_the_same_lines(cut):
+    lines, demuxer = streamed([BODY[:cut], BODY[cut:]])
+    assert lines == LINES
+    assert not demuxer.truncated
+
+
+@pytest.mark.parametrize('size', [1, 2, 3, 7, 9])
+def test_small_chunks_give_the_same_lines(size):
+    lines, _ = streamed(BODY[i:i + size] for i in range(0, len(BODY), size))
+    assert lines == LINES
+
+
+def test_memoryview_and_bytearray_chunks():
+    lines, _ = streamed([memoryview(BODY)[:20], bytearray(BODY[20:])])
+    assert lines == LINES
+
+
+def test_feed_returns_frames_across_chunks():
+    demuxer = LogDemuxer()
+    body = frame(1, b'hello\n') + frame(2, b'world\n')
+    frames = demuxer.feed(body[:5]) + demuxer.feed(body[5:17]) + demuxer.feed(body[17:])
+    assert [(stream, bytes(payload)) for stream, payload in frames] == [
+        ('stdout', b'hello\n'), ('stderr', b'world\n')
+    ]
+    assert not demuxer.truncated
+
+
+def test_stream_ending_inside_a_frame_is_truncated():
+    lines, demuxer = streamed([frame(1, b'complete\n') + frame(1, b'cut off\n')[:10]])
+    assert lines == [('stdout', b'complete')]
+    assert demuxer.truncated
+
+
+def test_tty_output_is_unframed_stdout():
+    chunks = [b'first li', b'ne\nsecond\nthi', b'rd']
+    lines, _ = streamed(chunks, tty=True)
+    assert lines == [('stdout', b'first line'), ('stdout', b'second'), ('stdout', b'third')]
+    assert split_lines(b''.join(chunks), tty=True) == lines
@@ -0,0 +1,33 @@
+"""Batched Guacamole password hashing matches the single-password path"""
+
+import hashlib
+
+from ptmanagement.db.password_hash import SALT_BYTES, hash_password, hash_passwords
+
+
+def test_hash_passwords_matches_hash_password():
+    passwords = ['Cisco123', 'pässwörd', '', 'x' * 200]
+    hashed = hash_passwords(passwords)
+    
+    assert len(hashed) == len(passwords)
+    for password, (digest, salt) in zip(passwords, hashed):
+        assert len(salt) == SALT_BYTES
+        assert hash_password(password, salt) == (digest, salt)
+
+
+def test_hash_passwords_uses_a_fresh_salt_per_password():
+    hashed = hash_passwords(['same'] * 50)
+    
+    assert len({salt for _, salt in hashed}) == 50
+    assert len({digest for digest, _ in hashed}) == 50
+
+
+def test_hash_passwords_empty():
+    assert hash_passwords([]) == []
+    assert hash_passwords(iter(())) == []
+
+
+def test_hash_password_uses_uppercase_hex_salt():
+    salt = bytes(range(SALT_BYTES))
+    digest, _ = hash_password('secret', salt)
+    assert digest == hashlib.sha256(('secret' + salt.hex().upper()).encode('utf-8')).digest()
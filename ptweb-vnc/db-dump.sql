@@ -745,6 +745,47 @@ LOCK TABLES `user_container_mapping` WRITE;
 /*!40000 ALTER TABLE `user_container_mapping` ENABLE KEYS */;
 UNLOCK TABLES;
 
+--
+-- Table structure for table `pt_management_job`
+--
+
+DROP TABLE IF EXISTS `pt_management_job`;
+/*!40101 SET @saved_cs_client     = @@character_set_client */;
+/*!40101 SET character_set_client = utf8 */;
+CREATE TABLE `pt_management_job` (
+  `job_id` char(32) NOT NULL,
+  `kind` varchar(64) NOT NULL,
+  `status` varchar(20) NOT NULL,
+  `total` int(11) NOT NULL DEFAULT 0,
+  `done` int(11) NOT NULL DEFAULT 0,
+  `failed` int(11) NOT NULL DEFAULT 0,
+  `meta` mediumtext,
+  `items` mediumtext,
+  `result` mediumtext,
+  `error` text,
+  `created_at` double NOT NULL,
+  `updated_at` double NOT NULL,
+  `finished_at` double NULL DEFAULT NULL,
+  PRIMARY KEY (`job_id`),
+  KEY `idx_created_at` (`created_at`)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8;
+/*!40101 SET character_set_client = @saved_cs_client */;
+
+--
+-- Table structure for table `pt_container_hibernation`
+--
+
+DROP TABLE IF EXISTS `pt_container_hibernation`;
+/*!40101 SET @saved_cs_client     = @@character_set_client */;
+/*!40101 SET character_set_client = utf8 */;
+CREATE TABLE `pt_container_hibernation` (
+  `container_name` varchar(255) NOT NULL,
+  `mode` varchar(10) NOT NULL,
+  `hibernated_at` datetime NOT NULL,
+  PRIMARY KEY (`container_name`)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8;
+/*!40101 SET character_set_client = @saved_cs_client */;
+
 /*!40103 SET TIME_ZONE=@OLD_TIME_ZONE */;
 
 /*!40101 SET SQL_MODE=@OLD_SQL_MODE */;
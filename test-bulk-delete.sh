@@ -36,6 +36,27 @@ api_call() {
     fi
 }
 
+# Function to wait for a background job and print its final JSON
+# (bulk endpoints return 202 with a job_id; the outcome is in job.result)
+wait_for_job() {
+    local job_id=$1
+    local job_json=""
+    local status=""
+    
+    if [ -z "$job_id" ]; then
+        return
+    fi
+    for _ in $(seq 1 120); do
+        job_json=$(api_call "GET" "/api/jobs/$job_id" "")
+        status=$(echo "$job_json" | python3 -c 'import json, sys; print(json.load(sys.stdin)["job"]["status"])' 2>/dev/null || true)
+        case "$status" in
+            finished|failed|interrupted) break ;;
+        esac
+        sleep 1
+    done
+    echo "$job_json"
+}
+
 # Step 1: Login
 print_section "STEP 1: Authentication"
 echo "Logging in as ptadmin..."
@@ -113,8 +134,19 @@ DELETE_RESULT=$(api_call "POST" "/api/users/bulk/delete" "$DELETE_PAYLOAD")
 echo "API Response:"
 echo "$DELETE_RESULT" | python3 -m json.tool 2>/dev/null || echo "$DELETE_RESULT"
 
-DELETED_COUNT=$(echo "$DELETE_RESULT" | grep -o '"count_deleted":[0-9]*' | cut -d: -f2)
-NOT_FOUND=$(echo "$DELETE_RESULT" | grep -o '"count_not_found":[0-9]*' | cut -d: -f2)
+JOB_ID=$(echo "$DELETE_RESULT" | grep -o '"job_id":"[^"]*"' | cut -d'"' -f4)
+if [ -z "$JOB_ID" ]; then
+    echo "❌ Bulk delete did not return a job_id"
+    exit 1
+fi
+
+echo "Waiting for job $JOB_ID to finish..."
+JOB_RESULT=$(wait_for_job "$JOB_ID")
+echo "Job result:"
+echo "$JOB_RESULT" | python3 -c 'import json, sys; print(json.dumps(json.load(sys.stdin)["job"]["result"], indent=4))' 2>/dev/null || echo "$JOB_RESULT"
+
+DELETED_COUNT=$(echo "$JOB_RESULT" | grep -o '"count_deleted":[0-9]*' | cut -d: -f2)
+NOT_FOUND=$(echo "$JOB_RESULT" | grep -o '"count_not_found":[0-9]*' | cut -d: -f2)
 
 echo ""
 echo "✅ Successfully deleted: $DELETED_COUNT"
@@ -166,8 +198,10 @@ DELETE_CSV_FORMAT='{
 }'
 
 DELETE_RESULT=$(api_call "POST" "/api/users/bulk/delete" "$DELETE_CSV_FORMAT")
+JOB_ID=$(echo "$DELETE_RESULT" | grep -o '"job_id":"[^"]*"' | cut -d'"' -f4)
+JOB_RESULT=$(wait_for_job "$JOB_ID")
 echo "✅ CSV format with password field accepted"
-echo "Result: $(echo "$DELETE_RESULT" | grep -o '"count_deleted":[0-9]*')"
+echo "Result: $(echo "$JOB_RESULT" | grep -o '"count_deleted":[0-9]*')"
 
 # Final summary
 print_section "FINAL SUMMARY"